@@ -1,13 +1,15 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import joblib
 import os
-from streamlit_extras.colored_header import colored_header
-from streamlit_extras.card import card
-from streamlit_extras.metric_cards import style_metric_cards
-from streamlit_extras.stylable_container import stylable_container
+import sys
+from contextlib import nullcontext
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Only light modules here: pandas, scikit-learn, joblib, matplotlib and
+# streamlit_extras load on first use in the recommendation branch
+from nutriguide.cache import default_cache
+from nutriguide.charts import NutrientChartRenderer, chart_backend, nutrient_chart_spec
+from nutriguide.engine import Profile
+from nutriguide.instrumentation import default_instrumentation, span, start_trace
 
 # Set page config for better appearance
 st.set_page_config(
@@ -113,50 +115,40 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load datasets
-@st.cache_data
-def load_data():
-    foods_df = pd.read_csv("datasets/Final_Data_Set.csv")
-    meals_df = pd.read_csv("datasets/Meal_Suggestions.csv")
-    nutrients_df = pd.read_csv("datasets/Micro_and_Macro_Nutrients.csv")
-    return foods_df, meals_df, nutrients_df
-
-foods_df, meals_df, nutrients_df = load_data()
+# Datasets, their indexes and the models as one version, rebuilt in the
+# background when files under datasets/ or model/ change; a rerun keeps the
+# version it started with, so a reload never shows up mid-page
+@st.cache_resource
+def get_artifact_store():
+    from nutriguide.artifacts import default_store
+    return default_store()
 
-# Load trained model
-model = joblib.load("model/food_recommendation_model.pkl")
+# Recommendations shared by every session, keyed on the normalized profile, so
+# reruns (tab switches, unrelated widgets) are lookups
+@st.cache_resource
+def get_recommendation_cache():
+    return default_cache()
 
-def calculate_bmr(weight, height, age, gender):
-    if gender == "male":
-        return 10 * weight + 6.25 * height - 5 * age + 5
-    else:
-        return 10 * weight + 6.25 * height - 5 * age - 161
+# Meal portions composed from the food catalog to hit the macro targets and
+# micronutrient floors, cached per (quantized) target across sessions
+@st.cache_resource
+def get_meal_optimizer():
+    from nutriguide.mealplan import default_optimizer
+    return default_optimizer()
 
-def calculate_tdee(bmr, activity_level):
-    factors = {
-        "sedentary": 1.2,
-        "light": 1.375,
-        "moderate": 1.55,
-        "active": 1.725,
-        "very active": 1.9
-    }
-    return bmr * factors.get(activity_level, 1.2)
+# Seven-day plans without repeats on top of the same optimizer; a swap
+# re-plans one meal of one day
+@st.cache_resource
+def get_weekly_planner():
+    from nutriguide.weekly import WeeklyPlanner
+    return WeeklyPlanner(get_meal_optimizer())
 
-def calculate_macronutrients(tdee, goal):
-    if goal == "lose":
-        protein = 2.2  # g per kg of body weight
-        fat = 0.25 * tdee / 9  # 25% of calories from fat
-        carbs = (tdee - (protein + fat)) / 4
-    elif goal == "gain":
-        protein = 1.6
-        fat = 0.3 * tdee / 9
-        carbs = (tdee - (protein + fat)) / 4
-    else:  # maintain
-        protein = 1.8
-        fat = 0.25 * tdee / 9
-        carbs = (tdee - (protein + fat)) / 4
-    return protein, fat, carbs
+# Nutrient chart backend: cached matplotlib PNGs (default) or browser-side Vega-Lite
+CHART_BACKEND = chart_backend()
 
+@st.cache_resource
+def get_chart_renderer():
+    return NutrientChartRenderer()
 
 # Hero Section
 col1, col2 = st.columns([2, 1])
@@ -206,19 +198,41 @@ with st.sidebar:
 
 # Main Content Area
 if 'recommendations_generated' in st.session_state and st.session_state['recommendations_generated']:
-    # Calculate BMR and TDEE
-    bmr = calculate_bmr(weight, height, age, gender)
-    tdee = calculate_tdee(bmr, activity)
-    protein_need, fat_need, carbs_need = calculate_macronutrients(tdee, goal)
-    
-    # Display Metrics in a Card Layout
-    st.markdown('<h2 class="custom-subheader">Your Daily Nutrition Needs</h2>', unsafe_allow_html=True)
-    
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        with stylable_container(
-            key="metric_card_bmr",
-            css_styles="""
+    from streamlit_extras.stylable_container import stylable_container
+
+    # ?debug=1 (or NUTRIGUIDE_DEBUG=1) lists this rerun's stage timings at the end of the page
+    debug = st.query_params.get("debug") == "1" or os.environ.get("NUTRIGUIDE_DEBUG") == "1"
+    with (start_trace() if debug else nullcontext()) as rerun_trace:
+        # Datasets and indexes load on the first recommendation in the process
+        artifacts = get_artifact_store().current()
+        engine = artifacts.engine
+        recommendations = get_recommendation_cache()
+
+        # Calculate BMR, TDEE, macros, meal plan and nutrient targets
+        with span("recommendation"):
+            recommendation = recommendations.recommend(engine, Profile(
+                age=age,
+                gender=gender,
+                weight=weight,
+                height=height,
+                activity=activity,
+                goal=goal,
+                diet=diet,
+                weekly_activity_days=weekly_activity_days,
+                disease=disease,
+                food_allergies=food_allergies,
+            ))
+        bmr, tdee = recommendation.bmr, recommendation.tdee
+        protein_need, fat_need, carbs_need = recommendation.protein, recommendation.fat, recommendation.carbs
+    
+        # Display Metrics in a Card Layout
+        st.markdown('<h2 class="custom-subheader">Your Daily Nutrition Needs</h2>', unsafe_allow_html=True)
+    
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            with stylable_container(
+                key="metric_card_bmr",
+                css_styles="""
                 {
                     background: white;
                     border-radius: 12px;
@@ -237,15 +251,15 @@ if 'recommendations_generated' in st.session_state and st.session_state['recomme
                     margin: 0;
                 }
             """
-        ):
-            st.markdown("<h3>Basal Metabolic Rate</h3>", unsafe_allow_html=True)
-            st.markdown(f"<p>{bmr:.0f} kcal</p>", unsafe_allow_html=True)
-            st.caption("Calories your body needs at rest")
-    
-    with col2:
-        with stylable_container(
-            key="metric_card_tdee",
-            css_styles="""
+            ):
+                st.markdown("<h3>Basal Metabolic Rate</h3>", unsafe_allow_html=True)
+                st.markdown(f"<p>{bmr:.0f} kcal</p>", unsafe_allow_html=True)
+                st.caption("Calories your body needs at rest")
+    
+        with col2:
+            with stylable_container(
+                key="metric_card_tdee",
+                css_styles="""
                 {
                     background: white;
                     border-radius: 12px;
@@ -264,15 +278,15 @@ if 'recommendations_generated' in st.session_state and st.session_state['recomme
                     margin: 0;
                 }
             """
-        ):
-            st.markdown("<h3>Total Daily Energy Expenditure</h3>", unsafe_allow_html=True)
-            st.markdown(f"<p>{tdee:.0f} kcal</p>", unsafe_allow_html=True)
-            st.caption("Calories needed based on activity level")
-    
-    with col3:
-        with stylable_container(
-            key="metric_card_protein",
-            css_styles="""
+            ):
+                st.markdown("<h3>Total Daily Energy Expenditure</h3>", unsafe_allow_html=True)
+                st.markdown(f"<p>{tdee:.0f} kcal</p>", unsafe_allow_html=True)
+                st.caption("Calories needed based on activity level")
+    
+        with col3:
+            with stylable_container(
+                key="metric_card_protein",
+                css_styles="""
                 {
                     background: white;
                     border-radius: 12px;
@@ -291,15 +305,15 @@ if 'recommendations_generated' in st.session_state and st.session_state['recomme
                     margin: 0;
                 }
             """
-        ):
-            st.markdown("<h3>Protein Target</h3>", unsafe_allow_html=True)
-            st.markdown(f"<p>{protein_need:.1f} g/kg</p>", unsafe_allow_html=True)
-            st.caption(f"{(protein_need * weight):.0f}g per day")
-    
-    with col4:
-        with stylable_container(
-            key="metric_card_macro",
-            css_styles="""
+            ):
+                st.markdown("<h3>Protein Target</h3>", unsafe_allow_html=True)
+                st.markdown(f"<p>{protein_need:.1f} g/kg</p>", unsafe_allow_html=True)
+                st.caption(f"{(protein_need * weight):.0f}g per day")
+    
+        with col4:
+            with stylable_container(
+                key="metric_card_macro",
+                css_styles="""
                 {
                     background: white;
                     border-radius: 12px;
@@ -318,93 +332,76 @@ if 'recommendations_generated' in st.session_state and st.session_state['recomme
                     margin: 0;
                 }
             """
-        ):
-            st.markdown("<h3>Macro Split</h3>", unsafe_allow_html=True)
-            st.markdown(f"<p>{carbs_need:.0f}g C / {protein_need*weight:.0f}g P / {fat_need:.0f}g F</p>", unsafe_allow_html=True)
-            st.caption("Carbs / Protein / Fat")
+            ):
+                st.markdown("<h3>Macro Split</h3>", unsafe_allow_html=True)
+                st.markdown(f"<p>{carbs_need:.0f}g C / {protein_need*weight:.0f}g P / {fat_need:.0f}g F</p>", unsafe_allow_html=True)
+                st.caption("Carbs / Protein / Fat")
     
-    # In the meal recommendation section (replace the existing code):
-
-    # Meal Plan Section
-    st.markdown("---")
-    st.markdown('<h2 class="custom-subheader">Your Personalized Meal Plan</h2>', unsafe_allow_html=True)
+        # In the meal recommendation section (replace the existing code):
 
-    # Filter meals based on dietary preference
-    if diet == "veg":
-        meals_df = meals_df[~meals_df['Breakfast'].str.contains('egg|meat|chicken|fish', case=False, regex=True)]
-        meals_df = meals_df[~meals_df['Lunch'].str.contains('egg|meat|chicken|fish', case=False, regex=True)]
-        meals_df = meals_df[~meals_df['Dinner'].str.contains('egg|meat|chicken|fish', case=False, regex=True)]
-        meals_df = meals_df[~meals_df['Snacks'].str.contains('egg|meat|chicken|fish', case=False, regex=True)]
-    elif diet == "vegan":
-        meals_df = meals_df[~meals_df['Breakfast'].str.contains('egg|meat|chicken|fish|dairy|milk|cheese|yogurt', case=False, regex=True)]
-        meals_df = meals_df[~meals_df['Lunch'].str.contains('egg|meat|chicken|fish|dairy|milk|cheese|yogurt', case=False, regex=True)]
-        meals_df = meals_df[~meals_df['Dinner'].str.contains('egg|meat|chicken|fish|dairy|milk|cheese|yogurt', case=False, regex=True)]
-        meals_df = meals_df[~meals_df['Snacks'].str.contains('egg|meat|chicken|fish|dairy|milk|cheese|yogurt', case=False, regex=True)]
-    elif diet == "pescatarian":
-        meals_df = meals_df[~meals_df['Breakfast'].str.contains('meat|chicken', case=False, regex=True)]
-        meals_df = meals_df[~meals_df['Lunch'].str.contains('meat|chicken', case=False, regex=True)]
-        meals_df = meals_df[~meals_df['Dinner'].str.contains('meat|chicken', case=False, regex=True)]
-        meals_df = meals_df[~meals_df['Snacks'].str.contains('meat|chicken', case=False, regex=True)]
+        # Meal Plan Section
+        st.markdown("---")
+        st.markdown('<h2 class="custom-subheader">Your Personalized Meal Plan</h2>', unsafe_allow_html=True)
 
-    # Select the best matching meal plan (based on TDEE)
-    meal_plan = meals_df.merge(foods_df, left_on="Daily_Calories", right_on="Daily_Calories", how="left")
-    meal_plan['diff'] = abs(meal_plan['Daily_Calories'] - tdee)
-    best_meal_plan = meal_plan.sort_values(by='diff').head(1)
-
-# Display the meal plan tabs...
-    
-    # Select the best matching meal plan (based on TDEE)
-    meal_plan = meals_df.merge(foods_df, left_on="Daily_Calories", right_on="Daily_Calories", how="left")
-    meal_plan['diff'] = abs(meal_plan['Daily_Calories'] - tdee)
-    best_meal_plan = meal_plan.sort_values(by='diff').head(3)
+        # Closest meal plan to the user's TDEE among the diet-compatible ones
+        best_meal_plan = recommendation.meal_plan
     
-    tab1, tab2, tab3, tab4 = st.tabs(["Breakfast", "Lunch", "Dinner", "Snacks"])
+        tab1, tab2, tab3, tab4 = st.tabs(["Breakfast", "Lunch", "Dinner", "Snacks"])
     
-    with tab1:
-        if not best_meal_plan.empty:
-            st.markdown(f"""
+        with tab1:
+            if best_meal_plan is not None:
+                st.markdown(f"""
             <div class="card">
                 <h3> Breakfast</h3>
-                <p>{best_meal_plan['Breakfast'].values[0]}</p>
-                <p class="small" style="color: #666;">~400 kcal</p>
+                <p>{best_meal_plan.breakfast}</p>
             </div>
             """, unsafe_allow_html=True)
     
-    with tab2:
-        if not best_meal_plan.empty:
-            st.markdown(f"""
+        with tab2:
+            if best_meal_plan is not None:
+                st.markdown(f"""
             <div class="card">
                 <h3>Lunch</h3>
-                <p>{best_meal_plan['Lunch'].values[0]}</p>
-                <p class="small" style="color: #666;">~600 kcal</p>
+                <p>{best_meal_plan.lunch}</p>
             </div>
             """, unsafe_allow_html=True)
     
-    with tab3:
-        if not best_meal_plan.empty:
-            st.markdown(f"""
+        with tab3:
+            if best_meal_plan is not None:
+                st.markdown(f"""
             <div class="card">
                 <h3> Dinner</h3>
-                <p>{best_meal_plan['Dinner'].values[0]}</p>
-                <p class="small" style="color: #666;">~500 kcal</p>
+                <p>{best_meal_plan.dinner}</p>
             </div>
             """, unsafe_allow_html=True)
     
-    with tab4:
-        if not best_meal_plan.empty:
-            st.markdown(f"""
+        with tab4:
+            if best_meal_plan is not None:
+                st.markdown(f"""
             <div class="card">
                 <h3> Snacks</h3>
-                <p>{best_meal_plan['Snacks'].values[0]}</p>
-                <p class="small" style="color: #666;">~200 kcal</p>
+                <p>{best_meal_plan.snacks}</p>
             </div>
             """, unsafe_allow_html=True)
     
-    # Water Intake Recommendation
-    st.markdown(f"""
+        # Foods and portions per meal for the user's targets, diet and allergies: a
+        # plan of its own, composed from the food catalog rather than the suggestions above
+        optimized_plan = get_meal_optimizer().plan_for(recommendation)
+        portions = "".join(f"<p><b>{slot.title()}</b>: {optimized_plan.describe(slot)}</p>"
+                           for slot in ("breakfast", "lunch", "dinner", "snacks"))
+        st.markdown(f"""
+    <div class="card">
+        <h3> Portions for Your Targets</h3>
+        <p class="small" style="color: #666;">Foods and servings from our catalog that meet your calorie and macro targets</p>
+        {portions}
+    </div>
+    """, unsafe_allow_html=True)
+
+        # Water Intake Recommendation
+        st.markdown(f"""
     <div class="card">
         <h3> Hydration</h3>
-        <p>Recommended water intake: {best_meal_plan['Water_Intake_L'].values[0]} liters per day</p>
+        <p>Recommended water intake: {best_meal_plan.water_intake_l} liters per day</p>
         <div style="height: 10px; background: #e0f2fe; border-radius: 5px; margin-top: 10px;">
             <div style="width: 75%; height: 100%; background: #4b6cb7; border-radius: 5px;"></div>
         </div>
@@ -412,81 +409,62 @@ if 'recommendations_generated' in st.session_state and st.session_state['recomme
     </div>
     """, unsafe_allow_html=True)
     
-    # Nutrient Comparison Section
-    st.markdown("---")
-    st.markdown('<h2 class="custom-subheader">Nutrient Analysis</h2>', unsafe_allow_html=True)
-    
-    # Actual needs based on the user input
-    actual = {
-        "Calories": tdee,
-        "Protein": weight * protein_need,
-        "Fat": fat_need,
-        "Carbs": carbs_need
-    }
-    
-    # Find the row closest to the user's TDEE from the nutrients_df
-    nutrient_row = nutrients_df.iloc[(nutrients_df["Daily_Calories"] - tdee).abs().argsort()[:1]].iloc[0]
-    
-    # Required nutrients based on the closest match
-    required = {
-        "Calories": nutrient_row["Daily_Calories"],
-        "Protein": nutrient_row["Protein_g"],
-        "Fat": nutrient_row["Fat_g"],
-        "Carbs": (nutrient_row["Daily_Calories"] - (nutrient_row["Protein_g"]*4 + nutrient_row["Fat_g"]*9)) / 4
-    }
-    
-    # Create a DataFrame for visualization
-    df_nutrients = pd.DataFrame({
-        "Nutrient": list(actual.keys()),
-        "Your Needs": list(actual.values()),
-        "Recommended": list(required.values())
-    })
-    
-    # Melt the DataFrame for seaborn
-    df_melted = df_nutrients.melt(id_vars="Nutrient", var_name="Type", value_name="Amount")
-    
-    # Create the visualization
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.set_style("whitegrid")
-    sns.set_palette("pastel")
-    
-    barplot = sns.barplot(
-        data=df_melted,
-        x="Nutrient",
-        y="Amount",
-        hue="Type",
-        ax=ax
-    )
-    
-    # Customize the plot
-    ax.set_title("Your Nutrient Needs vs. Recommended Daily Allowance", fontsize=16, pad=20)
-    ax.set_xlabel("Nutrients", fontsize=12)
-    ax.set_ylabel("Amount (g or kcal)", fontsize=12)
-    ax.legend(title='', fontsize=10)
-    
-    # Add value labels on top of bars
-    for p in ax.patches:
-        ax.annotate(
-            f"{p.get_height():.0f}",
-            (p.get_x() + p.get_width() / 2., p.get_height()),
-            ha='center',
-            va='center',
-            xytext=(0, 10),
-            textcoords='offset points',
-            fontsize=10
-        )
-    
-    # Display the plot
-    st.pyplot(fig)
-    
-    # Additional Tips Section
-    st.markdown("---")
-    st.markdown('<h2 class="custom-subheader">Nutrition Tips for You</h2>', unsafe_allow_html=True)
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown("""
+        # Weekly Plan Section
+        st.markdown("---")
+        st.markdown('<h2 class="custom-subheader">Your Week</h2>', unsafe_allow_html=True)
+
+        # Planned once per profile and kept in the session, so swaps build on it
+        planner = get_weekly_planner()
+        if st.session_state.get('weekly_profile') != recommendation.profile:
+            st.session_state['weekly_plan'] = planner.plan_for(recommendation)
+            st.session_state['weekly_profile'] = recommendation.profile
+
+        swap_day, swap_slot, swap_button = st.columns([1, 1, 1])
+        with swap_day:
+            day = st.selectbox("Day", range(planner.days), format_func=lambda d: f"Day {d + 1}", key="swap_day")
+        with swap_slot:
+            slot = st.selectbox("Meal", ["breakfast", "lunch", "dinner", "snacks"], format_func=str.title, key="swap_slot")
+        with swap_button:
+            if st.button("Swap this meal", key="swap_button"):
+                # Only the chosen day is re-optimized; the rest of the week is kept
+                st.session_state['weekly_plan'] = planner.swap(st.session_state['weekly_plan'], day, slot)
+        weekly_plan = st.session_state['weekly_plan']
+
+        for d, day_tab in enumerate(st.tabs([f"Day {d + 1}" for d in range(planner.days)])):
+            with day_tab:
+                meals = "".join(f"<p><b>{slot.title()}</b>: {weekly_plan.days[d].describe(slot)}</p>"
+                                for slot in ("breakfast", "lunch", "dinner", "snacks"))
+                st.markdown(f"""
+            <div class="card">
+                <h3> Day {d + 1} - {weekly_plan.days[d].totals["Calories"]:.0f} kcal</h3>
+                {meals}
+            </div>
+            """, unsafe_allow_html=True)
+
+        # Nutrient Comparison Section
+        st.markdown("---")
+        st.markdown('<h2 class="custom-subheader">Nutrient Analysis</h2>', unsafe_allow_html=True)
+    
+        # Actual needs based on the user input, and the targets of the closest
+        # row of the nutrients dataset
+        actual = recommendation.actual_nutrients()
+        required = recommendation.recommended_nutrients()
+    
+        # Rendered once per distinct (actual, required) values and reused across
+        # reruns and sessions; the Vega-Lite backend is drawn by the browser instead
+        if CHART_BACKEND == "vega":
+            st.vega_lite_chart(spec=nutrient_chart_spec(actual, required), width="stretch")
+        else:
+            st.image(get_chart_renderer().render(actual, required), width="stretch")
+    
+        # Additional Tips Section
+        st.markdown("---")
+        st.markdown('<h2 class="custom-subheader">Nutrition Tips for You</h2>', unsafe_allow_html=True)
+    
+        col1, col2, col3 = st.columns(3)
+    
+        with col1:
+            st.markdown("""
         <div class="card">
             <h3> Protein Sources</h3>
             <ul>
@@ -499,8 +477,8 @@ if 'recommendations_generated' in st.session_state and st.session_state['recomme
         </div>
         """, unsafe_allow_html=True)
     
-    with col2:
-        st.markdown("""
+        with col2:
+            st.markdown("""
         <div class="card">
             <h3>Meal Timing</h3>
             <ul>
@@ -512,8 +490,8 @@ if 'recommendations_generated' in st.session_state and st.session_state['recomme
         </div>
         """, unsafe_allow_html=True)
     
-    with col3:
-        st.markdown("""
+        with col3:
+            st.markdown("""
         <div class="card">
             <h3> Progress Tracking</h3>
             <ul>
@@ -525,9 +503,9 @@ if 'recommendations_generated' in st.session_state and st.session_state['recomme
         </div>
         """, unsafe_allow_html=True)
     
-    # Final CTA
-    st.markdown("---")
-    st.markdown("""
+        # Final CTA
+        st.markdown("---")
+        st.markdown("""
     <div style="text-align: center; padding: 30px; background: linear-gradient(90deg, #4b6cb7 0%, #182848 100%); border-radius: 12px; color: white;">
         <h2>Ready to Transform Your Nutrition?</h2>
         <p style="font-size: 1.1rem;">Save your meal plan and track your progress with our premium features</p>
@@ -537,6 +515,15 @@ if 'recommendations_generated' in st.session_state and st.session_state['recomme
     </div>
     """, unsafe_allow_html=True)
 
+    if rerun_trace is not None:
+        instrumentation = default_instrumentation()
+        with st.expander("Debug: stage timings"):
+            st.code(str(rerun_trace) or "No spans recorded", language=None)
+            st.caption("Since the process started")
+            st.code("\n".join(str(stats) for stats in instrumentation.stats().values()), language=None)
+            st.download_button("Download metrics (Prometheus text)", instrumentation.exposition(),
+                               file_name="nutriguide_metrics.prom", mime="text/plain")
+
 else:
     # Default state before recommendations are generated
     st.markdown("""
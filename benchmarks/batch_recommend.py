@@ -0,0 +1,67 @@
+"""Cohort recommendations: vectorized batch API vs. a loop over the scalar path.
+
+    python -m benchmarks.batch_recommend [--sizes 100000 1000000] [--loop-size 5000]
+
+Profiles are resampled (with replacement) from Final_Data_Set.csv.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from nutriguide.batch import recommend_batch
+from nutriguide.data import load_datasets
+from nutriguide.diets import DIET_PREFERENCES
+from nutriguide.engine import Profile, RecommendationEngine
+from nutriguide.nutrition import HEALTH_GOALS
+
+
+def sample_profiles(foods, n, seed=0):
+    rows = np.random.default_rng(seed).integers(0, len(foods), n)
+    return foods.iloc[rows].reset_index(drop=True)
+
+
+def loop_recommend(engine, profiles):
+    """One ``engine.recommend`` call (scalar BMR/TDEE/macros + lookups) per profile."""
+    results = []
+    for row in profiles.itertuples(index=False):
+        results.append(engine.recommend(Profile(
+            age=row.Age,
+            gender=str(row.Gender).lower(),
+            weight=row.Weight_kg,
+            height=row.Height_cm,
+            activity=str(row.Activity_Level).lower(),
+            goal=HEALTH_GOALS.get(str(row.Health_Goal).lower(), "maintain"),
+            diet=DIET_PREFERENCES.get(str(row.Diet_Preference).lower(), "non-veg"),
+        ), k=1))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--loop-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    data = load_datasets()
+    engine = RecommendationEngine(data)
+
+    profiles = sample_profiles(data.foods, args.loop_size)
+    start = time.perf_counter()
+    loop_recommend(engine, profiles)
+    loop_rate = args.loop_size / (time.perf_counter() - start)
+    print(f"{'scalar loop':<22}{args.loop_size:>10,} profiles {loop_rate:>14,.0f} profiles/s")
+
+    recommend_batch(profiles, engine=engine)  # warm the per-diet indexes
+    for n in args.sizes:
+        profiles = sample_profiles(data.foods, n)
+        for with_meals in (False, True):
+            start = time.perf_counter()
+            recommend_batch(profiles, engine=engine, with_meals=with_meals)
+            rate = n / (time.perf_counter() - start)
+            label = "batch + meal text" if with_meals else "batch (row ids)"
+            print(f"{label:<22}{n:>10,} profiles {rate:>14,.0f} profiles/s  ({rate / loop_rate:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
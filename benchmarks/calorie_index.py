@@ -0,0 +1,66 @@
+"""Meal-plan lookup: merge + sort (old app path) vs. CalorieIndex.
+
+    python -m benchmarks.calorie_index [--queries 200] [--k 3]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from nutriguide.index import CalorieIndex
+from nutriguide.paths import DATASETS_DIR
+
+
+def merge_sort_lookup(meals_df, foods_df, tdee, k):
+    meal_plan = meals_df.merge(foods_df, left_on="Daily_Calories", right_on="Daily_Calories", how="left")
+    meal_plan['diff'] = abs(meal_plan['Daily_Calories'] - tdee)
+    return meal_plan.sort_values(by='diff').head(k)
+
+
+def index_lookup(meals_df, index, tdee, k):
+    return meals_df.iloc[index.nearest(tdee, k=k)]
+
+
+def _time_per_call(fn, targets):
+    start = time.perf_counter()
+    for t in targets:
+        fn(t)
+    return (time.perf_counter() - start) / len(targets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    foods_df = pd.read_csv(DATASETS_DIR / "Final_Data_Set.csv")
+    meals_df = pd.read_csv(DATASETS_DIR / "Meal_Suggestions.csv")
+    targets = np.random.default_rng(0).uniform(1200, 5000, args.queries)
+
+    start = time.perf_counter()
+    index = CalorieIndex.from_frame(meals_df)
+    build = time.perf_counter() - start
+
+    # Both paths must pick a best plan at the same calorie distance.  Further
+    # rows differ: the join repeats each meal row once per matching profile.
+    for t in targets[:20]:
+        old = merge_sort_lookup(meals_df, foods_df, t, args.k)["diff"].iloc[0]
+        new = abs(index_lookup(meals_df, index, t, args.k)["Daily_Calories"].iloc[0] - t)
+        assert np.isclose(old, new), (t, old, new)
+
+    joined = len(meals_df.merge(foods_df, on="Daily_Calories", how="left"))
+    old = _time_per_call(lambda t: merge_sort_lookup(meals_df, foods_df, t, args.k), targets)
+    new = _time_per_call(lambda t: index_lookup(meals_df, index, t, args.k), targets)
+    raw = _time_per_call(lambda t: index.nearest(t, k=args.k), targets)
+
+    print(f"meal rows: {len(meals_df)}, merged rows per lookup: {joined}")
+    print(f"index build (once):        {build * 1e3:9.3f} ms")
+    print(f"merge + sort_values:       {old * 1e3:9.3f} ms/lookup")
+    print(f"CalorieIndex + iloc:       {new * 1e3:9.3f} ms/lookup  ({old / new:.0f}x)")
+    print(f"CalorieIndex.nearest only: {raw * 1e6:9.3f} us/lookup  ({old / raw:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
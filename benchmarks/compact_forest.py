@@ -0,0 +1,86 @@
+"""Forest export: sklearn joblib pickle vs. CompactForest (full depth and pruned).
+
+    python -m benchmarks.compact_forest [--trees 100] [--max-depth 12 16 20] [--repeat 200]
+
+Trains the Breakfast classifier (FeaturePipeline + RandomForestClassifier) and
+the Daily_Calories regressor as the notebooks do, then reports for each model
+and export: file size, load time, single-row and batch prediction latency, and
+parity with the original forest on the held-out split.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import joblib
+
+from nutriguide.compact import CompactForest, parity_report
+from nutriguide.training import build_meal_classifier, load_training_frame, train_calorie_regressor
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+
+
+def _median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e3
+
+
+def _report(label, model, path, X_test, y_test, original, repeat):
+    joblib.dump(model, path)
+    load_ms = _median_ms(lambda: joblib.load(path), 5)
+    row = X_test[:1]
+    single_ms = _median_ms(lambda: model.predict(row), repeat)
+    start = time.perf_counter()
+    model.predict(X_test)
+    batch_rate = len(X_test) / (time.perf_counter() - start)
+    parity = parity_report(original, model, X_test, y_test)
+    if "agreement" in parity:
+        quality = (f"agree {parity['agreement']:6.2%}  acc {parity['compact_accuracy']:.4f} "
+                   f"(orig {parity['original_accuracy']:.4f})")
+    else:
+        quality = (f"max |diff| {parity['max_abs_diff']:8.2f}  R2 {parity['compact_r2']:.4f} "
+                   f"(orig {parity['original_r2']:.4f})")
+    print(f"  {label:<16}{os.path.getsize(path) / 2**20:9.2f} MB  load {load_ms:8.2f} ms  "
+          f"1 row {single_ms * 1e3:8.0f} us  batch {batch_rate:11,.0f} rows/s  {quality}")
+
+
+def _compare(name, forest, X_test, y_test, depths, repeat, workdir):
+    print(f"{name}: {forest.n_estimators} trees, "
+          f"{sum(e.tree_.node_count for e in forest.estimators_):,} nodes")
+    _report("sklearn", forest, os.path.join(workdir, f"{name}.pkl"), X_test, y_test, forest, repeat)
+    for depth in [None] + depths:
+        compact = CompactForest.from_forest(forest, max_depth=depth)
+        label = f"compact d<={depth}" if depth else f"compact (d={compact.depth})"
+        _report(label, compact, os.path.join(workdir, f"{name}_{depth}.pkl"), X_test, y_test, forest, repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, nargs="*", default=[12, 16, 20])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    frame = load_training_frame()
+    y = frame["Breakfast"].astype(str)
+    train, test, y_train, y_test = train_test_split(frame, y, test_size=0.2, random_state=42)
+    pipeline = build_meal_classifier(RandomForestClassifier(n_estimators=args.trees, random_state=42))
+    pipeline.fit(train, y_train)
+    X_test = pipeline.named_steps["features"].transform(test)
+
+    regressor, _, (R_test, r_test) = train_calorie_regressor(n_estimators=args.trees)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _compare("meal_classifier", pipeline[-1], X_test, y_test.to_numpy(), args.max_depth, args.repeat, workdir)
+        _compare("calorie_regressor", regressor, R_test, r_test.to_numpy(),
+                 args.max_depth, args.repeat, workdir)
+
+
+if __name__ == "__main__":
+    main()
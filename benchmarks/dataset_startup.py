@@ -0,0 +1,52 @@
+"""Dataset load time: default CSV parse vs. typed CSV parse vs. binary copy.
+
+    python -m nutriguide.data convert        # once, writes datasets/datasets.npz
+    python -m benchmarks.dataset_startup [--repeat 20]
+"""
+import argparse
+import statistics
+import time
+
+import pandas as pd
+
+from nutriguide.data import (BINARY_FILE, FOODS_FILE, MEALS_FILE, NUTRIENTS_FILE, convert_datasets,
+                             load_datasets, read_csvs, source_checksum)
+from nutriguide.paths import DATASETS_DIR
+
+
+def default_read():
+    return (pd.read_csv(DATASETS_DIR / FOODS_FILE),
+            pd.read_csv(DATASETS_DIR / MEALS_FILE),
+            pd.read_csv(DATASETS_DIR / NUTRIENTS_FILE))
+
+
+def _median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if not (DATASETS_DIR / BINARY_FILE).exists():
+        convert_datasets()
+
+    rows = [
+        ("pd.read_csv (default dtypes)", _median_ms(default_read, args.repeat)),
+        ("read_csvs (typed + interned)", _median_ms(read_csvs, args.repeat)),
+        ("source_checksum only", _median_ms(source_checksum, args.repeat)),
+        ("load_datasets (binary + checksum)", _median_ms(load_datasets, args.repeat)),
+    ]
+    baseline = rows[0][1]
+    for label, ms in rows:
+        print(f"{label:<36}{ms:9.2f} ms  ({baseline / ms:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Artifact hot reload: reload latency, memory overlap and query latency during swaps.
+
+    python -m benchmarks.hot_reload [--sessions 4] [--session-ms 50] [--interval 0.1]
+
+Copies the three CSVs to a temporary directory and exports a freshly trained
+breakfast classifier next to them (the shipped .pkl files may be Git LFS
+pointers), then starts an ``ArtifactStore`` watching them while
+``--sessions`` threads keep recommending: each takes the current version,
+runs queries on it for ``--session-ms`` and starts over.  The main thread:
+
+1. touches a CSV without changing it (must not reload),
+2. appends 500 rows to the meal plans CSV,
+3. replaces the classifier with one trained with another seed,
+
+and reports, per step, the time from the file write to the new version
+being live, the build time, the RSS overlap with both versions alive and when
+the old version was freed, plus session query latency and errors.  Step 2
+must reuse the loaded classifier; step 3 must keep the engine and load the
+new classifier only when it is first asked for.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+import warnings
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks.profile_index import query_profiles
+from nutriguide.artifacts import ArtifactStore
+from nutriguide.data import MEALS_FILE, SOURCE_FILES, load_datasets
+from nutriguide.paths import DATASETS_DIR
+from nutriguide.training import load_training_frame, train_meal_classifier
+
+MODEL_NAME = "meal_classifier"
+
+
+class Sessions:
+    """Threads that each hold one version for ``session_seconds`` at a time."""
+
+    def __init__(self, store, profiles, count, session_seconds):
+        self.store = store
+        self.profiles = profiles
+        self.session_seconds = session_seconds
+        self.latencies, self.versions, self.errors = [], set(), []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._run, args=(i,), daemon=True) for i in range(count)]
+
+    def _run(self, offset):
+        i = offset
+        while not self._stop.is_set():
+            artifacts = self.store.current()
+            ends = time.perf_counter() + self.session_seconds
+            latencies = []
+            try:
+                while time.perf_counter() < ends:
+                    start = time.perf_counter()
+                    artifacts.engine.recommend(self.profiles[i % len(self.profiles)])
+                    latencies.append(time.perf_counter() - start)
+                    i += 1
+                    time.sleep(0.001)
+            except Exception as exc:
+                self.errors.append(repr(exc))
+            with self._lock:
+                self.latencies += latencies
+                self.versions.add(artifacts.version)
+            del artifacts
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def take_latencies(self):
+        with self._lock:
+            latencies, self.latencies = self.latencies, []
+        return np.array(latencies)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+def wait_for(store, version, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if store.current().version >= version:
+            return time.perf_counter()
+        time.sleep(0.001)
+    return None
+
+
+def export_classifier(frame, path, seed):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model, _ = train_meal_classifier(frame, estimator=RandomForestClassifier(n_estimators=50, random_state=seed))
+    tmp = path + ".tmp"
+    joblib.dump(model, tmp)
+    # Watchers never see a half-written model
+    os.replace(tmp, path)
+
+
+def report_step(label, store, sessions, written, version, timeout):
+    live = wait_for(store, version, timeout)
+    time.sleep(0.5)  # let in-flight sessions finish on the old version
+    latencies = sessions.take_latencies() * 1e3
+    p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+    print(f"{label}")
+    if live is None:
+        print(f"  no reload within {timeout:.0f} s (still v{store.current().version})")
+    else:
+        print(f"  live {(live - written) * 1e3:.0f} ms after the write")
+        print(f"  {store.history()[-1]}")
+    print(f"  session queries: {len(latencies):,}, p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--session-ms", type=float, default=50.0)
+    parser.add_argument("--interval", type=float, default=0.1, help="watcher poll interval, seconds")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    shipped = load_datasets()
+    frame = load_training_frame(shipped)
+    profiles = query_profiles(shipped.foods, 200)
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in SOURCE_FILES:
+            shutil.copy(DATASETS_DIR / name, workdir)
+        model_path = os.path.join(workdir, "meal_classifier_model.pkl")
+        export_classifier(frame, model_path, seed=0)
+
+        store = ArtifactStore(workdir, model_paths={MODEL_NAME: model_path}, interval=args.interval)
+        start = time.perf_counter()
+        artifacts = store.current()
+        print(f"initial load {(time.perf_counter() - start) * 1e3:.0f} ms: {store.history()[-1]}")
+        classifier, engine = artifacts.model(MODEL_NAME), artifacts.engine
+        print(f"  {store.current().load_stats(MODEL_NAME)}")
+        del artifacts
+        store.start()
+        sessions = Sessions(store, profiles, args.sessions, args.session_ms / 1e3)
+        sessions.start()
+        time.sleep(0.5)
+        sessions.take_latencies()
+
+        meals_path = os.path.join(workdir, MEALS_FILE)
+        os.utime(meals_path)
+        written = time.perf_counter()
+        report_step("touch Meal_Suggestions.csv (same bytes)", store, sessions, written, 2, timeout=1.0)
+
+        with open(meals_path, "rb") as f:
+            lines = f.readlines()
+        with open(meals_path, "ab") as f:
+            f.writelines(lines[1:501])
+        written = time.perf_counter()
+        report_step("append 500 meal plans", store, sessions, written, 2, args.timeout)
+        print(f"  classifier reused: {store.current().model(MODEL_NAME) is classifier}")
+        engine = store.current().engine
+
+        export_classifier(frame, model_path, seed=1)
+        written = time.perf_counter()
+        report_step("replace meal_classifier_model.pkl", store, sessions, written, 3, args.timeout)
+        print(f"  engine reused: {store.current().engine is engine}, "
+              f"classifier loaded: {store.current().models() != {}}")
+        replaced = store.current().model(MODEL_NAME)
+        print(f"  first use: {store.current().load_stats(MODEL_NAME)}, new object: {replaced is not classifier}")
+        del classifier, engine, replaced
+
+        sessions.stop()
+        store.stop()
+        print(f"sessions saw versions {sorted(sessions.versions)}; errors: {sessions.errors or 'none'}")
+        for stats in store.history():
+            print(f"  {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Import-time profile of the apps' landing page vs. the recommendation branch.
+
+    python -m benchmarks.import_time [--repeat 5] [--top 8] [--app app/main.py]
+
+Each scenario runs ``python -X importtime -c <imports>`` in a fresh interpreter
+``--repeat`` times and reports the median total import time, plus the
+heaviest top-level imports of the last run.  Scenarios:
+
+* original     -- the imports the apps had before deferral (including the
+                  scikit-learn unpickle of the model on every page load),
+* landing      -- the app's module-level imports, what runs before first paint,
+* recommendation -- landing plus every import inside the app (the
+                  recommendation branch) and the libraries nutriguide loads
+                  on first use there.
+"""
+import argparse
+import ast
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from nutriguide.paths import ROOT_DIR
+
+ORIGINAL_IMPORTS = [
+    "import streamlit",
+    "import pandas",
+    "import matplotlib.pyplot",
+    "import seaborn",
+    "import joblib",
+    "import streamlit_extras.colored_header",
+    "import streamlit_extras.card",
+    "import streamlit_extras.metric_cards",
+    "import streamlit_extras.stylable_container",
+    "import sklearn.ensemble",
+]
+
+# Imported inside nutriguide on first use: datasets, model registry, chart renderer
+FIRST_USE_IMPORTS = [
+    "import pandas",
+    "import joblib",
+    "import sklearn.ensemble",
+    "import matplotlib.figure, matplotlib.backends.backend_agg",
+]
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def app_imports(path, module_level_only):
+    """Import statements of an app script, as source lines."""
+    tree = ast.parse(open(path, encoding="utf-8").read())
+    nodes = tree.body if module_level_only else ast.walk(tree)
+    return [ast.unparse(node) for node in nodes if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def profile_imports(statements, repeat):
+    """(median total import seconds, [(cumulative us, module)] of the last run's top-level imports)."""
+    code = "\n".join(statements)
+    env = dict(os.environ, PYTHONPATH=str(ROOT_DIR))
+    totals, top = [], []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                capture_output=True, text=True, env=env, check=True)
+        total, top = 0, []
+        for match in _LINE.finditer(result.stderr):
+            self_us, cumulative_us, indent, module = match.groups()
+            total += int(self_us)
+            if len(indent) == 1:
+                top.append((int(cumulative_us), module))
+        totals.append(total / 1e6)
+    return statistics.median(totals), sorted(top, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--app", default=str(ROOT_DIR / "app" / "main.py"))
+    args = parser.parse_args()
+
+    landing = app_imports(args.app, module_level_only=True)
+    scenarios = [
+        ("original", ORIGINAL_IMPORTS),
+        ("landing", landing),
+        ("recommendation", app_imports(args.app, module_level_only=False) + FIRST_USE_IMPORTS),
+    ]
+    for label, statements in scenarios:
+        seconds, top = profile_imports(statements, args.repeat)
+        print(f"{label:<16}{seconds * 1e3:9.1f} ms")
+        for cumulative, module in top[:args.top]:
+            print(f"    {cumulative / 1e3:9.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
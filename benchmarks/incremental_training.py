@@ -0,0 +1,109 @@
+"""Daily_Calories regressor: incremental update on appended rows vs. a full retrain.
+
+    python -m benchmarks.incremental_training [--initial 3000] [--batch 250] [--holdout 500]
+
+Copies the first ``--initial`` rows of Final_Data_Set.csv to a temporary CSV
+and fits the regressor on them, then appends the following rows
+``--batch`` at a time.  After each append it times ``update_regressor``
+against ``fit_regressor`` on the whole file and reports both models' MAE
+and R2 on the last ``--holdout`` rows, which are never appended.  Also
+checks that rescaling the split thresholds leaves the old trees'
+predictions unchanged, and times the registry hot-swap.
+"""
+import argparse
+import copy
+import os
+import statistics
+import tempfile
+import time
+from dataclasses import replace
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error, r2_score
+
+from nutriguide.data import FOODS_FILE
+from nutriguide.incremental import (
+    TARGET, fit_regressor, publish, read_appended, rescale_thresholds, update_regressor,
+)
+from nutriguide.paths import DATASETS_DIR
+from nutriguide.registry import ModelRegistry
+from nutriguide.training import CALORIE_SCALED
+
+
+def _score(state, holdout):
+    predicted = state.predict(holdout)
+    return mean_absolute_error(holdout[TARGET], predicted), r2_score(holdout[TARGET], predicted)
+
+
+def check_rescaling(state, rows, holdout):
+    """Max |change| of the existing trees' predictions after a scaler update with ``rows``."""
+    scaler = copy.deepcopy(state.scaler).partial_fit(rows[CALORIE_SCALED])
+    model = copy.deepcopy(state.model)
+    rescale_thresholds(model, CALORIE_SCALED, state.scaler, scaler)
+    moved = replace(state, model=model, scaler=scaler)
+    return float(np.max(np.abs(moved.predict(holdout) - state.predict(holdout))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--initial", type=int, default=3000)
+    parser.add_argument("--batch", type=int, default=250)
+    parser.add_argument("--holdout", type=int, default=500)
+    args = parser.parse_args()
+
+    source = DATASETS_DIR / FOODS_FILE
+    with open(source, "rb") as f:
+        lines = f.readlines()
+    header, body = lines[0], lines[1:]
+    appendable, holdout_lines = body[:-args.holdout], body[-args.holdout:]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        holdout_path = os.path.join(workdir, "holdout.csv")
+        with open(holdout_path, "wb") as f:
+            f.writelines([header] + holdout_lines)
+        holdout, _ = read_appended(holdout_path)
+
+        path = os.path.join(workdir, FOODS_FILE)
+        with open(path, "wb") as f:
+            f.writelines([header] + appendable[:args.initial])
+        state = fit_regressor(path)
+        mae, r2 = _score(state, holdout)
+        print(f"initial fit on {state.watermark.rows:,} rows: {len(state.model.estimators_)} trees, "
+              f"MAE {mae:.1f} R2 {r2:.4f}")
+
+        rescaled = False
+        update_times, full_times = [], []
+        for start in range(args.initial, len(appendable), args.batch):
+            with open(path, "ab") as f:
+                f.writelines(appendable[start:start + args.batch])
+            if not rescaled:
+                rows, _ = read_appended(path, state.watermark)
+                print(f"old trees after threshold rescaling: max |prediction change| "
+                      f"{check_rescaling(state, rows, holdout):.2e} kcal")
+                rescaled = True
+
+            state, result = update_regressor(state, path)
+            t = time.perf_counter()
+            full = fit_regressor(path)
+            full_seconds = time.perf_counter() - t
+            update_times.append(result.seconds)
+            full_times.append(full_seconds)
+            mae, r2 = _score(state, holdout)
+            full_mae, full_r2 = _score(full, holdout)
+            print(f"  {state.watermark.rows:>5,} rows  {result.mode:<11} {result.seconds * 1e3:7.0f} ms "
+                  f"({result.trees:3d} trees) MAE {mae:6.1f} R2 {r2:.4f}   "
+                  f"full retrain {full_seconds * 1e3:7.0f} ms MAE {full_mae:6.1f} R2 {full_r2:.4f}")
+        print(f"median update {statistics.median(update_times) * 1e3:.0f} ms vs. "
+              f"full retrain {statistics.median(full_times) * 1e3:.0f} ms "
+              f"({statistics.median(full_times) / statistics.median(update_times):.1f}x)")
+
+        registry = ModelRegistry()
+        publish(full, registry, path=os.path.join(workdir, "unused.joblib"))
+        t = time.perf_counter()
+        previous = publish(state, registry)
+        print(f"registry hot-swap {(time.perf_counter() - t) * 1e6:.0f} us; "
+              f"previous state still usable: {previous.predict(holdout[:1])[0]:.0f} kcal")
+
+
+if __name__ == "__main__":
+    main()
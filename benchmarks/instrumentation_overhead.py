@@ -0,0 +1,77 @@
+"""Cost of the stage spans: ``engine.recommend`` with instrumentation off, on and traced.
+
+    python -m benchmarks.instrumentation_overhead [--queries 2000] [--rounds 7]
+
+Runs ``--queries`` recommendations per round, alternating between the three
+modes so drift hits them equally, and reports the median per-query time of
+each.  "traced" wraps every query in ``start_trace()``/``finish()``, as the
+service does for ``?trace=1`` requests.  Also times an empty span, with and
+without RSS sampling, and prints the per-stage statistics collected.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.profile_index import query_profiles
+from nutriguide.data import load_datasets
+from nutriguide.engine import RecommendationEngine
+from nutriguide.instrumentation import Instrumentation, default_instrumentation, start_trace
+
+MODES = ("off", "on", "traced")
+
+
+def run(engine, profiles, mode):
+    start = time.perf_counter()
+    if mode == "traced":
+        for profile in profiles:
+            with start_trace():
+                engine.recommend(profile)
+    else:
+        for profile in profiles:
+            engine.recommend(profile)
+    return (time.perf_counter() - start) / len(profiles)
+
+
+def empty_span(memory_every, n=100_000):
+    instrumentation = Instrumentation(memory_every=memory_every)
+    start = time.perf_counter()
+    for _ in range(n):
+        with instrumentation.span("empty"):
+            pass
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+
+    data = load_datasets()
+    engine = RecommendationEngine(data)
+    profiles = query_profiles(data.foods, args.queries)
+    instrumentation = default_instrumentation()
+    run(engine, profiles, "on")  # build the meal indexes
+    instrumentation.reset()
+
+    times = {mode: [] for mode in MODES}
+    for _ in range(args.rounds):
+        for mode in MODES:
+            instrumentation.enabled = mode != "off"
+            times[mode].append(run(engine, profiles, mode))
+    instrumentation.enabled = True
+
+    off = statistics.median(times["off"])
+    print(f"engine.recommend, {args.queries:,} queries x {args.rounds} rounds (median per query)")
+    for mode in MODES:
+        median = statistics.median(times[mode])
+        print(f"  {mode:<7} {median * 1e6:8.1f} us  ({(median - off) * 1e6:+.1f} us, {median / off - 1:+.1%})")
+    print(f"empty span: {empty_span(memory_every=10 ** 9) * 1e9:.0f} ns, "
+          f"{empty_span(memory_every=1) * 1e9:.0f} ns with RSS read every time, "
+          f"{empty_span(memory_every=16) * 1e9:.0f} ns sampled 1 in 16 (default)")
+    for stats in instrumentation.stats().values():
+        print(f"  {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Load test of the HTTP API: throughput and latency percentiles per endpoint.
+
+    python -m benchmarks.load_test [--workers 2] [--concurrency 16] [--requests 5000]
+    python -m benchmarks.load_test --url http://127.0.0.1:8000   # an already running server
+
+Without ``--url`` a local server is started (``python -m nutriguide.service``,
+needs uvicorn) and stopped afterwards.  Clients are asyncio tasks on
+keep-alive HTTP/1.1 connections, stdlib only.  Scenarios:
+
+* cached    -- /recommend cycling over ``--distinct`` profiles, warmed first
+* uncached  -- /recommend with a new profile every request
+* batch     -- /recommend/batch of ``--batch-size`` profiles
+* nutrients -- GET /nutrients
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from benchmarks.profile_index import query_profiles
+from nutriguide.data import load_datasets
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=b""):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            self.writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n").encode()
+        self.writer.write(head + body)
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                length = int(value)
+        await self.reader.readexactly(length)
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def profile_payload(profile):
+    return {"age": int(profile.age), "gender": profile.gender, "weight": float(profile.weight),
+            "height": float(profile.height), "activity": profile.activity, "goal": profile.goal,
+            "diet": profile.diet}
+
+
+async def drive(host, port, requests, concurrency):
+    """Send ``requests`` [(method, path, body)] over ``concurrency`` connections; (latencies, seconds, errors)."""
+    queue = iter(requests)
+    latencies, errors = [], 0
+
+    async def client():
+        nonlocal errors
+        connection = Connection(host, port)
+        try:
+            for method, path, body in queue:
+                start = time.perf_counter()
+                status = await connection.request(method, path, body)
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return np.array(latencies), time.perf_counter() - start, errors
+
+
+def report(label, latencies, seconds, errors):
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1e3
+    print(f"{label:<10} {len(latencies) / seconds:9,.0f} req/s  p50 {p50:7.2f} ms  p90 {p90:7.2f} ms  "
+          f"p99 {p99:7.2f} ms  max {latencies.max() * 1e3:7.2f} ms  errors {errors}")
+
+
+def start_server(port, workers):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "nutriguide.service", "--port", str(port), "--workers", str(workers)],
+        env={**os.environ, "PYTHONPATH": os.getcwd()},
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"server exited with {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=1) as response:
+                if json.load(response)["ready"]:
+                    return server, url
+        except OSError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("server did not become ready")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="server to test instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--distinct", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = args.url
+    else:
+        started = time.perf_counter()
+        server, url = start_server(args.port, args.workers)
+        print(f"server ready in {time.perf_counter() - started:.1f} s ({args.workers} workers)")
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+
+    data = load_datasets()
+    profiles = [json.dumps(profile_payload(p)).encode()
+                for p in query_profiles(data.foods, args.requests + args.distinct)]
+    cached = [("POST", "/recommend", profiles[i % args.distinct]) for i in range(args.requests)]
+    uncached = [("POST", "/recommend", body) for body in profiles[args.distinct:]]
+    starts = (np.arange(max(args.requests // args.batch_size, 20)) * args.batch_size) % max(
+        len(profiles) - args.batch_size, 1)
+    batches = [("POST", "/recommend/batch", b'{"profiles": [' + b",".join(profiles[i:i + args.batch_size]) + b"]}")
+               for i in starts]
+    nutrients = [("GET", f"/nutrients?calories={1500 + i % 2000}", b"") for i in range(args.requests)]
+
+    try:
+        # Every worker sees each distinct profile before the cached run
+        asyncio.run(drive(host, port, cached[:args.distinct] * args.workers * 2, args.concurrency))
+        report("cached", *asyncio.run(drive(host, port, cached, args.concurrency)))
+        report("uncached", *asyncio.run(drive(host, port, uncached, args.concurrency)))
+        latencies, seconds, errors = asyncio.run(drive(host, port, batches, args.concurrency))
+        report("batch", latencies, seconds, errors)
+        print(f"           {len(latencies) * args.batch_size / seconds:9,.0f} profiles/s in batches of "
+              f"{args.batch_size}")
+        report("nutrients", *asyncio.run(drive(host, port, nutrients, args.concurrency)))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
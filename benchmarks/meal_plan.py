@@ -0,0 +1,84 @@
+"""Meal-plan optimizer: latency and plan quality, cold vs. warm-started vs. cached.
+
+    python -m benchmarks.meal_plan [--profiles 300]
+
+Profiles are drawn from Final_Data_Set.csv.  "cold" solves every plan from
+scratch (LP relaxation + rounding + local search), "warm" lets misses start
+from the nearest cached plan, "cached" repeats the same profiles.  Quality is
+the objective against the LP relaxation bound (cold only) and the mean
+absolute calorie / protein error of the plans.
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from benchmarks.profile_index import query_profiles
+from nutriguide.data import load_datasets
+from nutriguide.engine import RecommendationEngine
+from nutriguide.mealplan import MealPlanOptimizer, load_food_catalog, plan_targets
+
+
+def run(optimizer, recommendations):
+    times, plans = [], []
+    for recommendation in recommendations:
+        start = time.perf_counter()
+        plans.append(optimizer.plan_for(recommendation))
+        times.append(time.perf_counter() - start)
+    return np.array(times), plans
+
+
+def report(label, times, plans):
+    calories = statistics.mean(abs(p.totals["Calories"] - p.targets["Calories"]) / p.targets["Calories"] for p in plans)
+    protein = statistics.mean(abs(p.totals["Protein_g"] - p.targets["Protein_g"]) / p.targets["Protein_g"]
+                              for p in plans)
+    print(f"{label:<8} p50 {np.percentile(times, 50) * 1e3:7.2f} ms  p99 {np.percentile(times, 99) * 1e3:7.2f} ms  "
+          f"max {times.max() * 1e3:7.2f} ms  objective {statistics.mean(p.objective for p in plans):.4f}  "
+          f"kcal error {calories:.2%}  protein error {protein:.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=300)
+    args = parser.parse_args()
+
+    data = load_datasets()
+    engine = RecommendationEngine(data)
+    catalog = load_food_catalog()
+    recommendations = [engine.recommend(profile) for profile in query_profiles(data.foods, args.profiles)]
+
+    # Imports and per-mask model construction, outside the timings
+    start = time.perf_counter()
+    for recommendation in recommendations:
+        MealPlanOptimizer(catalog, maxsize=0).plan_for(recommendation)
+        break
+    print(f"first plan (scipy import, model build) {(time.perf_counter() - start) * 1e3:.1f} ms")
+    warmup = MealPlanOptimizer(catalog)
+    run(warmup, recommendations)
+
+    cold = MealPlanOptimizer(catalog, maxsize=0, warm_start=False)
+    cold._models = warmup._models
+    times, plans = run(cold, recommendations)
+    report("cold", times, plans)
+    gaps = [p.objective - p.lower_bound for p in plans]
+    print(f"         objective - LP bound: mean {statistics.mean(gaps):.4f}, max {max(gaps):.4f}")
+
+    warm = MealPlanOptimizer(catalog)
+    warm._models = warmup._models
+    times, plans = run(warm, recommendations)
+    report("warm", times, plans)
+    print(f"         {warm.warm_starts} of {warm.misses} misses warm-started, {warm.hits} cache hits")
+    for status in ("solved", "warm start"):
+        solved = [p.solve_seconds for p in plans if p.status == status]
+        if solved:
+            print(f"         {status:<11} mean solve {statistics.mean(solved) * 1e3:6.2f} ms over {len(solved)} plans")
+
+    times, plans = run(warm, recommendations)
+    report("cached", times, plans)
+    _, limits = plan_targets(recommendations[0])
+    print(f"{len(warmup._models)} diet/allergy models, {len(catalog)} catalog foods, {len(limits)} nutrient limits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Breakfast classifier: one predict call per request vs. the micro-batching queue.
+
+    python -m benchmarks.micro_batching [--callers 1 8 32] [--requests 400]
+                                        [--max-batch-size 32] [--max-latency-ms 3]
+
+Trains the exported pipeline (FeaturePipeline + RandomForestClassifier) as
+``nutriguide.training`` does, then has ``--callers`` threads, like
+concurrent Streamlit sessions, each request predictions for profiles drawn
+from Final_Data_Set.csv.  Reports throughput, per-request latency and, for
+the batcher, its batch size / queue depth histograms.  Labels are checked
+against per-row ``predict_record``.
+"""
+import argparse
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from benchmarks.profile_index import query_profiles
+from nutriguide.batching import breakfast_batcher
+from nutriguide.data import load_datasets
+from nutriguide.engine import RecommendationEngine
+from nutriguide.features import predict_record, profile_record
+from nutriguide.training import load_training_frame, train_meal_classifier
+
+
+def run(predict, records, callers, requests):
+    """(latencies, seconds, labels) with ``callers`` threads sharing ``requests`` predictions."""
+    latencies, labels = [None] * requests, [None] * requests
+    barrier = threading.Barrier(callers + 1)
+
+    def caller(offset):
+        barrier.wait()
+        for i in range(offset, requests, callers):
+            start = time.perf_counter()
+            labels[i] = predict(records[i % len(records)])
+            latencies[i] = time.perf_counter() - start
+
+    threads = [threading.Thread(target=caller, args=(c,)) for c in range(callers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), time.perf_counter() - start, labels
+
+
+def report(label, latencies, seconds):
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+    print(f"  {label:<8} {len(latencies) / seconds:8,.0f} req/s  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--callers", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-latency-ms", type=float, default=3.0)
+    args = parser.parse_args()
+
+    data = load_datasets()
+    engine = RecommendationEngine(data)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model, accuracy = train_meal_classifier(load_training_frame(data))
+    print(f"classifier: {model[-1].n_estimators} trees, held-out accuracy {accuracy:.4f}")
+    records = [profile_record(profile, engine) for profile in query_profiles(data.foods, 200)]
+
+    def per_row(record):
+        return predict_record(model, record)
+
+    for callers in args.callers:
+        print(f"{callers} concurrent callers, {args.requests} requests")
+        latencies, seconds, expected = run(per_row, records, callers, args.requests)
+        report("per-row", latencies, seconds)
+        batcher = breakfast_batcher(model, max_batch_size=args.max_batch_size,
+                                    max_latency=args.max_latency_ms / 1e3)
+        latencies, seconds, predictions = run(batcher, records, callers, args.requests)
+        batcher.close()
+        report("batched", latencies, seconds)
+        agree = np.mean([p.label == e for p, e in zip(predictions, expected)])
+        stats = batcher.stats()
+        print(f"           {stats}")
+        print(f"           batch sizes {stats.batch_size}; labels agree with per-row {agree:.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Nutrient chart rendering: old per-rerun pyplot/seaborn figure vs. the chart backends.
+
+    python -m benchmarks.nutrient_chart [--renders 200]
+
+For each backend: median latency per render and RSS growth over ``--renders``
+renders.  "cold" renders use distinct values every time (cache misses),
+"cached" repeats one profile's values, as reruns of the same session do.
+The old path renders to PNG like ``st.pyplot`` does and, like the apps did,
+never closes its figures.
+"""
+import argparse
+import gc
+import io
+import json
+import statistics
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from nutriguide.charts import NutrientChartRenderer, nutrient_chart_spec
+from nutriguide.resources import current_rss, format_bytes
+
+
+def old_render(actual, required):
+    """The apps' former chart code, ending in the savefig that st.pyplot performs."""
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+
+    df_nutrients = pd.DataFrame({
+        "Nutrient": list(actual.keys()),
+        "Your Needs": list(actual.values()),
+        "Recommended": list(required.values())
+    })
+    df_melted = df_nutrients.melt(id_vars="Nutrient", var_name="Type", value_name="Amount")
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.set_style("whitegrid")
+    sns.set_palette("pastel")
+    sns.barplot(data=df_melted, x="Nutrient", y="Amount", hue="Type", ax=ax)
+    ax.set_title("Your Nutrient Needs vs. Recommended Daily Allowance", fontsize=16, pad=20)
+    ax.set_xlabel("Nutrients", fontsize=12)
+    ax.set_ylabel("Amount (g or kcal)", fontsize=12)
+    ax.legend(title='', fontsize=10)
+    for p in ax.patches:
+        ax.annotate(f"{p.get_height():.0f}", (p.get_x() + p.get_width() / 2., p.get_height()),
+                    ha='center', va='center', xytext=(0, 10), textcoords='offset points', fontsize=10)
+    fig.savefig(io.BytesIO(), format="png", dpi=100)
+
+
+def sample_values(i):
+    actual = {"Calories": 1800.0 + i, "Protein": 90.0 + i % 50, "Fat": 60.0 + i % 20, "Carbs": 220.0 + i % 70}
+    required = {"Calories": 1850.0, "Protein": 95.0, "Fat": 62.0, "Carbs": 230.0}
+    return actual, required
+
+
+def _measure(render, renders, vary):
+    gc.collect()
+    rss_before = current_rss()
+    times = []
+    for i in range(renders):
+        actual, required = sample_values(i if vary else 0)
+        start = time.perf_counter()
+        render(actual, required)
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    return statistics.median(times) * 1e3, current_rss() - rss_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=200)
+    args = parser.parse_args()
+
+    old_render(*sample_values(0))  # import and font cache warm-up
+    renderer = NutrientChartRenderer(maxsize=args.renders)
+    renderer.render(*sample_values(-1))
+
+    rows = [
+        ("pyplot + seaborn, per rerun (old)", old_render, True),
+        ("renderer, cold (reused figure)", renderer.render, True),
+        ("renderer, cached", renderer.render, False),
+        ("vega-lite spec + JSON", lambda a, r: json.dumps(nutrient_chart_spec(a, r)), True),
+    ]
+    for label, render, vary in rows:
+        ms, rss = _measure(render, args.renders, vary)
+        print(f"{label:<36}{ms:9.3f} ms/render  RSS {format_bytes(rss):>10} over {args.renders} renders")
+    import matplotlib.pyplot as plt
+    print(f"open pyplot figures left by the old path: {len(plt.get_fignums())}")
+
+
+if __name__ == "__main__":
+    main()
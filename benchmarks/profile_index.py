@@ -0,0 +1,93 @@
+"""k-NN profile index: build time, persisted size, load time and query latency by size.
+
+    python -m benchmarks.profile_index [--sizes 5000 100000 1000000] [--queries 2000] [-k 5]
+
+Sizes above the shipped 5,000 profiles are synthetic: rows resampled from
+Final_Data_Set.csv together with their meal rows, numeric fields jittered.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+from nutriguide.data import load_datasets
+from nutriguide.diets import DIET_PREFERENCES
+from nutriguide.engine import Profile
+from nutriguide.neighbors import ProfileIndex
+from nutriguide.nutrition import HEALTH_GOALS
+
+
+def synthetic_profiles(foods, meal_bits, n, seed=0):
+    """``n`` profiles resampled from ``foods`` with jittered age, weight and height."""
+    if n == len(foods):
+        return foods, meal_bits
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(foods), n)
+    sample = foods.iloc[rows].reset_index(drop=True)
+    sample["Age"] = np.clip(sample["Age"] + rng.integers(-2, 3, n), 18, 80).astype("int8")
+    sample["Weight_kg"] = (sample["Weight_kg"] + rng.integers(-3, 4, n)).astype("int16")
+    sample["Height_cm"] = (sample["Height_cm"] + rng.integers(-3, 4, n)).astype("int16")
+    sample["BMI"] = (sample["Weight_kg"] / (sample["Height_cm"] / 100) ** 2).round(1).astype("float32")
+    return sample, meal_bits[rows]
+
+
+def query_profiles(foods, n, seed=1):
+    rows = np.random.default_rng(seed).integers(0, len(foods), n)
+    return [Profile(
+        age=int(row.Age),
+        gender=str(row.Gender).lower(),
+        weight=float(row.Weight_kg) + 0.5,
+        height=float(row.Height_cm) - 0.5,
+        activity=str(row.Activity_Level).lower(),
+        goal=HEALTH_GOALS.get(str(row.Health_Goal).lower(), "maintain"),
+        diet=DIET_PREFERENCES.get(str(row.Diet_Preference).lower(), "non-veg"),
+        weekly_activity_days=int(row.Weekly_Activity_Days),
+        disease=str(row.Disease),
+        food_allergies=str(row.Food_Allergies),
+    ) for row in foods.iloc[rows].itertuples(index=False)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    data = load_datasets()
+    meal_bits = data.meals["Ingredient_Bits"].to_numpy()
+    queries = query_profiles(data.foods, args.queries)
+    ProfileIndex().fit(data.foods.head(100))  # sklearn import, outside the timings
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            foods, bits = synthetic_profiles(data.foods, meal_bits, n)
+            start = time.perf_counter()
+            index = ProfileIndex().fit(foods, bits)
+            build = time.perf_counter() - start
+
+            path = os.path.join(workdir, f"index_{n}.joblib")
+            joblib.dump(index, path)
+            start = time.perf_counter()
+            index = joblib.load(path)
+            load = time.perf_counter() - start
+
+            times = []
+            for profile in queries:
+                start = time.perf_counter()
+                index.query(profile, k=args.k)
+                times.append(time.perf_counter() - start)
+            times.sort()
+            trees = sum(partition[2] is not None for partition in index.partitions_.values())
+            print(f"{n:>10,} profiles  build {build:7.2f} s  {os.path.getsize(path) / 2**20:8.1f} MB  "
+                  f"load {load * 1e3:8.1f} ms  query p50 {statistics.median(times) * 1e6:7.1f} us  "
+                  f"p99 {times[int(len(times) * 0.99)] * 1e6:7.1f} us  "
+                  f"({trees}/{len(index.partitions_)} partitions on KD-trees)")
+
+
+if __name__ == "__main__":
+    main()
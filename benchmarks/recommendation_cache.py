@@ -0,0 +1,66 @@
+"""Recommendation latency with and without the per-profile cache.
+
+    python -m benchmarks.recommendation_cache [--profiles 3000] [--requests 100000] [--maxsize 4096]
+
+Requests are drawn with a Zipf-like skew from a pool of distinct profiles
+resampled from Final_Data_Set.csv, approximating a user base that falls into
+a few thousand distinct profiles.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from nutriguide.cache import RecommendationCache
+from nutriguide.data import load_datasets
+from nutriguide.diets import DIET_PREFERENCES
+from nutriguide.engine import Profile, RecommendationEngine
+from nutriguide.nutrition import HEALTH_GOALS
+
+
+def profile_pool(foods, n, seed=0):
+    rows = foods.drop_duplicates(["Age", "Gender", "Weight_kg", "Height_cm", "Activity_Level",
+                                  "Health_Goal", "Diet_Preference"])
+    rows = rows.sample(min(n, len(rows)), random_state=seed)
+    return [Profile(
+        age=row.Age,
+        gender=str(row.Gender).lower(),
+        weight=row.Weight_kg,
+        height=row.Height_cm,
+        activity=str(row.Activity_Level).lower(),
+        goal=HEALTH_GOALS.get(str(row.Health_Goal).lower(), "maintain"),
+        diet=DIET_PREFERENCES.get(str(row.Diet_Preference).lower(), "non-veg"),
+    ) for row in rows.itertuples(index=False)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=3000)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--maxsize", type=int, default=4096)
+    args = parser.parse_args()
+
+    engine = RecommendationEngine(load_datasets())
+    pool = profile_pool(engine.data.foods, args.profiles)
+    rng = np.random.default_rng(0)
+    requests = [pool[i] for i in (rng.zipf(1.2, args.requests) - 1) % len(pool)]
+
+    start = time.perf_counter()
+    for profile in requests:
+        engine.recommend(profile)
+    uncached = (time.perf_counter() - start) / len(requests)
+
+    cache = RecommendationCache(maxsize=args.maxsize)
+    start = time.perf_counter()
+    for profile in requests:
+        cache.recommend(engine, profile)
+    cached = (time.perf_counter() - start) / len(requests)
+
+    print(f"{len(pool):,} distinct profiles, {len(requests):,} requests")
+    print(f"engine.recommend   {uncached * 1e6:8.1f} us/request")
+    print(f"cache.recommend    {cached * 1e6:8.1f} us/request  ({uncached / cached:.1f}x)")
+    print(cache.stats())
+
+
+if __name__ == "__main__":
+    main()
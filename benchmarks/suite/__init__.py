@@ -0,0 +1,25 @@
+"""pytest-benchmark suite for the recommendation paths, gated on stored baselines.
+
+    pip install -r requirements.txt                                    # includes pytest-benchmark
+    python -m pytest benchmarks/suite                                  # compare with baselines.json
+    NUTRIGUIDE_BENCH_UPDATE=1 python -m pytest benchmarks/suite        # record new baselines
+    NUTRIGUIDE_BENCH_SCALES=1,10 python -m pytest benchmarks/suite     # a one-minute subset
+
+The full run takes about ten minutes on one core, most of it at 1000x.
+
+Each stage -- BMR/TDEE/macros, the diet filter, meal-plan selection, the
+nutrient lookup and breakfast classifier inference -- runs against the
+shipped datasets (``1x``) and against synthetic ones resampled to 10x, 100x
+and 1000x their rows (``synthetic``).  Per-profile Python loops are marked
+``max_scale(n)`` and skipped above the scale where one round takes seconds.
+
+After timing a benchmark, ``measure`` runs it once more under
+``tracemalloc`` and fails the test when its fastest round is slower than the
+baseline median by more than ``NUTRIGUIDE_BENCH_LATENCY_TOLERANCE`` (default
+0.5), or its peak memory exceeds the baseline by more than
+``NUTRIGUIDE_BENCH_MEMORY_TOLERANCE`` (default 0.10); see ``baselines``.  A
+slow benchmark is timed a second time before it fails.  Nothing imports
+Streamlit or touches the network.  pytest-benchmark's own options
+(``--benchmark-save``, ``--benchmark-json``, ``--benchmark-compare``) work as
+usual.
+"""
@@ -0,0 +1,125 @@
+"""Stored baseline results of the suite and the regression check against them.
+
+``baselines.json`` holds, per benchmark, the median time of a round and the
+peak memory ``tracemalloc`` traced during one call, plus a description of the
+machine the times were recorded on.  A run is checked with its *fastest*
+round against the baseline median: other processes only ever add time, so
+a regression is a change that makes even the fastest round slower than the
+typical one used to be, whatever the machine was doing during either run.
+Times are only compared on the machine they were recorded on (CPU model, core
+count, Python version); peak memory does not depend on the CPU and is
+compared everywhere.
+"""
+import gc
+import json
+import os
+import platform
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+from nutriguide.resources import format_bytes
+
+BASELINE_FILE = Path(__file__).with_name("baselines.json")
+UPDATE_ENV_VAR = "NUTRIGUIDE_BENCH_UPDATE"
+LATENCY_TOLERANCE_ENV_VAR = "NUTRIGUIDE_BENCH_LATENCY_TOLERANCE"
+MEMORY_TOLERANCE_ENV_VAR = "NUTRIGUIDE_BENCH_MEMORY_TOLERANCE"
+# Absolute allowance on top of the memory tolerance, for allocator noise on small peaks
+MEMORY_SLACK = 256 * 1024
+
+
+def machine_id():
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return f"{platform.machine()} {cpu} x{os.cpu_count()}, Python {sys.version_info[0]}.{sys.version_info[1]}"
+
+
+def peak_memory(fn, *args, **kwargs):
+    """Peak bytes allocated (as traced by ``tracemalloc``) above the starting point during ``fn(*args, **kwargs)``."""
+    gc.collect()
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        fn(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+
+@dataclass(frozen=True)
+class Regression:
+    benchmark: str
+    metric: str  # "fastest round" (vs. the baseline median) or "peak memory"
+    baseline: float
+    value: float
+    tolerance: float
+
+    def __str__(self):
+        if self.metric == "fastest round":
+            baseline, value = f"{self.baseline * 1e3:.3f} ms", f"{self.value * 1e3:.3f} ms"
+        else:
+            baseline, value = format_bytes(int(self.baseline)), format_bytes(int(self.value))
+        return (f"{self.benchmark}: {self.metric} {value} vs. baseline {baseline} "
+                f"({self.value / self.baseline - 1:+.0%}, tolerance {self.tolerance:.0%})")
+
+
+class Baselines:
+    """Baseline results loaded from ``path``; records instead of comparing when ``update`` is set."""
+
+    def __init__(self, path=BASELINE_FILE, latency_tolerance=0.5, memory_tolerance=0.10, update=False):
+        self.path = Path(path)
+        stored = json.loads(self.path.read_text()) if self.path.exists() else {}
+        self.machine = stored.get("machine")
+        self.results = stored.get("benchmarks", {})
+        self.latency_tolerance = latency_tolerance
+        self.memory_tolerance = memory_tolerance
+        self.update = update
+        self.same_machine = self.machine == machine_id()
+        self._recorded = {}
+
+    @classmethod
+    def from_environment(cls, path=BASELINE_FILE):
+        return cls(
+            path,
+            latency_tolerance=float(os.environ.get(LATENCY_TOLERANCE_ENV_VAR, 0.5)),
+            memory_tolerance=float(os.environ.get(MEMORY_TOLERANCE_ENV_VAR, 0.10)),
+            update=os.environ.get(UPDATE_ENV_VAR) == "1",
+        )
+
+    def check(self, name, fastest, median, peak_bytes):
+        """Regressions of one result against its baseline; the times are None when timing is disabled."""
+        if self.update:
+            self._recorded[name] = {"median_seconds": median, "peak_bytes": peak_bytes}
+            return []
+        baseline = self.results.get(name)
+        if baseline is None:
+            return []
+        regressions = []
+        stored = baseline.get("median_seconds")
+        if self.same_machine and fastest is not None and stored and fastest > stored * (1 + self.latency_tolerance):
+            regressions.append(Regression(name, "fastest round", stored, fastest, self.latency_tolerance))
+        stored = baseline["peak_bytes"]
+        if peak_bytes > stored * (1 + self.memory_tolerance) + MEMORY_SLACK:
+            regressions.append(Regression(name, "peak memory", stored, peak_bytes, self.memory_tolerance))
+        return regressions
+
+    def save(self):
+        """Write the recorded results (update mode), keeping other benchmarks' baselines from this machine."""
+        if not self.update or not self._recorded:
+            return
+        results = {**self.results, **self._recorded} if self.same_machine else dict(self._recorded)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"machine": machine_id(), "benchmarks": dict(sorted(results.items()))},
+                                  indent=1) + "\n")
+        os.replace(tmp, self.path)
+
@@ -0,0 +1,113 @@
+import os
+import time
+import warnings
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.suite.baselines import Baselines, peak_memory  # noqa: E402
+from benchmarks.suite.synthetic import sample_profiles, scale_datasets  # noqa: E402
+from nutriguide.data import load_datasets  # noqa: E402
+from nutriguide.engine import RecommendationEngine  # noqa: E402
+from nutriguide.training import load_training_frame  # noqa: E402
+
+SCALES_ENV_VAR = "NUTRIGUIDE_BENCH_SCALES"
+SCALES = tuple(int(scale) for scale in os.environ.get(SCALES_ENV_VAR, "1,10,100,1000").split(","))
+# Profiles queried one at a time by the per-request benchmarks
+QUERIES = 1000
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "max_scale(n): skip the benchmark above n times the shipped data")
+
+
+@pytest.fixture(scope="session")
+def shipped():
+    return load_datasets()
+
+
+@pytest.fixture(scope="session", params=SCALES, ids=lambda scale: f"{scale}x")
+def scale(request):
+    return request.param
+
+
+@pytest.fixture(autouse=True)
+def _max_scale(request):
+    marker = request.node.get_closest_marker("max_scale")
+    if marker is not None and "scale" in request.fixturenames:
+        max_scale = marker.args[0]
+        if request.getfixturevalue("scale") > max_scale:
+            pytest.skip(f"per-row Python loop; runs up to {max_scale}x")
+
+
+@pytest.fixture(scope="session")
+def datasets(shipped, scale):
+    return scale_datasets(shipped, scale)
+
+
+@pytest.fixture(scope="session")
+def engine(datasets):
+    return RecommendationEngine(datasets)
+
+
+@pytest.fixture(scope="session")
+def profiles(shipped):
+    """``QUERIES`` app ``Profile``s drawn from the shipped profiles, the same at every scale."""
+    return sample_profiles(shipped.foods, QUERIES)
+
+
+@pytest.fixture(scope="session")
+def training_frame(shipped):
+    """Profiles joined with their meal plan and nutrient targets (``training.load_training_frame``)."""
+    return load_training_frame(shipped)
+
+
+@pytest.fixture(scope="session")
+def baselines():
+    baselines = Baselines.from_environment()
+    if baselines.results and not baselines.same_machine and not baselines.update:
+        warnings.warn(f"Baseline times were recorded on {baselines.machine}; comparing peak memory only "
+                      f"(NUTRIGUIDE_BENCH_UPDATE=1 records this machine's)")
+    yield baselines
+    baselines.save()
+
+
+def fastest_round(fn, args, kwargs, setup, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.fixture
+def measure(benchmark, baselines, request):
+    """``measure(fn, *args, setup=None)``: benchmark ``fn``, then check time and peak memory against the baseline.
+
+    ``setup`` runs before every round, untimed (e.g. to drop a cache the
+    benchmark should rebuild).
+    """
+    def run(fn, *args, setup=None, rounds=5, **kwargs):
+        if setup is None:
+            result = benchmark(fn, *args, **kwargs)
+        else:
+            result = benchmark.pedantic(fn, args, kwargs, setup=setup, rounds=rounds)
+            setup()
+        peak = peak_memory(fn, *args, **kwargs)
+        benchmark.extra_info["peak_bytes"] = peak
+        stats = None if benchmark.disabled else benchmark.stats.stats
+        fastest, median = (None, None) if stats is None else (stats.min, stats.median)
+        regressions = baselines.check(request.node.name, fastest, median, peak)
+        if any(regression.metric == "fastest round" for regression in regressions):
+            # Another process may have had the CPU throughout: time it once more before failing
+            fastest = min(fastest, fastest_round(fn, args, kwargs, setup, max(rounds, min(stats.rounds, 100))))
+            regressions = baselines.check(request.node.name, fastest, median, peak)
+        if regressions:
+            pytest.fail("\n".join(map(str, regressions)), pytrace=False)
+        return result
+
+    return run
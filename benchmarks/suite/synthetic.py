@@ -0,0 +1,71 @@
+"""Synthetic datasets: the shipped tables resampled ``scale`` times over, values jittered.
+
+Rows are drawn with replacement, so every column keeps its dtype, categories
+and value distribution, and the numeric fields the engine searches on
+(Daily_Calories, body measures) are jittered so the indexes grow with the
+data instead of repeating the same keys.  Meal plans keep referencing the
+shipped ``meal_combos``.  ``sample_profiles`` draws the app ``Profile``s the
+per-request benchmarks query with.  Everything is seeded, so a scale always
+produces the same tables and profiles.
+"""
+import numpy as np
+
+from nutriguide.data import Datasets
+from nutriguide.diets import DIET_PREFERENCES
+from nutriguide.engine import Profile
+from nutriguide.nutrition import HEALTH_GOALS
+
+
+def resample(frame, n, seed=0):
+    """``n`` rows of ``frame`` drawn with replacement, index reset."""
+    if n == len(frame):
+        return frame
+    rows = np.random.default_rng(seed).integers(0, len(frame), n)
+    return frame.iloc[rows].reset_index(drop=True)
+
+
+def _jitter(frame, column, spread, rng, low=None, high=None):
+    values = frame[column].to_numpy()
+    jittered = values + rng.integers(-spread, spread + 1, len(frame))
+    if low is not None or high is not None:
+        jittered = np.clip(jittered, low, high)
+    frame[column] = jittered.astype(values.dtype)
+
+
+def scale_datasets(data, scale, seed=0):
+    """``data`` with ``scale`` times as many profile, meal plan and nutrient rows (itself for 1)."""
+    if scale == 1:
+        return data
+    rng = np.random.default_rng(seed)
+
+    foods = resample(data.foods, len(data.foods) * scale, seed)
+    _jitter(foods, "Age", 2, rng, 18, 80)
+    _jitter(foods, "Weight_kg", 3, rng)
+    _jitter(foods, "Height_cm", 3, rng)
+    foods["BMI"] = (foods["Weight_kg"] / (foods["Height_cm"] / 100) ** 2).round(1).astype("float32")
+    _jitter(foods, "Daily_Calories", 25, rng)
+
+    meals = resample(data.meals, len(data.meals) * scale, seed + 1)
+    _jitter(meals, "Daily_Calories", 25, rng)
+
+    nutrients = resample(data.nutrients, len(data.nutrients) * scale, seed + 2)
+    _jitter(nutrients, "Daily_Calories", 25, rng)
+
+    return Datasets(foods=foods, meals=meals, meal_combos=data.meal_combos, nutrients=nutrients)
+
+
+def sample_profiles(foods, n, seed=1):
+    """``n`` app ``Profile``s from rows of ``foods``, body measures shifted off the stored values."""
+    rows = np.random.default_rng(seed).integers(0, len(foods), n)
+    return [Profile(
+        age=int(row.Age),
+        gender=str(row.Gender).lower(),
+        weight=float(row.Weight_kg) + 0.5,
+        height=float(row.Height_cm) - 0.5,
+        activity=str(row.Activity_Level).lower(),
+        goal=HEALTH_GOALS.get(str(row.Health_Goal).lower(), "maintain"),
+        diet=DIET_PREFERENCES.get(str(row.Diet_Preference).lower(), "non-veg"),
+        weekly_activity_days=int(row.Weekly_Activity_Days),
+        disease=str(row.Disease),
+        food_allergies=str(row.Food_Allergies),
+    ) for row in foods.iloc[rows].itertuples(index=False)]
@@ -0,0 +1,57 @@
+"""Artifact versions keep serving the files they were built from."""
+import os
+
+import joblib
+import pytest
+
+from nutriguide.artifacts import ArtifactStore
+from nutriguide.registry import ModelUnavailable
+
+
+def replace_model(path, model):
+    tmp = f"{path}.tmp"
+    joblib.dump(model, tmp)
+    os.replace(tmp, path)
+    # A new size and mtime, whatever the clock resolution
+    os.utime(path, ns=(os.stat(path).st_mtime_ns + 10 ** 9,) * 2)
+
+
+def test_version_keeps_its_model(tmp_path):
+    path = str(tmp_path / "model.pkl")
+    replace_model(path, {"trained": 1})
+    store = ArtifactStore(model_paths={"model": path}, interval=None)
+    old = store.current()
+    replace_model(path, {"trained": 2, "rows": 100})
+    assert store.check()
+    new = store.current()
+    assert new.engine is old.engine
+    # Never loaded before the replacement, and still the file it was built with
+    assert old.model("model") == {"trained": 1}
+    assert new.model("model") == {"trained": 2, "rows": 100}
+    assert new.load_stats("model").file_size == os.path.getsize(path)
+
+
+def test_touch_does_not_rebuild(tmp_path):
+    path = str(tmp_path / "model.pkl")
+    replace_model(path, {"trained": 1})
+    store = ArtifactStore(model_paths={"model": path}, interval=None)
+    first = store.current()
+    assert not store.check()  # idle poll: hashes the files the first build skipped
+    os.utime(path, ns=(os.stat(path).st_mtime_ns + 10 ** 9,) * 2)
+    assert not store.check()
+    assert store.current() is first
+
+
+def test_unavailable_and_broken_models(tmp_path):
+    pointer, broken = tmp_path / "pointer.pkl", tmp_path / "broken.pkl"
+    pointer.write_bytes(b"version https://git-lfs.github.com/spec/v1\noid sha256:0\nsize 1\n")
+    broken.write_bytes(b"not a pickle")
+    paths = {"pointer": str(pointer), "missing": str(tmp_path / "missing.pkl"), "broken": str(broken)}
+    artifacts = ArtifactStore(model_paths=paths, interval=None).current()
+    for name in ("pointer", "missing"):
+        with pytest.raises(ModelUnavailable):
+            artifacts.model(name)
+    # Anything else is an error, not a checkout without the model files
+    with pytest.raises(KeyError) as info:
+        artifacts.model("broken")
+    assert not isinstance(info.value, ModelUnavailable)
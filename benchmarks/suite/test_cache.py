@@ -0,0 +1,34 @@
+"""The recommendation cache is transparent: a hit or miss returns what the engine would."""
+from dataclasses import replace
+
+import pytest
+
+from nutriguide.cache import RecommendationCache
+from nutriguide.engine import RecommendationEngine
+
+
+def spellings(profile):
+    """``profile`` as the apps and the service may send it: case and padding vary, the meaning does not."""
+    return (
+        profile,
+        replace(profile, gender=profile.gender.upper(), activity=f" {profile.activity.title()} ",
+                goal=profile.goal.upper(), diet=profile.diet.title()),
+        replace(profile, gender=profile.gender.title(), activity=profile.activity.upper(),
+                goal=f"{profile.goal.title()} ", diet=f" {profile.diet.upper()}"),
+    )
+
+
+@pytest.fixture(scope="module")
+def shipped_engine(shipped):
+    return RecommendationEngine(shipped)
+
+
+def test_cached_matches_uncached(shipped_engine, profiles):
+    cache = RecommendationCache()
+    for profile in profiles[:100]:
+        profile = replace(profile, weight=round(float(profile.weight), 1), height=round(float(profile.height), 1))
+        expected = shipped_engine.recommend(profile)
+        for spelling in spellings(profile):
+            assert shipped_engine.recommend(spelling) == replace(expected, profile=spelling)
+            assert cache.recommend(shipped_engine, spelling) == replace(expected, profile=spelling)
+    assert cache.stats().hits > 0
@@ -0,0 +1,52 @@
+"""A classifier exported by ``selection --export`` loads and predicts, in the apps and in ``score``."""
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from nutriguide.features import FeaturePipeline
+from nutriguide.score import score_file
+from nutriguide.selection import SelectionData, export_model
+
+
+@pytest.fixture(scope="module")
+def exported(training_frame, tmp_path_factory):
+    """Path of a pipeline exported the way ``selection`` exports its pick, fitted on a sample."""
+    frame = training_frame.sample(2000, random_state=0)
+    encoder = LabelEncoder()
+    y = encoder.fit_transform(frame["Breakfast"].astype(str))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        features = FeaturePipeline(k=25).fit(frame, y)
+    X = features.transform(frame)
+    estimator = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    data = SelectionData(X_train=X, X_test=X, y_train=y, y_test=y, classes=np.array(encoder.classes_, dtype=str),
+                         features=features, key="test", from_cache=False)
+    path = tmp_path_factory.mktemp("model") / "meal_classifier_model.pkl"
+    export_model(data, estimator, path)
+    return path, set(encoder.classes_)
+
+
+def test_exported_predict(exported, training_frame):
+    path, classes = exported
+    model = joblib.load(path)
+    predicted = model.predict(training_frame.head(100))
+    assert len(predicted) == 100
+    assert set(predicted) <= classes
+    assert model.predict_proba(training_frame.head(5)).shape == (5, len(classes))
+
+
+def test_exported_score_file(exported, shipped, tmp_path):
+    path, classes = exported
+    profiles = tmp_path / "profiles.csv"
+    shipped.foods.head(500).to_csv(profiles, index=False)
+    output = tmp_path / "predictions.csv"
+    stats = score_file(profiles, output, workers=1, chunksize=200, model_path=path)
+    predictions = pd.read_csv(output)
+    assert stats.rows == len(predictions) == 500
+    assert predictions["row"].tolist() == list(range(500))
+    assert set(predictions["Predicted_Breakfast"]) <= classes
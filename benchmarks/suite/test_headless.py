@@ -0,0 +1,10 @@
+import sys
+
+
+def test_headless():
+    """The benchmarked modules load without Streamlit, so the suite can gate any change."""
+    import nutriguide.batch  # noqa: F401
+    import nutriguide.engine  # noqa: F401
+    import nutriguide.training  # noqa: F401
+
+    assert "streamlit" not in sys.modules
@@ -0,0 +1,45 @@
+"""Breakfast classifier inference: whole frames and single requests.
+
+The shipped model files may be Git LFS pointers, so the classifier is
+trained here on the shipped training table, with a smaller forest than the
+exported one.
+"""
+import warnings
+
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks.suite.synthetic import resample
+from nutriguide.batching import proba_predictor
+from nutriguide.features import predict_record, profile_record
+from nutriguide.training import train_meal_classifier
+
+
+@pytest.fixture(scope="session")
+def classifier(training_frame):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model, _ = train_meal_classifier(training_frame,
+                                         estimator=RandomForestClassifier(n_estimators=50, random_state=0))
+    return model
+
+
+@pytest.mark.max_scale(100)
+def test_classifier_frame(measure, classifier, training_frame, scale):
+    """``predict`` over a training-table-shaped frame with ``scale`` times the shipped rows."""
+    frame = resample(training_frame, len(training_frame) * scale)
+    predicted = measure(classifier.predict, frame)
+    assert len(predicted) == len(frame)
+
+
+def test_classifier_records(measure, classifier, engine, profiles):
+    """One record per request through ``transform_record``, as the apps predict."""
+    records = [profile_record(profile, engine) for profile in profiles[:50]]
+    measure(lambda: [predict_record(classifier, record) for record in records])
+
+
+def test_classifier_micro_batch(measure, classifier, engine, profiles):
+    """The same records scored together, as ``MicroBatcher`` cuts them (32 per batch)."""
+    records = [profile_record(profile, engine) for profile in profiles[:64]]
+    predict_batch = proba_predictor(classifier)
+    measure(lambda: [predict_batch(records[i:i + 32]) for i in range(0, len(records), 32)])
@@ -0,0 +1,30 @@
+"""Diet filtering and meal-plan selection over Meal_Suggestions."""
+import numpy as np
+import pytest
+
+from nutriguide.diets import MEAL_COLUMNS, filter_meals, meal_bits
+
+
+def test_diet_filter(measure, datasets):
+    """Vegan plans free of the two most common allergens, as one mask test on ``Ingredient_Bits``."""
+    kept = measure(filter_meals, datasets.meals, "vegan", "Milk, Peanuts")
+    assert len(kept) <= len(datasets.meals)
+
+
+@pytest.mark.max_scale(100)
+def test_meal_classification(measure, datasets):
+    """Ingredient bits of every meal plan from its Breakfast/Lunch/Dinner/Snacks text (load time)."""
+    text = datasets.meal_plans(datasets.meals)[list(MEAL_COLUMNS)]
+    bits = measure(meal_bits, text)
+    assert np.array_equal(bits, datasets.meals["Ingredient_Bits"].to_numpy())
+
+
+def test_meal_index_build(measure, engine):
+    """First request of a diet: the compatible rows and their calorie index are built."""
+    measure(engine.meal_plans, 2000.0, "veg", setup=engine._meal_indexes.clear)
+
+
+def test_meal_plan_selection(measure, engine, profiles):
+    """The three plans nearest each profile's TDEE among its diet's plans (indexes warm)."""
+    queries = [(engine.recommend(profile).tdee, profile.diet) for profile in profiles]
+    measure(lambda: [engine.meal_plans(tdee, diet) for tdee, diet in queries])
@@ -0,0 +1,17 @@
+"""Nutrient targets: the Micro_and_Macro_Nutrients row nearest a TDEE."""
+from nutriguide.batch import recommend_arrays
+
+
+def test_nutrient_lookup(measure, engine, profiles):
+    """One row per request, returned as a dict, as ``engine.recommend`` does."""
+    tdees = [engine.recommend(profile).tdee for profile in profiles]
+    measure(lambda: [engine.nutrient_targets(tdee) for tdee in tdees])
+
+
+def test_nutrient_lookup_many(measure, engine, datasets):
+    """Nearest rows for every profile's TDEE in one ``searchsorted``."""
+    foods = datasets.foods
+    tdee = recommend_arrays(foods["Age"], foods["Gender"], foods["Weight_kg"], foods["Height_cm"],
+                            foods["Activity_Level"], foods["Health_Goal"], engine=engine)["TDEE"]
+    rows = measure(engine.nearest_nutrient_rows, tdee)
+    assert len(rows) == len(tdee)
@@ -0,0 +1,31 @@
+"""BMR, TDEE and macronutrient needs: per profile and for whole cohorts."""
+import pytest
+
+from benchmarks.suite.synthetic import sample_profiles
+from nutriguide.batch import recommend_batch
+from nutriguide.nutrition import calculate_bmr, calculate_macronutrients, calculate_tdee
+
+
+def nutrition_needs(profiles):
+    for profile in profiles:
+        bmr = calculate_bmr(profile.weight, profile.height, profile.age, profile.gender)
+        tdee = calculate_tdee(bmr, profile.activity)
+        calculate_macronutrients(tdee, profile.goal)
+
+
+@pytest.mark.max_scale(10)
+def test_nutrition_scalar(measure, datasets):
+    """The scalar functions the apps call, once per profile of the dataset."""
+    profiles = sample_profiles(datasets.foods, len(datasets.foods))
+    measure(nutrition_needs, profiles)
+
+
+def test_recommend_batch(measure, engine, datasets):
+    """Vectorized needs plus the nearest meal and nutrient rows for every profile."""
+    out = measure(recommend_batch, datasets.foods, engine, with_meals=False)
+    assert len(out) == len(datasets.foods)
+
+
+def test_recommend(measure, engine, profiles):
+    """``engine.recommend`` end to end, one request at a time."""
+    measure(lambda: [engine.recommend(profile) for profile in profiles])
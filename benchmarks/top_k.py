@@ -0,0 +1,85 @@
+"""Nearest-calorie top-k: full sort vs. top_k vs. streaming over an on-disk catalog.
+
+    python -m benchmarks.top_k [--sizes 5000 1000000 50000000] [-k 3] [--chunksize 1000000]
+
+Catalogs are synthetic int16 Daily_Calories columns (the dataset's dtype).
+"sort_values" is the apps' former frame sort on a ``diff`` column (skipped
+above ``--max-frame-rows``); "streaming" reads a memory-mapped ``.npy`` copy
+chunk by chunk and reports its peak traced allocation, which stays bounded
+by the chunk size rather than the catalog size.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from nutriguide.resources import format_bytes
+from nutriguide.topk import iter_array_chunks, nearest_in_chunks, nearest_k
+
+
+def _timed(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def write_catalog(path, n, chunksize, seed=0):
+    rng = np.random.default_rng(seed)
+    catalog = np.lib.format.open_memmap(path, mode="w+", dtype=np.int16, shape=(n,))
+    for start in range(0, n, chunksize):
+        stop = min(n, start + chunksize)
+        catalog[start:stop] = rng.integers(1200, 5000, stop - start)
+    catalog.flush()
+    del catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 1_000_000, 50_000_000])
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--chunksize", type=int, default=1_000_000)
+    parser.add_argument("--max-frame-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    target = 2437.5
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            path = os.path.join(workdir, f"catalog_{n}.npy")
+            write_catalog(path, n, args.chunksize)
+            calories = np.load(path)
+            print(f"{n:,} rows")
+            rows = []
+            if n <= args.max_frame_rows:
+                import pandas as pd
+
+                frame = pd.DataFrame({"Daily_Calories": calories})
+
+                def sort_values():
+                    frame["diff"] = abs(frame["Daily_Calories"] - target)
+                    return frame.sort_values(by="diff").head(args.k).index.to_numpy()
+                rows.append(("sort_values + head", sort_values))
+            rows += [
+                ("argsort()[:k]", lambda: np.argsort(np.abs(calories - target), kind="stable")[:args.k]),
+                ("top_k (argpartition)", lambda: nearest_k(calories, target, args.k)),
+                ("streaming, mmap chunks", lambda: nearest_in_chunks(
+                    iter_array_chunks(np.load(path, mmap_mode="r"), args.chunksize), target, args.k)[0]),
+            ]
+            expected = None
+            for label, fn in rows:
+                result, seconds, peak = _timed(fn)
+                if expected is None:
+                    expected = np.abs(calories[result].astype(float) - target)
+                assert np.array_equal(np.abs(calories[result].astype(float) - target), expected), label
+                print(f"  {label:<26}{seconds * 1e3:11.2f} ms  peak alloc {format_bytes(peak):>10}")
+            del calories
+
+
+if __name__ == "__main__":
+    main()
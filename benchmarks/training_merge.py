@@ -0,0 +1,84 @@
+"""Training table: chained Daily_Calories merges vs. the row-aligned chunked join.
+
+    python -m benchmarks.training_merge [--scales 1 2 4] [--chunksize 1000]
+
+"merge + drop_duplicates" is the notebooks' former
+``pd.merge(pd.merge(foods, meals), nutrients)`` on Daily_Calories followed by
+``drop_duplicates``; "row join" and "calorie join" are
+``trainset.build_training_table`` with each strategy, and "cached load" reads
+the table back from its ``.npz``.  ``--scales`` stacks that many copies of
+the shipped CSVs, which keeps them row-aligned but multiplies the rows per
+calorie value, so the many-to-many merge grows with the square of the scale.
+Reports wall time, peak traced allocation, rows out and the result's memory.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from nutriguide.data import Datasets, load_datasets
+from nutriguide.resources import format_bytes
+from nutriguide.trainset import build_training_table, read_training_table, write_training_table
+
+
+def _timed(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def chained_merge(data):
+    foods, meals, nutrients = data.frames()
+    frame = pd.merge(pd.merge(foods, meals, on="Daily_Calories"), nutrients, on="Daily_Calories")
+    frame = frame.drop_duplicates()
+    return frame[frame["Daily_Calories"] > 0].reset_index(drop=True)
+
+
+def scaled(data, scale):
+    if scale == 1:
+        return data
+    return Datasets(
+        foods=pd.concat([data.foods] * scale, ignore_index=True),
+        meals=pd.concat([data.meals] * scale, ignore_index=True),
+        meal_combos=data.meal_combos,
+        nutrients=pd.concat([data.nutrients] * scale, ignore_index=True),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chunksize", type=int, default=1000)
+    args = parser.parse_args()
+
+    shipped = load_datasets()
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in args.scales:
+            data = scaled(shipped, scale)
+            path = os.path.join(workdir, f"training_{scale}.npz")
+            print(f"scale {scale}: {len(data.foods):,} profiles")
+            rows = [
+                ("merge + drop_duplicates", lambda: chained_merge(data)),
+                ("row join", lambda: build_training_table(data, args.chunksize, strategy="row")),
+                ("calorie join", lambda: build_training_table(data, args.chunksize, strategy="calorie")),
+            ]
+            for label, fn in rows:
+                table, seconds, peak = _timed(fn)
+                print(f"  {label:<24}{seconds * 1e3:10.1f} ms  peak alloc {format_bytes(peak):>10}  "
+                      f"{len(table):>9,} rows  {format_bytes(table.memory_usage(deep=True).sum()):>10}")
+                if label == "row join":
+                    write_training_table(table, path, "benchmark")
+            table, seconds, peak = _timed(lambda: read_training_table(path))
+            print(f"  {'cached load':<24}{seconds * 1e3:10.1f} ms  peak alloc {format_bytes(peak):>10}  "
+                  f"{len(table):>9,} rows  {format_bytes(table.memory_usage(deep=True).sum()):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Weekly planner: a full 7-day plan vs. re-optimizing after a single meal swap.
+
+    python -m benchmarks.weekly_plan [--profiles 30] [--swaps 5]
+
+Profiles are drawn from Final_Data_Set.csv.  Every week is followed by
+``--swaps`` swaps of a random (day, slot).  Every resulting week is checked:
+variety rules are hard and should never break, the calorie band is
+best-effort and its misses are counted per day.
+"""
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+
+from benchmarks.profile_index import query_profiles
+from nutriguide.data import load_datasets
+from nutriguide.engine import RecommendationEngine
+from nutriguide.mealplan import SLOTS, MealPlanOptimizer, load_food_catalog
+from nutriguide.weekly import WeeklyPlanner
+
+
+def tally(planner, week, checked, variety, misses):
+    band = len(planner.band_misses(week))
+    return checked + 1, variety + len(planner.violations(week)) - band, misses + band
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=30)
+    parser.add_argument("--swaps", type=int, default=5)
+    args = parser.parse_args()
+
+    data = load_datasets()
+    engine = RecommendationEngine(data)
+    recommendations = [engine.recommend(profile) for profile in query_profiles(data.foods, args.profiles)]
+    planner = WeeklyPlanner(MealPlanOptimizer(load_food_catalog()))
+    planner.plan_for(recommendations[0])  # scipy import and model build, outside the timings
+
+    rng = random.Random(0)
+    weeks, swaps, objectives = [], [], []
+    checked, variety, misses = 0, 0, 0
+    for recommendation in recommendations:
+        start = time.perf_counter()
+        week = planner.plan_for(recommendation)
+        weeks.append(time.perf_counter() - start)
+        checked, variety, misses = tally(planner, week, checked, variety, misses)
+        objectives.append(statistics.mean(day.objective for day in week.days))
+        for _ in range(args.swaps):
+            day, slot = rng.randrange(len(week.days)), rng.choice(SLOTS)
+            start = time.perf_counter()
+            week = planner.swap(week, day, slot)
+            swaps.append(time.perf_counter() - start)
+            checked, variety, misses = tally(planner, week, checked, variety, misses)
+
+    weeks, swaps = np.array(weeks), np.array(swaps)
+    print(f"full week    p50 {np.percentile(weeks, 50) * 1e3:8.2f} ms  p99 {np.percentile(weeks, 99) * 1e3:8.2f} ms  "
+          f"({len(weeks)} weeks, mean day objective {statistics.mean(objectives):.3f})")
+    print(f"single swap  p50 {np.percentile(swaps, 50) * 1e3:8.2f} ms  p99 {np.percentile(swaps, 99) * 1e3:8.2f} ms  "
+          f"({len(swaps)} swaps, {np.median(weeks) / np.median(swaps):.1f}x faster than a full week)")
+    print(f"{checked} weeks checked: {variety} variety rule breaches, "
+          f"{misses} of {checked * planner.days} days outside the {planner.calorie_band:.0%} calorie band")
+
+
+if __name__ == "__main__":
+    main()
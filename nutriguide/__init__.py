@@ -0,0 +1,14 @@
+"""NutriGuide: nutrition recommendation engine shared by the Streamlit apps."""
+from .engine import MealPlan, Profile, Recommendation, RecommendationEngine, recommend
+from .nutrition import calculate_bmr, calculate_macronutrients, calculate_tdee
+
+__all__ = [
+    "MealPlan",
+    "Profile",
+    "Recommendation",
+    "RecommendationEngine",
+    "calculate_bmr",
+    "calculate_macronutrients",
+    "calculate_tdee",
+    "recommend",
+]
@@ -0,0 +1,392 @@
+"""Versioned datasets and models that are rebuilt when their files change.
+
+``ArtifactStore.current()`` returns an immutable ``Artifacts`` version: the
+datasets, a ``RecommendationEngine`` with its calorie indexes built, and the
+models under ``model/``.  A watcher thread polls the files every
+``interval`` seconds.  It compares mtime and size, and hashes only the
+files whose stamp moved, so a ``touch`` or a rewrite with the same bytes
+costs one read of that file.  The first build hashes nothing; the watcher
+hashes the files on its first idle poll instead.  A real change is built into
+the next version in the background and swapped in with a single reference
+assignment.
+
+A version rebuilds only what changed: the datasets and engine when a CSV
+did, a model when its file did.  Models stay lazy.  Each version holds a
+``ModelVersion`` per model, which opens the file when the version is built
+and loads from that handle on first use (recording its ``LoadStats``).  A
+file replaced afterwards (``os.replace``, as the exporters do) therefore never
+changes what an older version serves.  Versions share a ``ModelVersion`` as
+long as its file is unchanged, so the same object serves all of them.  Files
+rewritten in place are not protected; replace model files atomically.
+
+Callers take one version per request or Streamlit rerun and keep it until they
+are done, so in-flight sessions finish on the version they started with.  The
+store drops its own reference at the swap, and the old version is freed once
+its last user lets go.  Objects derived from a version, such as a classifier's
+micro-batcher, live in ``Artifacts.resource`` and are closed with it.  A build
+that fails (e.g. a CSV caught half-copied) is logged and the current version
+keeps serving until the files change again.
+
+    store = default_store()  # process-wide, watcher started
+    artifacts = store.current()
+    artifacts.engine.recommend(profile)
+    artifacts.model("meal_classifier")
+    store.history()  # ReloadStats: build time, memory overlap, when the old version was freed
+
+``python -m benchmarks.hot_reload`` reports reload latency and memory
+overlap while sessions keep querying.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+
+from .data import SOURCE_FILES
+from .instrumentation import span
+from .paths import DATASETS_DIR
+from .registry import DEFAULT_MODELS, ModelUnavailable, load_model
+from .resources import current_rss, format_bytes
+
+logger = logging.getLogger(__name__)
+
+# Calorie level used to build every diet's meal index before a version goes live
+_WARM_TDEE = 2000.0
+
+
+@dataclass(frozen=True)
+class FileStamp:
+    path: str
+    mtime_ns: int  # None when the file is missing
+    size: int
+
+
+def file_stamps(paths):
+    stamps = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamps.append(FileStamp(str(path), st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stamps.append(FileStamp(str(path), None, 0))
+    return tuple(stamps)
+
+
+def file_digest(path):
+    """SHA-256 of the bytes of ``path``; missing files get a digest of their own."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except FileNotFoundError:
+        digest.update(b"\0missing")
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class ReloadStats:
+    version: int
+    changed: tuple  # file names that triggered the build; empty for the first one
+    build_seconds: float  # file change noticed -> new version live
+    rss_before: int  # process RSS before the build
+    rss_overlap: int  # RSS growth with the old and new versions both alive
+    freed_after: float = None  # seconds from the swap until the previous version was freed
+    rss_freed: int = None  # RSS released by then
+
+    def __str__(self):
+        changed = ", ".join(self.changed) or "initial load"
+        text = (f"v{self.version} ({changed}): built in {self.build_seconds * 1000:.0f} ms, "
+                f"RSS {format_bytes(self.rss_before)} +{format_bytes(self.rss_overlap)} during overlap")
+        if self.freed_after is not None:
+            text += (f", previous version freed after {self.freed_after * 1000:.0f} ms "
+                     f"(-{format_bytes(self.rss_freed)})")
+        return text
+
+
+class ModelVersion:
+    """One model file as it was when its version was built, loaded on first use and kept.
+
+    A load failure (Git LFS pointer, missing file) is remembered rather than
+    retried on every call; the store makes a new ``ModelVersion`` when the
+    file changes.
+    """
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = str(path)
+        self.stats = None  # LoadStats, once loaded
+        self._model = None
+        self._error = None
+        try:
+            # Holds on to this file even if a new one replaces it before the first use
+            self._file = open(path, "rb")
+        except FileNotFoundError:
+            self._file, self._error = None, ModelUnavailable(f"{name}: {path} does not exist")
+        except OSError as exc:
+            self._file, self._error = None, exc
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def get(self):
+        """The model; raises ``ModelUnavailable`` for a missing file or Git LFS pointer, KeyError otherwise.
+
+        Either is raised from the load error.
+        """
+        if self._model is None and self._error is None:
+            with self._lock:
+                if self._model is None and self._error is None:
+                    try:
+                        self._model, self.stats = load_model(self.name, self._file)
+                        logger.info("Loaded %s", self.stats)
+                    except ModelUnavailable as exc:
+                        logger.warning("Not loaded: %s", exc)
+                        # Without its traceback, which would keep the loading frames alive
+                        self._error = exc.with_traceback(None)
+                    except Exception as exc:
+                        logger.exception("Could not load %s from %s", self.name, self.path)
+                        self._error = exc.with_traceback(None)
+                    finally:
+                        self._file.close()
+        if self._model is None:
+            error_type = ModelUnavailable if isinstance(self._error, ModelUnavailable) else KeyError
+            raise error_type(f"Model {self.name!r} is not available") from self._error
+        return self._model
+
+
+class Artifacts:
+    """One immutable version of the datasets, engine and models."""
+
+    def __init__(self, version, data, engine, models):
+        self.version = version
+        self.data = data
+        self.engine = engine
+        self._models = models  # name -> ModelVersion
+        self._resources = {}
+        self._closers = {}
+        self._lock = threading.Lock()
+
+    def model(self, name):
+        """The model ``name``, loaded on first use; raises as ``ModelVersion.get`` when it cannot be loaded."""
+        if name not in self._models:
+            raise KeyError(f"No model {name!r} in version {self.version}")
+        return self._models[name].get()
+
+    def models(self):
+        """The models this version has loaded so far, by name."""
+        return {name: model.get() for name, model in self._models.items() if model.loaded}
+
+    def load_stats(self, name):
+        """``LoadStats`` of model ``name`` in this version, or None until it has loaded."""
+        return self._models[name].stats
+
+    def resource(self, key, factory, close=None):
+        """``factory(self)``, built once per version and closed (``close(value)``) when the version is freed."""
+        value = self._resources.get(key)
+        if value is None:
+            with self._lock:
+                value = self._resources.get(key)
+                if value is None:
+                    value = factory(self)
+                    self._resources[key] = value
+                    if close is not None:
+                        self._closers[key] = close
+        return value
+
+
+def _close_resources(version, resources, closers):
+    for key, close in closers.items():
+        try:
+            close(resources[key])
+        except Exception:
+            logger.exception("Closing %s of version %d failed", key, version)
+
+
+def build_engine(data_dir=DATASETS_DIR):
+    """(datasets, ``RecommendationEngine``) with every diet's meal index built."""
+    from .data import load_datasets
+    from .diets import DIET_EXCLUSIONS
+    from .engine import RecommendationEngine
+
+    with span("load_datasets"):
+        data = load_datasets(data_dir)
+    with span("build_engine"):
+        engine = RecommendationEngine(data)
+        # Build the per-diet meal indexes now rather than on the first request after the swap
+        for diet in ("non-veg", *DIET_EXCLUSIONS):
+            engine.meal_plans(_WARM_TDEE, diet)
+    return data, engine
+
+
+class ArtifactStore:
+    """Holds the current ``Artifacts`` and replaces it when the watched files change.
+
+    ``registry`` (a ``ModelRegistry``), when given, has a model unloaded when
+    its file changes, so code reading models from the registry loads the new
+    file on its next ``get``.
+    """
+
+    def __init__(self, data_dir=DATASETS_DIR, model_paths=None, interval=5.0, registry=None):
+        self.data_dir = Path(data_dir)
+        self.model_paths = dict(DEFAULT_MODELS if model_paths is None else model_paths)
+        self.interval = interval
+        self.registry = registry
+        self.data_paths = [str(self.data_dir / name) for name in SOURCE_FILES]
+        self.paths = self.data_paths + [str(path) for path in self.model_paths.values()]
+        self._current = None
+        self._stamps = None
+        self._digests = {}  # path -> file_digest as of the current version, once hashed
+        self._history = []  # mutable ReloadStats fields, one dict per version
+        self._build_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def current(self):
+        """The live version, built on first use."""
+        artifacts = self._current
+        if artifacts is None:
+            self.check()
+            artifacts = self._current
+        return artifacts
+
+    def check(self):
+        """Poll the files once; builds and swaps in a new version when their contents changed.
+
+        Returns True when a new version went live.
+        """
+        with self._build_lock:
+            stamps = file_stamps(self.paths)
+            if self._current is not None and stamps == self._stamps:
+                self._hash_unhashed()
+                return False
+            start = time.perf_counter()
+            digests, changed = {}, []
+            if self._current is not None:
+                previous = {stamp.path: stamp for stamp in self._stamps}
+                digests = dict(self._digests)
+                # Only files whose mtime or size moved are read again
+                for stamp in stamps:
+                    if previous[stamp.path] != stamp:
+                        digests[stamp.path] = file_digest(stamp.path)
+                        # A file not hashed since the first build counts as changed
+                        if digests[stamp.path] != self._digests.get(stamp.path):
+                            changed.append(stamp.path)
+            if self._current is not None and not changed:
+                # Touched or rewritten with the same bytes
+                self._stamps, self._digests = stamps, digests
+                return False
+            rss_before = current_rss()
+            version = len(self._history) + 1
+            try:
+                artifacts = self._build(version, changed)
+            except Exception:
+                if self._current is None:
+                    raise
+                logger.exception("Building version %d failed; still serving version %d",
+                                 version, self._current.version)
+                # Retried when the files change again
+                self._stamps = stamps
+                return False
+            changed = tuple(os.path.basename(path) for path in changed)
+            self._swap(artifacts, stamps, digests, changed, start, rss_before)
+            return True
+
+    def _hash_unhashed(self):
+        """Digest the files the first build skipped, while their stamps still match it."""
+        for path in self.paths:
+            if path not in self._digests:
+                self._digests[path] = file_digest(path)
+
+    def _build(self, version, changed):
+        """The next version: reuses the current one's engine and unchanged models."""
+        current = self._current
+        if current is None or any(path in changed for path in self.data_paths):
+            data, engine = build_engine(self.data_dir)
+        else:
+            data, engine = current.data, current.engine
+        models = {}
+        for name, path in self.model_paths.items():
+            path = str(path)
+            if current is not None and path not in changed:
+                models[name] = current._models[name]
+                continue
+            if current is not None and self.registry is not None and name in self.registry.names():
+                # The registry's next get loads the new file; the store's versions never read it
+                self.registry.unload(name)
+            models[name] = ModelVersion(name, path)
+        return Artifacts(version, data, engine, models)
+
+    def _swap(self, artifacts, stamps, digests, changed, start, rss_before):
+        record = {
+            "version": artifacts.version,
+            "changed": changed,
+            "build_seconds": 0.0,
+            "rss_before": rss_before,
+            "rss_overlap": current_rss() - rss_before,
+        }
+        previous = self._current
+        weakref.finalize(artifacts, _close_resources, artifacts.version, artifacts._resources, artifacts._closers)
+        # A single reference assignment: readers see the old version or the new one
+        self._current, self._stamps, self._digests = artifacts, stamps, digests
+        record["build_seconds"] = time.perf_counter() - start
+        self._history.append(record)
+        if previous is not None:
+            swapped_at, last = time.perf_counter(), self._history[-2]
+
+            def freed():
+                record["freed_after"] = time.perf_counter() - swapped_at
+                record["rss_freed"] = max(0, rss_before + record["rss_overlap"] - current_rss())
+                logger.info("Version %d freed", last["version"])
+
+            weakref.finalize(previous, freed)
+            logger.info("Version %d live (%s); version %d retired", artifacts.version,
+                        ", ".join(changed), previous.version)
+
+    def history(self):
+        """``ReloadStats`` of every version, oldest first."""
+        return [ReloadStats(**record) for record in self._history]
+
+    def start(self):
+        """Start polling in a daemon thread (idempotent)."""
+        if self._watcher is None:
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, name="artifact-watcher", daemon=True)
+            self._watcher.start()
+        return self
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Artifact check failed")
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    """Process-wide store over the shipped datasets and models, watcher running.
+
+    Changed models are also unloaded from ``registry.default_registry()``.
+    """
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                from .registry import default_registry
+                _default = ArtifactStore(registry=default_registry()).start()
+    return _default
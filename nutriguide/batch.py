@@ -0,0 +1,98 @@
+"""Vectorized recommendations for whole cohorts of profiles.
+
+``recommend_batch`` takes a DataFrame shaped like Final_Data_Set.csv (Age,
+Gender, Weight_kg, Height_cm, Activity_Level, Health_Goal and optionally
+Diet_Preference) and computes BMR, TDEE, macros, the closest diet-compatible
+meal plan and the closest nutrient-target row for every row at once, with
+array arithmetic and ``searchsorted`` lookups instead of a Python loop over
+the scalar functions.  ``recommend_arrays`` is the same computation on plain
+arrays using the app's vocabulary ("male", "very active", "lose", "veg").
+"""
+import numpy as np
+import pandas as pd
+
+from .diets import DIET_EXCLUSIONS, DIET_PREFERENCES, MEAL_COLUMNS, diet_mask
+from .engine import default_engine
+from .nutrition import ACTIVITY_FACTORS, HEALTH_GOALS, MACRO_SPLITS
+
+_GOALS = list(MACRO_SPLITS)
+_PROTEIN_PER_KG = np.array([MACRO_SPLITS[goal][0] for goal in _GOALS])
+_FAT_SHARE = np.array([MACRO_SPLITS[goal][1] for goal in _GOALS])
+
+
+def _lookup(values, mapping, default, dtype):
+    """Map each value through ``mapping`` (case-insensitive), hashing each distinct value once."""
+    codes, uniques = pd.factorize(values)
+    table = [mapping.get(str(value).strip().lower(), default) for value in uniques]
+    # Trailing default catches code -1 (missing value) via table[-1]
+    return np.array(table + [default], dtype=dtype)[codes]
+
+
+def recommend_arrays(age, gender, weight, height, activity, goal, diet=None, engine=None):
+    """Column arrays of BMR, TDEE, macros and the matched meal and nutrient rows."""
+    engine = engine or default_engine()
+    age = np.asarray(age, dtype=np.float64)
+    weight = np.asarray(weight, dtype=np.float64)
+    height = np.asarray(height, dtype=np.float64)
+
+    is_male = _lookup(gender, {"male": True}, False, bool)
+    bmr = 10 * weight + 6.25 * height - 5 * age + np.where(is_male, 5, -161)
+    tdee = bmr * _lookup(activity, ACTIVITY_FACTORS, 1.2, np.float64)
+
+    goal_codes = _lookup(goal, {**{g: i for i, g in enumerate(_GOALS)},
+                                **{k: _GOALS.index(v) for k, v in HEALTH_GOALS.items()}},
+                         _GOALS.index("maintain"), np.int8)
+    protein = _PROTEIN_PER_KG[goal_codes]
+    fat = _FAT_SHARE[goal_codes] * tdee / 9
+    carbs = (tdee - (protein + fat)) / 4
+
+    if diet is None:
+        masks = np.zeros(len(tdee), dtype=np.uint16)
+    else:
+        diet_masks = {**{d: diet_mask(d) for d in DIET_EXCLUSIONS},
+                      **{k: diet_mask(v) for k, v in DIET_PREFERENCES.items()}}
+        masks = _lookup(diet, diet_masks, 0, np.uint16)
+
+    return {
+        "BMR": bmr,
+        "TDEE": tdee,
+        "Protein_g_per_kg": protein,
+        "Protein_g": protein * weight,
+        "Fat_g": fat,
+        "Carbs_g": carbs,
+        "Meal_Row": engine.nearest_meal_rows(tdee, masks),
+        "Nutrient_Row": engine.nearest_nutrient_rows(tdee),
+    }
+
+
+def recommend_batch(profiles, engine=None, with_meals=True):
+    """Recommendations for a Final_Data_Set-shaped frame, one output row per profile."""
+    engine = engine or default_engine()
+    result = recommend_arrays(
+        age=profiles["Age"].to_numpy(),
+        gender=profiles["Gender"],
+        weight=profiles["Weight_kg"].to_numpy(),
+        height=profiles["Height_cm"].to_numpy(),
+        activity=profiles["Activity_Level"],
+        goal=profiles["Health_Goal"],
+        diet=profiles["Diet_Preference"] if "Diet_Preference" in profiles else None,
+        engine=engine,
+    )
+    out = pd.DataFrame(result, index=profiles.index)
+
+    meals, nutrients = engine.data.meals, engine.data.nutrients
+    meal_rows, nutrient_rows = result["Meal_Row"], result["Nutrient_Row"]
+    found = meal_rows >= 0
+    meal_ids = np.where(found, meals["Meal_ID"].to_numpy()[meal_rows], -1)
+    out["Meal_Calories"] = np.where(found, meals["Daily_Calories"].to_numpy()[meal_rows], 0)
+    out["Water_Intake_L"] = np.where(found, meals["Water_Intake_L"].to_numpy()[meal_rows], np.nan)
+    if with_meals:
+        # Categoricals over the interned combinations: no per-row strings are built
+        combos = engine.data.meal_combos
+        for column in MEAL_COLUMNS:
+            combo_codes, categories = pd.factorize(combos[column])
+            codes = np.where(found, combo_codes[meal_ids], -1)
+            out[column] = pd.Categorical.from_codes(codes, categories=categories)
+    for column in ("Daily_Calories", "Protein_g", "Carbs_g", "Fat_g"):
+        out[f"Target_{column}"] = nutrients[column].to_numpy()[nutrient_rows]
+    return out
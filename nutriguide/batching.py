@@ -0,0 +1,196 @@
+"""Micro-batching of single-row predictions from concurrent callers.
+
+scikit-learn's ``predict`` costs roughly the same for one row as for a few
+dozen: most of a single-row call is input validation and per-tree dispatch.
+``MicroBatcher`` queues the rows submitted by concurrent sessions, and a
+worker thread hands them to one vectorized call once ``max_batch_size`` rows
+are waiting or the oldest has waited ``max_latency`` seconds, then resolves
+each caller's future with its own result.  A caller alone pays at most
+``max_latency`` extra.
+
+    batcher = breakfast_batcher(models.get("meal_classifier"))
+    prediction = batcher(profile_record(profile, engine, tdee))  # blocks
+    prediction = await batcher.predict_async(record)             # asyncio callers
+    prediction.label, prediction.probability
+
+Queue depth (rows waiting when a batch is cut), batch size and the time rows
+spend queued are kept in ``metrics.Histogram`` objects; ``stats()`` returns
+snapshots and ``exposition()`` the Prometheus text lines.
+``python -m benchmarks.micro_batching`` compares throughput and latency with
+per-row calls.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import numpy as np
+
+from .instrumentation import span
+from .metrics import COUNT_BUCKETS, Histogram
+
+# Seconds, 100 us to 1 s
+WAIT_BUCKETS = (1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 1.0)
+
+
+@dataclass(frozen=True)
+class Prediction:
+    label: object
+    probability: float  # predict_proba of ``label``
+
+
+@dataclass(frozen=True)
+class BatcherStats:
+    batches: int
+    rows: int
+    queue_depth: object  # HistogramSnapshot
+    batch_size: object
+    queue_wait: object
+
+    def __str__(self):
+        mean = self.rows / self.batches if self.batches else 0.0
+        return (f"{self.rows:,} rows in {self.batches:,} batches (mean {mean:.1f}), "
+                f"batch size p50 <= {self.batch_size.quantile(0.5):g} p99 <= {self.batch_size.quantile(0.99):g}, "
+                f"queue depth p99 <= {self.queue_depth.quantile(0.99):g}, "
+                f"queue wait p99 <= {self.queue_wait.quantile(0.99) * 1e3:g} ms")
+
+
+class MicroBatcher:
+    """Collects items from many threads and runs ``predict_batch(items)`` on groups of them.
+
+    ``predict_batch`` takes a list and returns one result per item, in order.
+    If it raises, every caller in that batch gets the exception.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=32, max_latency=0.003, name="micro-batcher"):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.name = name
+        self.queue_depth = Histogram(COUNT_BUCKETS)
+        self.batch_size = Histogram(COUNT_BUCKETS)
+        self.queue_wait = Histogram(WAIT_BUCKETS)
+        self._queue = deque()  # (enqueued at, item, future), oldest first
+        self._ready = threading.Condition()
+        self._closed = False
+        self._worker = None
+
+    def submit(self, item):
+        """Queue ``item``; returns a ``concurrent.futures.Future`` of its result."""
+        future = Future()
+        with self._ready:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+            self._queue.append((time.perf_counter(), item, future))
+            if len(self._queue) == 1 or len(self._queue) >= self.max_batch_size:
+                self._ready.notify()
+        return future
+
+    def __call__(self, item, timeout=None):
+        """Result for ``item``, blocking until its batch has run."""
+        return self.submit(item).result(timeout)
+
+    async def predict_async(self, item):
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _next_batch(self):
+        with self._ready:
+            while not self._queue:
+                if self._closed:
+                    return None
+                self._ready.wait()
+            # The budget runs from the oldest row's arrival, not from when the worker got to it
+            deadline = self._queue[0][0] + self.max_latency
+            while len(self._queue) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._ready.wait(remaining)
+            self.queue_depth.observe(len(self._queue))
+            size = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            self.batch_size.observe(len(batch))
+            for enqueued, _, _ in batch:
+                self.queue_wait.observe(started - enqueued)
+            # Callers that cancelled while queued are dropped
+            live = [(item, future) for _, item, future in batch if future.set_running_or_notify_cancel()]
+            if not live:
+                continue
+            try:
+                with span(f"{self.name}_batch"):
+                    results = list(self.predict_batch([item for item, _ in live]))
+                if len(results) != len(live):
+                    raise ValueError(f"{self.name}: predict_batch returned {len(results)} results "
+                                     f"for {len(live)} rows")
+            except Exception as exc:
+                # Every caller gets the error; none is left waiting on its future
+                for _, future in live:
+                    future.set_exception(exc)
+                continue
+            for (_, future), result in zip(live, results):
+                future.set_result(result)
+
+    def close(self):
+        """Stop the worker once the queued rows are done; later ``submit`` calls raise."""
+        with self._ready:
+            self._closed = True
+            self._ready.notify_all()
+        if self._worker is not None:
+            self._worker.join()
+
+    def stats(self):
+        batch_size = self.batch_size.snapshot()
+        return BatcherStats(
+            batches=batch_size.count,
+            rows=int(batch_size.sum),
+            queue_depth=self.queue_depth.snapshot(),
+            batch_size=batch_size,
+            queue_wait=self.queue_wait.snapshot(),
+        )
+
+    def exposition(self, prefix="nutriguide_batcher"):
+        """Prometheus text lines for the three histograms, labelled with ``name``."""
+        labels = {"batcher": self.name}
+        return "\n".join([
+            self.queue_depth.exposition(f"{prefix}_queue_depth", "Rows waiting when a batch is cut", labels),
+            self.batch_size.exposition(f"{prefix}_batch_size", "Rows per predict call", labels),
+            self.queue_wait.exposition(f"{prefix}_queue_wait_seconds", "Time rows spend queued", labels),
+        ])
+
+
+def proba_predictor(model):
+    """``predict_batch`` over feature-pipeline records for a ``Pipeline(features=FeaturePipeline, ...)``.
+
+    Rows are transformed one by one (``transform_record``, no pandas) and
+    scored with a single ``predict_proba`` call.
+    """
+    features, estimator = model.named_steps["features"], model[-1]
+    classes = estimator.classes_
+
+    def predict_batch(records):
+        X = np.vstack([features.transform_record(record) for record in records])
+        proba = estimator.predict_proba(X)
+        best = proba.argmax(axis=1)
+        return [Prediction(label=classes[i], probability=float(p[i])) for i, p in zip(best, proba)]
+
+    return predict_batch
+
+
+def breakfast_batcher(model, max_batch_size=32, max_latency=0.003):
+    """``MicroBatcher`` of ``Prediction`` results for the exported breakfast classifier."""
+    return MicroBatcher(proba_predictor(model), max_batch_size=max_batch_size, max_latency=max_latency,
+                        name="breakfast")
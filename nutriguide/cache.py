@@ -0,0 +1,151 @@
+"""Process-wide LRU/TTL cache of recommendations keyed on the normalized profile.
+
+Streamlit reruns the whole script on every widget interaction, including tab
+switches, so the same profile is recommended again and again.  Only age,
+gender, weight, height, activity, goal and diet affect a recommendation; the
+cache key is those fields normalized (stripped, lower-cased strings, integer
+age, weight and height rounded to ``precision`` decimals) plus ``k``.  Misses
+are computed on the normalized profile, so every profile mapping to a key
+gets the same numbers, and the cached result is handed back with the caller's
+own ``Profile`` attached.
+
+Entries are tied to the checksum of the datasets the engine was built from:
+asking with an engine over different data clears the cache first.
+
+    cache = default_cache()
+    rec = cache.recommend(engine, profile)
+    cache.stats()  # CacheStats(hits=..., misses=..., ...)
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+
+from .engine import Profile
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self):
+        return (f"{self.hits:,} hits / {self.misses:,} misses ({self.hit_rate:.1%}), "
+                f"{self.size:,}/{self.maxsize:,} entries, {self.evictions:,} evicted, "
+                f"{self.expirations:,} expired, {self.invalidations:,} invalidations")
+
+
+def _text(value):
+    return str(value).strip().lower()
+
+
+def profile_key(profile, precision=1):
+    """The fields a recommendation depends on, in canonical form, as a hashable tuple."""
+    return (
+        int(profile.age),
+        _text(profile.gender),
+        round(float(profile.weight), precision),
+        round(float(profile.height), precision),
+        _text(profile.activity),
+        _text(profile.goal),
+        _text(profile.diet),
+    )
+
+
+def normalize_profile(profile, precision=1):
+    """``profile`` reduced to its ``profile_key`` fields."""
+    return Profile(*profile_key(profile, precision))
+
+
+class RecommendationCache:
+    """Bounded, thread-safe memo of ``engine.recommend`` results."""
+
+    def __init__(self, maxsize=4096, ttl=None, precision=1, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.precision = precision
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, Recommendation), oldest first
+        self._version = None
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._expirations = self._invalidations = 0
+
+    @staticmethod
+    def _data_version(engine):
+        # Engines built by hand without a checksum are told apart by identity
+        return getattr(engine.data, "checksum", None) or id(engine)
+
+    def recommend(self, engine, profile, k=3):
+        key = (profile_key(profile, self.precision), k)
+        version = self._data_version(engine)
+        now = self._clock()
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self._invalidations += 1
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at is None or now < expires_at:
+                    self._hits += 1
+                    self._entries.move_to_end(key)
+                    return replace(result, profile=profile)
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+
+        # Computed outside the lock; two sessions missing the same key both compute it
+        result = engine.recommend(Profile(*key[0]), k=k)
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = (None if self.ttl is None else now + self.ttl, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return replace(result, profile=profile)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                invalidations=self._invalidations,
+                size=len(self._entries),
+                maxsize=self.maxsize,
+            )
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """Process-wide cache shared by every session and caller."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = RecommendationCache()
+    return _default
@@ -0,0 +1,156 @@
+"""Nutrient comparison chart ("Your Needs" vs. "Recommended") for the apps.
+
+The apps used to build a new pyplot figure with seaborn on every rerun and
+never close it.  Two backends replace that:
+
+* ``NutrientChartRenderer`` draws the same grouped, annotated bar chart with
+  plain matplotlib on one ``Figure`` it owns (outside pyplot's figure
+  registry, so nothing accumulates) and memoizes the PNG bytes per
+  (actual, required) value tuple in a bounded LRU.  matplotlib is imported
+  when the first renderer is created.
+* ``nutrient_chart_spec`` returns a Vega-Lite spec for ``st.vega_lite_chart``,
+  drawn in the browser; the server never touches matplotlib.
+
+``CHART_BACKEND_ENV_VAR`` (``NUTRIGUIDE_CHART_BACKEND=vega``) selects the
+backend in the apps; ``python -m benchmarks.nutrient_chart`` compares render
+latency and memory.
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from .instrumentation import span
+
+CHART_BACKEND_ENV_VAR = "NUTRIGUIDE_CHART_BACKEND"
+BACKENDS = ("matplotlib", "vega")
+
+TITLE = "Your Nutrient Needs vs. Recommended Daily Allowance"
+X_LABEL = "Nutrients"
+Y_LABEL = "Amount (g or kcal)"
+SERIES = ("Your Needs", "Recommended")
+# seaborn's "pastel" palette, first two colors
+COLORS = ("#a1c9f4", "#ffb482")
+
+# The parts of seaborn's "whitegrid" style the chart relies on
+WHITEGRID = {
+    "axes.facecolor": "white",
+    "axes.edgecolor": ".8",
+    "axes.grid": True,
+    "axes.axisbelow": True,
+    "axes.labelcolor": ".15",
+    "grid.color": ".8",
+    "grid.linestyle": "-",
+    "text.color": ".15",
+    "xtick.color": ".15",
+    "ytick.color": ".15",
+    "xtick.bottom": False,
+    "ytick.left": False,
+    "patch.edgecolor": "w",
+    "patch.force_edgecolor": True,
+}
+
+
+def chart_backend():
+    backend = os.environ.get(CHART_BACKEND_ENV_VAR, "matplotlib").strip().lower()
+    return backend if backend in BACKENDS else "matplotlib"
+
+
+def chart_key(actual, required, precision=1):
+    """Hashable (nutrients, actual values, required values) tuple identifying a chart."""
+    return (
+        tuple(actual),
+        tuple(round(float(value), precision) for value in actual.values()),
+        tuple(round(float(required[name]), precision) for name in actual),
+    )
+
+
+class NutrientChartRenderer:
+    """Renders nutrient charts to PNG on one reused figure, memoizing the bytes per value tuple."""
+
+    def __init__(self, maxsize=256, figsize=(10, 6), dpi=100):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.maxsize = maxsize
+        self.dpi = dpi
+        self._figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self._figure)
+        self._images = OrderedDict()
+        self._lock = threading.Lock()  # one figure: renders are serialized
+        self.hits = self.misses = 0
+
+    def render(self, actual, required):
+        """PNG bytes of the chart for ``actual`` / ``required`` dicts (same keys)."""
+        key = chart_key(actual, required)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self.hits += 1
+                self._images.move_to_end(key)
+                return image
+            self.misses += 1
+            with span("chart_draw"):
+                image = self._draw(*key)
+            self._images[key] = image
+            if len(self._images) > self.maxsize:
+                self._images.popitem(last=False)
+            return image
+
+    def _draw(self, nutrients, needs, recommended):
+        import matplotlib
+
+        figure = self._figure
+        figure.clear()
+        with matplotlib.rc_context(WHITEGRID):
+            ax = figure.add_subplot()
+            positions = range(len(nutrients))
+            for offset, label, values, color in ((-0.2, SERIES[0], needs, COLORS[0]),
+                                                 (0.2, SERIES[1], recommended, COLORS[1])):
+                bars = ax.bar([x + offset for x in positions], values, width=0.4, label=label, color=color)
+                # Value labels on top of bars
+                for bar in bars:
+                    ax.annotate(f"{bar.get_height():.0f}",
+                                (bar.get_x() + bar.get_width() / 2., bar.get_height()),
+                                ha="center", va="center", xytext=(0, 10),
+                                textcoords="offset points", fontsize=10)
+            ax.set_xticks(list(positions), nutrients)
+            ax.set_title(TITLE, fontsize=16, pad=20)
+            ax.set_xlabel(X_LABEL, fontsize=12)
+            ax.set_ylabel(Y_LABEL, fontsize=12)
+            ax.legend(title="", fontsize=10)
+            buffer = io.BytesIO()
+            figure.savefig(buffer, format="png", dpi=self.dpi)
+        return buffer.getvalue()
+
+    def __len__(self):
+        return len(self._images)
+
+
+def nutrient_chart_spec(actual, required):
+    """Vega-Lite spec (data inlined) of the same grouped, labelled bar chart."""
+    nutrients, needs, recommended = chart_key(actual, required)
+    values = [{"Nutrient": name, "Type": series, "Amount": amount}
+              for series, amounts in zip(SERIES, (needs, recommended))
+              for name, amount in zip(nutrients, amounts)]
+    encoding = {
+        "x": {"field": "Nutrient", "type": "nominal", "sort": list(nutrients),
+              "title": X_LABEL, "axis": {"labelAngle": 0}},
+        "xOffset": {"field": "Type", "sort": list(SERIES)},
+        "y": {"field": "Amount", "type": "quantitative", "title": Y_LABEL},
+    }
+    return {
+        "title": TITLE,
+        "data": {"values": values},
+        "height": 360,
+        "encoding": encoding,
+        "layer": [
+            {"mark": {"type": "bar"},
+             "encoding": {"color": {"field": "Type", "type": "nominal", "title": None,
+                                    "sort": list(SERIES),
+                                    "scale": {"domain": list(SERIES), "range": list(COLORS)},
+                                    "legend": {"orient": "top-right"}}}},
+            {"mark": {"type": "text", "dy": -8},
+             "encoding": {"text": {"field": "Amount", "type": "quantitative", "format": ".0f"}}},
+        ],
+    }
@@ -0,0 +1,249 @@
+"""Compact array-of-nodes export of the random forests, with a NumPy predictor.
+
+A fitted scikit-learn forest carries per-node impurity, sample counts and
+float64 class counts for every node of every tree.  ``CompactForest`` keeps
+only what prediction needs, for all trees in flat arrays:
+
+* ``feature`` (int16), ``threshold`` (float32) and ``left`` / ``right``
+  child ids (int32) of each split node,
+* one float32 value row per leaf (class probabilities or the regression value).
+
+Leaves are numbered before split nodes: a leaf's node id is its row in
+``value``, split node ``i`` is entry ``i - n_leaves`` of the split arrays, and
+"is a leaf" is a single comparison.  ``predict`` walks every
+tree for every row at once, one vectorized step per level, dropping (row,
+tree) pairs as they reach a leaf.  Trees can be cut at ``max_depth`` (deeper subtrees collapse into a
+leaf holding the node's class distribution) and limited to the first
+``n_estimators`` trees.
+
+``compact_model`` converts a bare forest, or a ``Pipeline`` whose last step is a
+forest into a ``CompactPipeline`` keeping the fitted feature steps; the result
+is saved with joblib like the originals, so ``ModelRegistry``, the batch
+scorer and ``predict_record`` serve it unchanged.
+
+    python -m nutriguide.compact model/meal_classifier_model.pkl meal_classifier_compact.pkl --max-depth 12
+"""
+import argparse
+import os
+
+import numpy as np
+
+
+def _node_depths(tree):
+    """Depth of every node of a fitted sklearn tree (children always follow their parent)."""
+    depth = np.zeros(tree.node_count, dtype=np.int32)
+    frontier = np.array([0])
+    while len(frontier):
+        frontier = frontier[tree.children_left[frontier] != -1]
+        children = np.concatenate([tree.children_left[frontier], tree.children_right[frontier]])
+        depth[children] = np.concatenate([depth[frontier], depth[frontier]]) + 1
+        frontier = children
+    return depth
+
+
+class CompactForest:
+    """Flat float32 forest answering ``predict`` / ``predict_proba`` with NumPy only."""
+
+    def __init__(self, feature, threshold, left, right, value, roots, depth, n_features, classes=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.n_features_in_ = n_features
+        if classes is not None:
+            self.classes_ = classes
+
+    @property
+    def is_classifier(self):
+        return hasattr(self, "classes_")
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def node_count(self):
+        return len(self.value) + len(self.left)
+
+    @property
+    def nbytes(self):
+        arrays = (self.feature, self.threshold, self.left, self.right, self.value, self.roots)
+        return sum(a.nbytes for a in arrays)
+
+    @classmethod
+    def from_forest(cls, forest, max_depth=None, n_estimators=None):
+        """Convert a fitted RandomForest{Classifier,Regressor} (or any bagged tree ensemble)."""
+        trees = [estimator.tree_ for estimator in forest.estimators_[:n_estimators]]
+        classes = getattr(forest, "classes_", None)
+
+        # Per tree: which nodes survive the depth cut, and which of those are leaves
+        kept, is_leaf, depth = [], [], 0
+        for tree in trees:
+            depths = _node_depths(tree)
+            keep = depths <= (max_depth if max_depth is not None else depths.max())
+            leaf = keep & ((tree.children_left == -1) | (depths == max_depth))
+            kept.append(keep)
+            is_leaf.append(leaf)
+            depth = max(depth, int(depths[leaf].max()))
+        leaf_counts = [int(leaf.sum()) for leaf in is_leaf]
+        split_counts = [int((keep & ~leaf).sum()) for keep, leaf in zip(kept, is_leaf)]
+        n_leaves = sum(leaf_counts)
+        n_nodes = n_leaves + sum(split_counts)
+        n_outputs = len(classes) if classes is not None else 1
+
+        n_splits = n_nodes - n_leaves
+        feature = np.empty(n_splits, dtype=np.int16)
+        threshold = np.empty(n_splits, dtype=np.float32)
+        left = np.empty(n_splits, dtype=np.int32)
+        right = np.empty(n_splits, dtype=np.int32)
+        value = np.empty((n_leaves, n_outputs), dtype=np.float32)
+        roots = np.empty(len(trees), dtype=np.int32)
+
+        leaf_start, split_start = 0, n_leaves
+        for t, tree in enumerate(trees):
+            leaf, split = is_leaf[t], kept[t] & ~is_leaf[t]
+            ids = np.full(tree.node_count, -1, dtype=np.int32)
+            ids[leaf] = np.arange(leaf_start, leaf_start + leaf_counts[t])
+            ids[split] = np.arange(split_start, split_start + split_counts[t])
+            roots[t] = ids[0]
+
+            rows = tree.value[leaf, 0]
+            # Classifier trees hold (weighted) class counts or fractions; normalize either way
+            value[ids[leaf]] = rows / rows.sum(axis=1, keepdims=True) if classes is not None else rows
+
+            nodes = ids[split] - n_leaves
+            feature[nodes] = tree.feature[split]
+            # Largest float32 <= the float64 threshold keeps x <= t exact for float32 inputs
+            t32 = tree.threshold[split].astype(np.float32)
+            rounded_up = t32 > tree.threshold[split]
+            t32[rounded_up] = np.nextafter(t32[rounded_up], np.float32(-np.inf))
+            threshold[nodes] = t32
+            left[nodes] = ids[tree.children_left[split]]
+            right[nodes] = ids[tree.children_right[split]]
+
+            leaf_start += leaf_counts[t]
+            split_start += split_counts[t]
+
+        return cls(feature, threshold, left, right, value, roots, depth, forest.n_features_in_, classes)
+
+    def _leaves(self, X):
+        """Leaf id reached in every tree by every row: shape (n_rows, n_estimators)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        flat = X.ravel()
+        n_trees, n_leaves = len(self.roots), len(self.value)
+        nodes = np.tile(self.roots, len(X))
+        # Walk only the (row, tree) pairs still on a split node; leaves have ids < n_leaves
+        active = np.flatnonzero(nodes >= n_leaves)
+        offsets = (active // n_trees) * X.shape[1]
+        while len(active):
+            current = nodes.take(active) - n_leaves
+            go_left = flat.take(offsets + self.feature.take(current)) <= self.threshold.take(current)
+            current = np.where(go_left, self.left.take(current), self.right.take(current))
+            nodes[active] = current
+            split = current >= n_leaves
+            active, offsets = active[split], offsets[split]
+        return nodes.reshape(len(X), n_trees)
+
+    def _mean_value(self, X):
+        return self.value.take(self._leaves(X), axis=0).mean(axis=1)
+
+    def predict_proba(self, X):
+        if not self.is_classifier:
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self._mean_value(X)
+
+    def predict(self, X):
+        mean = self._mean_value(X)
+        if self.is_classifier:
+            return self.classes_[mean.argmax(axis=1)]
+        return mean[:, 0]
+
+
+
+class CompactPipeline:
+    """Prediction-only stand-in for a fitted ``Pipeline`` ending in a ``CompactForest``.
+
+    Exposes the ``named_steps`` / indexing surface that ``predict_record`` and
+    the batch scorer rely on, without sklearn's fitted-estimator checks.
+    """
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    @property
+    def named_steps(self):
+        return dict(self.steps)
+
+    def __getitem__(self, index):
+        return self.steps[index][1]
+
+    def _transform(self, X):
+        for _, step in self.steps[:-1]:
+            X = step.transform(X)
+        return X
+
+    def predict(self, X):
+        return self[-1].predict(self._transform(X))
+
+    def predict_proba(self, X):
+        return self[-1].predict_proba(self._transform(X))
+
+    @property
+    def classes_(self):
+        return self[-1].classes_
+
+
+def compact_model(model, max_depth=None, n_estimators=None):
+    """Compact copy of a forest, or of a Pipeline with the forest as its last step."""
+    if hasattr(model, "steps"):
+        name, forest = model.steps[-1]
+        return CompactPipeline(model.steps[:-1] + [(name, compact_model(forest, max_depth, n_estimators))])
+    return CompactForest.from_forest(model, max_depth=max_depth, n_estimators=n_estimators)
+
+
+def parity_report(original, compact, X, y=None):
+    """Agreement between the original and compacted model on ``X`` (and scores on ``y``)."""
+    expected, actual = original.predict(X), compact.predict(X)
+    report = {"rows": len(expected)}
+    if hasattr(original, "classes_"):
+        report["agreement"] = float(np.mean(expected == actual))
+        report["max_proba_diff"] = float(np.abs(original.predict_proba(X) - compact.predict_proba(X)).max())
+        if y is not None:
+            report["original_accuracy"] = float(np.mean(expected == np.asarray(y)))
+            report["compact_accuracy"] = float(np.mean(actual == np.asarray(y)))
+    else:
+        report["max_abs_diff"] = float(np.abs(expected - actual).max())
+        if y is not None:
+            y = np.asarray(y, dtype=np.float64)
+            total = ((y - y.mean()) ** 2).sum()
+            report["original_r2"] = float(1 - ((y - expected) ** 2).sum() / total)
+            report["compact_r2"] = float(1 - ((y - actual) ** 2).sum() / total)
+    return report
+
+
+def main():
+    import joblib
+
+    # Pickle classes from nutriguide.compact, not from __main__ under ``python -m``
+    from nutriguide.compact import compact_model
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model", help="joblib forest or Pipeline ending in a forest")
+    parser.add_argument("output", help="compact joblib artifact to write")
+    parser.add_argument("--max-depth", type=int, default=None, help="collapse subtrees below this depth")
+    parser.add_argument("--n-estimators", type=int, default=None, help="keep only the first N trees")
+    args = parser.parse_args()
+
+    original = joblib.load(args.model)
+    compact = compact_model(original, max_depth=args.max_depth, n_estimators=args.n_estimators)
+    joblib.dump(compact, args.output)
+    forest = compact[-1] if hasattr(compact, "steps") else compact
+    print(f"{forest.n_estimators} trees, {forest.node_count:,} nodes, depth {forest.depth}")
+    print(f"{os.path.getsize(args.model):,} bytes -> {os.path.getsize(args.output):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
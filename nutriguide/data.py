@@ -0,0 +1,250 @@
+"""Compact in-memory representation of the three CSV datasets.
+
+``load_datasets`` reads the CSVs with explicit, downcast dtypes and stores the
+repeated strings (Gender, Diet_Preference, Disease, ...) as ``category``.  The
+meal descriptions of Meal_Suggestions.csv -- 5,000 rows but only a handful of
+distinct (Breakfast, Lunch, Dinner, Snacks) combinations -- are interned into
+a small ``meal_combos`` table that ``meals`` references through an integer
+``Meal_ID`` column.
+
+``python -m nutriguide.data convert`` writes the loaded frames to a typed,
+columnar ``datasets.npz`` stamped with a checksum of the source CSVs.
+``load_datasets`` prefers that binary copy while the checksum still matches
+and falls back to parsing the CSVs otherwise.  ``python -m nutriguide.data
+report`` compares memory against a default read.
+"""
+import argparse
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .diets import MEAL_COLUMNS, classify_meals
+from .paths import DATASETS_DIR
+from .resources import format_bytes
+
+logger = logging.getLogger(__name__)
+
+FOODS_FILE = "Final_Data_Set.csv"
+MEALS_FILE = "Meal_Suggestions.csv"
+NUTRIENTS_FILE = "Micro_and_Macro_Nutrients.csv"
+SOURCE_FILES = (FOODS_FILE, MEALS_FILE, NUTRIENTS_FILE)
+BINARY_FILE = "datasets.npz"
+
+FOODS_DTYPES = {
+    "Age": "int8",
+    "Gender": "category",
+    "Weight_kg": "int16",
+    "Height_cm": "int16",
+    "BMI": "float32",
+    "Diet_Preference": "category",
+    "Activity_Level": "category",
+    "Weekly_Activity_Days": "int8",
+    "Disease": "category",
+    "Food_Allergies": "category",
+    "Health_Goal": "category",
+    "Daily_Calories": "int16",
+}
+
+MEALS_DTYPES = {
+    "Daily_Calories": "int16",
+    "Breakfast": "category",
+    "Lunch": "category",
+    "Dinner": "category",
+    "Snacks": "category",
+    "Water_Intake_L": "float32",
+}
+
+NUTRIENTS_DTYPES = {
+    "Daily_Calories": "int16",
+    "Protein_g": "int16",
+    "Carbs_g": "int16",
+    "Fat_g": "int16",
+    "Fiber_g": "int16",
+    "Sugar_g": "int16",
+    "Vitamin_A_mcg": "int16",
+    "Vitamin_C_mg": "int16",
+    "Vitamin_D_mcg": "int16",
+    "Calcium_mg": "int16",
+    "Iron_mg": "float32",
+    "Potassium_mg": "int16",
+    "Magnesium_mg": "int16",
+    "Zinc_mg": "int16",
+}
+
+
+@dataclass
+class Datasets:
+    foods: pd.DataFrame
+    meals: pd.DataFrame
+    meal_combos: pd.DataFrame
+    nutrients: pd.DataFrame
+    checksum: str = None  # source_checksum() of the CSVs these frames came from
+
+    def meal_plans(self, rows):
+        """``meals`` rows with their Breakfast/Lunch/Dinner/Snacks text joined back in."""
+        return rows.join(self.meal_combos[list(MEAL_COLUMNS)], on="Meal_ID")
+
+    def frames(self):
+        """(foods, meals, nutrients) with the original CSV columns, for training code."""
+        meals = self.meal_plans(self.meals)[list(MEALS_DTYPES)]
+        return self.foods, meals, self.nutrients
+
+    def memory_usage(self):
+        """Deep memory usage in bytes per frame."""
+        return {name: int(getattr(self, name).memory_usage(deep=True).sum())
+                for name in ("foods", "meals", "meal_combos", "nutrients")}
+
+
+def intern_meals(meals_df):
+    """Split meal plans into (rows referencing ``Meal_ID``, distinct meal combinations)."""
+    columns = list(MEAL_COLUMNS)
+    # Groups are numbered in order of first appearance, matching drop_duplicates
+    codes = meals_df.groupby(columns, sort=False, observed=True, dropna=False).ngroup().to_numpy()
+    combos = meals_df[columns].drop_duplicates().reset_index(drop=True)
+    meal_combos = classify_meals(combos.astype(str))
+    meal_combos.index.name = "Meal_ID"
+    id_dtype = "int8" if len(meal_combos) < 128 else "int32"
+    meals = meals_df.drop(columns=columns)
+    meals.insert(1, "Meal_ID", codes.astype(id_dtype))
+    # Per-row copy of the diet bits so diet masks stay a single array test
+    meals["Ingredient_Bits"] = meal_combos["Ingredient_Bits"].to_numpy()[codes]
+    return meals, meal_combos
+
+
+def source_checksum(data_dir=DATASETS_DIR):
+    """SHA-256 over the three source CSVs."""
+    digest = hashlib.sha256()
+    for name in SOURCE_FILES:
+        digest.update(name.encode())
+        digest.update((Path(data_dir) / name).read_bytes())
+    return digest.hexdigest()
+
+
+def load_datasets(data_dir=DATASETS_DIR, prefer_binary=True):
+    """Load the datasets, from the binary copy when it matches the CSVs."""
+    data_dir = Path(data_dir)
+    checksum = source_checksum(data_dir)
+    binary = data_dir / BINARY_FILE
+    if prefer_binary and binary.exists():
+        data = read_binary(binary, expected_checksum=checksum)
+        if data is not None:
+            return data
+        logger.warning("%s is stale; parsing CSVs (rerun `python -m nutriguide.data convert`)", binary)
+    data = read_csvs(data_dir)
+    data.checksum = checksum
+    return data
+
+
+def read_csvs(data_dir=DATASETS_DIR):
+    data_dir = Path(data_dir)
+    foods = pd.read_csv(data_dir / FOODS_FILE, dtype=FOODS_DTYPES)
+    meals_raw = pd.read_csv(data_dir / MEALS_FILE, dtype=MEALS_DTYPES)
+    nutrients = pd.read_csv(data_dir / NUTRIENTS_FILE, dtype=NUTRIENTS_DTYPES)
+    meals, meal_combos = intern_meals(meals_raw)
+    data = Datasets(foods=foods, meals=meals, meal_combos=meal_combos, nutrients=nutrients)
+    logger.info("Loaded datasets: %s", {k: format_bytes(v) for k, v in data.memory_usage().items()})
+    return data
+
+
+def _frame_arrays(name, df):
+    arrays = {f"{name}.columns": np.array(df.columns, dtype=str)}
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            arrays[f"{name}/{column}"] = values.cat.codes.to_numpy()
+            arrays[f"{name}/{column}.categories"] = np.array(values.cat.categories, dtype=str)
+        elif values.dtype.kind in "OU" or pd.api.types.is_string_dtype(values.dtype):
+            arrays[f"{name}/{column}"] = np.array(values, dtype=str)
+        else:
+            arrays[f"{name}/{column}"] = values.to_numpy()
+    return arrays
+
+
+def _frame_from_arrays(name, arrays):
+    columns = {}
+    for column in arrays[f"{name}.columns"]:
+        values = arrays[f"{name}/{column}"]
+        categories = f"{name}/{column}.categories"
+        if categories in arrays:
+            columns[column] = pd.Categorical.from_codes(values, categories=arrays[categories])
+        elif values.dtype.kind == "U":
+            columns[column] = values.astype(object)
+        else:
+            columns[column] = values
+    return pd.DataFrame(columns)
+
+
+def write_binary(data, path, checksum):
+    """Write ``data`` column by column to an uncompressed ``.npz`` file."""
+    arrays = {"checksum": np.array(checksum)}
+    for name in ("foods", "meals", "meal_combos", "nutrients"):
+        arrays.update(_frame_arrays(name, getattr(data, name)))
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    # Readers never see a half-written file
+    os.replace(tmp, path)
+
+
+def read_binary(path, expected_checksum=None):
+    """Datasets from ``path``, or None when its checksum differs from ``expected_checksum``."""
+    with np.load(path, allow_pickle=False) as npz:
+        if expected_checksum is not None and str(npz["checksum"]) != expected_checksum:
+            return None
+        arrays = {key: npz[key] for key in npz.files}
+    checksum = str(arrays.pop("checksum"))
+    frames = {name: _frame_from_arrays(name, arrays) for name in ("foods", "meals", "meal_combos", "nutrients")}
+    frames["meal_combos"].index.name = "Meal_ID"
+    return Datasets(**frames, checksum=checksum)
+
+
+def convert_datasets(data_dir=DATASETS_DIR):
+    """Parse the CSVs once and write the binary copy next to them."""
+    data_dir = Path(data_dir)
+    path = data_dir / BINARY_FILE
+    write_binary(read_csvs(data_dir), path, source_checksum(data_dir))
+    return path
+
+
+def memory_report(data_dir=DATASETS_DIR):
+    """Deep memory usage of a default ``pd.read_csv`` vs. ``load_datasets``."""
+    data_dir = Path(data_dir)
+    before = {
+        "foods": pd.read_csv(data_dir / FOODS_FILE),
+        "meals": pd.read_csv(data_dir / MEALS_FILE),
+        "nutrients": pd.read_csv(data_dir / NUTRIENTS_FILE),
+    }
+    before = {name: int(df.memory_usage(deep=True).sum()) for name, df in before.items()}
+    after = read_csvs(data_dir).memory_usage()
+    after["meals"] += after.pop("meal_combos")
+    return before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dataset conversion and memory report.")
+    parser.add_argument("command", choices=["convert", "report"])
+    parser.add_argument("--data-dir", default=str(DATASETS_DIR))
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        path = convert_datasets(args.data_dir)
+        print(f"Wrote {path} ({format_bytes(path.stat().st_size)})")
+        return
+
+    before, after = memory_report(args.data_dir)
+    print(f"{'dataset':<12}{'default':>12}{'compact':>12}")
+    for name in before:
+        print(f"{name:<12}{format_bytes(before[name]):>12}{format_bytes(after[name]):>12}")
+    total_before, total_after = sum(before.values()), sum(after.values())
+    print(f"{'total':<12}{format_bytes(total_before):>12}{format_bytes(total_after):>12}"
+          f"  ({total_before / total_after:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Diet and allergen compatibility of meal plans, classified once at load time.
+
+Meal descriptions are matched against keyword groups (egg, meat, fish, ...),
+one bit per group.  Matching runs once per distinct meal string -- the 5,000
+rows of Meal_Suggestions.csv only hold a handful -- and the bits of the four
+meal columns are OR-ed into a single ``Ingredient_Bits`` column.  Filtering a
+diet is then one vectorized mask test against that column.
+
+The rules below are plain data: to support a new diet or allergen, add its
+keyword group and list the groups it excludes.
+"""
+import numpy as np
+
+MEAL_COLUMNS = ("Breakfast", "Lunch", "Dinner", "Snacks")
+
+# Ingredient groups detected in meal descriptions (case-insensitive substrings)
+INGREDIENT_KEYWORDS = {
+    "egg": ("egg",),
+    "meat": ("meat", "beef", "pork", "lamb"),
+    "poultry": ("chicken", "turkey"),
+    "fish": ("fish", "salmon", "tuna"),
+    "shellfish": ("shrimp", "prawn", "crab", "lobster", "shellfish"),
+    "dairy": ("dairy", "milk", "cheese", "yogurt"),
+    "wheat": ("wheat", "toast", "bread", "wrap", "pasta"),
+    "soy": ("soy", "tofu"),
+    "peanut": ("peanut",),
+    "tree_nut": ("nuts", "almond", "cashew", "walnut"),
+}
+
+INGREDIENT_BITS = {group: 1 << i for i, group in enumerate(INGREDIENT_KEYWORDS)}
+
+# Ingredient groups each diet preference excludes ("non-veg" excludes nothing)
+DIET_EXCLUSIONS = {
+    "veg": ("egg", "meat", "poultry", "fish", "shellfish"),
+    "vegan": ("egg", "meat", "poultry", "fish", "shellfish", "dairy"),
+    "pescatarian": ("meat", "poultry"),
+}
+
+# Diet_Preference values of Final_Data_Set.csv mapped to the diets above
+DIET_PREFERENCES = {
+    "vegetarian": "veg",
+    "mediterranean-vegetarian": "veg",
+    "vegan": "vegan",
+    "raw vegan": "vegan",
+    "plant-based": "vegan",
+    "pescatarian": "pescatarian",
+}
+
+# Food_Allergies values of Final_Data_Set.csv mapped to ingredient groups
+ALLERGEN_GROUPS = {
+    "milk": ("dairy",),
+    "eggs": ("egg",),
+    "fish": ("fish",),
+    "shellfish": ("shellfish",),
+    "peanuts": ("peanut",),
+    "tree nuts": ("tree_nut",),
+    "soy": ("soy",),
+    "wheat": ("wheat",),
+}
+
+
+def groups_mask(groups):
+    """Bitmask with the bits of the given ingredient groups set."""
+    mask = 0
+    for group in groups:
+        mask |= INGREDIENT_BITS[group]
+    return mask
+
+
+def diet_mask(diet):
+    """Bitmask of the groups ``diet`` excludes; the name is matched case-insensitively."""
+    return groups_mask(DIET_EXCLUSIONS.get(str(diet).strip().lower(), ()))
+
+
+def allergy_mask(allergies):
+    """Bitmask for a comma-separated allergy string such as ``"Milk, Peanuts"``."""
+    mask = 0
+    for allergy in str(allergies or "").split(","):
+        mask |= groups_mask(ALLERGEN_GROUPS.get(allergy.strip().lower(), ()))
+    return mask
+
+
+def ingredient_bits(text):
+    """Ingredient-group bits found in one meal description."""
+    text = str(text).lower()
+    bits = 0
+    for group, keywords in INGREDIENT_KEYWORDS.items():
+        if any(keyword in text for keyword in keywords):
+            bits |= INGREDIENT_BITS[group]
+    return bits
+
+
+def meal_bits(meals_df):
+    """OR of the ingredient bits of every meal column, one value per row."""
+    import pandas as pd
+
+    bits = np.zeros(len(meals_df), dtype=np.uint16)
+    for column in MEAL_COLUMNS:
+        codes, uniques = pd.factorize(meals_df[column])
+        # Trailing 0 catches code -1 (missing meal) via lut[-1]
+        lut = np.array([ingredient_bits(u) for u in uniques] + [0], dtype=np.uint16)
+        bits |= lut[codes]
+    return bits
+
+
+def classify_meals(meals_df):
+    """Copy of ``meals_df`` with ``Ingredient_Bits`` and ``is_<diet>`` columns."""
+    bits = meal_bits(meals_df)
+    flags = {f"is_{diet.replace('-', '_')}": (bits & diet_mask(diet)) == 0 for diet in DIET_EXCLUSIONS}
+    return meals_df.assign(Ingredient_Bits=bits, **flags)
+
+
+def compatible(meals_df, diet, allergies=None):
+    """Boolean mask of rows of a classified frame that suit the diet and allergies."""
+    bits = meals_df["Ingredient_Bits"].to_numpy()
+    return (bits & (diet_mask(diet) | allergy_mask(allergies))) == 0
+
+
+def filter_meals(meals_df, diet, allergies=None):
+    return meals_df[compatible(meals_df, diet, allergies)]
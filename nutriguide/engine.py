@@ -0,0 +1,188 @@
+"""Headless recommendation engine behind the Streamlit apps.
+
+``recommend(profile)`` computes BMR, TDEE and macronutrient needs, picks the
+meal plans closest to the TDEE among the diet-compatible ones and the nutrient
+targets row closest to it.  Nothing here imports Streamlit or loads a model,
+and pandas is only imported when the datasets are first loaded, so the module
+can be used from services, batch jobs and benchmarks.
+
+    from nutriguide import Profile, recommend
+    rec = recommend(Profile(age=30, gender="female", weight=60, height=165))
+"""
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from .diets import MEAL_COLUMNS, diet_mask
+from .index import CalorieIndex
+from .instrumentation import span
+from .nutrition import calculate_bmr, calculate_macronutrients, calculate_tdee
+
+
+@dataclass(frozen=True)
+class Profile:
+    age: int
+    gender: str
+    weight: float
+    height: float
+    activity: str = "sedentary"
+    goal: str = "maintain"
+    diet: str = "non-veg"
+    weekly_activity_days: int = None
+    disease: str = ""
+    food_allergies: str = ""
+
+
+@dataclass(frozen=True)
+class MealPlan:
+    breakfast: str
+    lunch: str
+    dinner: str
+    snacks: str
+    water_intake_l: float
+    daily_calories: int
+
+
+@dataclass(frozen=True)
+class Recommendation:
+    profile: Profile
+    bmr: float
+    tdee: float
+    protein: float  # g per kg of body weight
+    fat: float  # g per day
+    carbs: float  # g per day
+    meal_plans: tuple  # MealPlan, nearest to the TDEE first
+    nutrients: dict  # Micro_and_Macro_Nutrients row closest to the TDEE
+
+    @property
+    def meal_plan(self):
+        return self.meal_plans[0] if self.meal_plans else None
+
+    def actual_nutrients(self):
+        """Needs derived from the profile, in kcal and grams per day."""
+        return {
+            "Calories": self.tdee,
+            "Protein": self.profile.weight * self.protein,
+            "Fat": self.fat,
+            "Carbs": self.carbs,
+        }
+
+    def recommended_nutrients(self):
+        """Targets of the closest nutrient row, in kcal and grams per day."""
+        row = self.nutrients
+        return {
+            "Calories": row["Daily_Calories"],
+            "Protein": row["Protein_g"],
+            "Fat": row["Fat_g"],
+            "Carbs": (row["Daily_Calories"] - (row["Protein_g"] * 4 + row["Fat_g"] * 9)) / 4,
+        }
+
+
+class RecommendationEngine:
+    """Answers ``recommend`` queries from arrays extracted once from ``Datasets``."""
+
+    def __init__(self, data):
+        self.data = data
+        meals = data.meals
+        self._meal_calories = meals["Daily_Calories"].to_numpy()
+        self._meal_ids = meals["Meal_ID"].to_numpy()
+        self._meal_bits = meals["Ingredient_Bits"].to_numpy()
+        self._water = meals["Water_Intake_L"].to_numpy()
+        self._combos = [tuple(map(str, row)) for row in
+                        data.meal_combos[list(MEAL_COLUMNS)].itertuples(index=False)]
+        self._nutrient_columns = list(data.nutrients.columns)
+        self._nutrient_values = data.nutrients.to_numpy(dtype=np.float64)
+        self._nutrient_index = CalorieIndex(self._nutrient_values[:, self._nutrient_columns.index("Daily_Calories")])
+        self._meal_indexes = {}
+        self._lock = threading.Lock()
+
+    def _meal_index(self, mask):
+        """(meal row numbers, calorie index over them) for rows free of ``mask`` bits."""
+        entry = self._meal_indexes.get(mask)
+        if entry is None:
+            with self._lock:
+                entry = self._meal_indexes.get(mask)
+                if entry is None:
+                    rows = np.flatnonzero((self._meal_bits & mask) == 0)
+                    entry = (rows, CalorieIndex(self._meal_calories[rows]))
+                    self._meal_indexes[mask] = entry
+        return entry
+
+    def meal_plans(self, tdee, diet, k=3):
+        rows, index = self._meal_index(diet_mask(diet))
+        return self.meal_plans_at(rows[index.nearest(tdee, k=k)])
+
+    def meal_plans_at(self, rows):
+        """``MealPlan`` of each Meal_Suggestions row number in ``rows``."""
+        plans = []
+        for row in rows:
+            breakfast, lunch, dinner, snacks = self._combos[self._meal_ids[row]]
+            plans.append(MealPlan(
+                breakfast=breakfast,
+                lunch=lunch,
+                dinner=dinner,
+                snacks=snacks,
+                water_intake_l=round(float(self._water[row]), 2),
+                daily_calories=int(self._meal_calories[row]),
+            ))
+        return tuple(plans)
+
+    def nearest_meal_rows(self, tdee, masks):
+        """Closest meal row per TDEE value, each restricted by its diet bitmask (-1 if none)."""
+        tdee, masks = np.asarray(tdee, dtype=np.float64), np.asarray(masks)
+        out = np.empty(len(tdee), dtype=np.intp)
+        for mask in np.unique(masks):
+            selected = masks == mask
+            rows, index = self._meal_index(int(mask))
+            out[selected] = rows[index.nearest_many(tdee[selected])] if len(rows) else -1
+        return out
+
+    def nearest_nutrient_rows(self, tdee):
+        return self._nutrient_index.nearest_many(tdee)
+
+    def nutrient_targets(self, tdee):
+        return self.nutrient_targets_at(self._nutrient_index.nearest(tdee, k=1)[0])
+
+    def nutrient_targets_at(self, row):
+        """Micro_and_Macro_Nutrients row ``row`` as a dict of floats."""
+        return {column: float(value) for column, value in zip(self._nutrient_columns, self._nutrient_values[row])}
+
+    def recommend(self, profile, k=3):
+        with span("nutrition"):
+            bmr = calculate_bmr(profile.weight, profile.height, profile.age, profile.gender)
+            tdee = calculate_tdee(bmr, profile.activity)
+            protein, fat, carbs = calculate_macronutrients(tdee, profile.goal)
+        with span("meal_lookup"):
+            meal_plans = self.meal_plans(tdee, profile.diet, k=k)
+        with span("nutrient_lookup"):
+            nutrients = self.nutrient_targets(tdee)
+        return Recommendation(
+            profile=profile,
+            bmr=bmr,
+            tdee=tdee,
+            protein=protein,
+            fat=fat,
+            carbs=carbs,
+            meal_plans=meal_plans,
+            nutrients=nutrients,
+        )
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_engine():
+    """Process-wide engine over the shipped datasets, loaded on first use."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                from .data import load_datasets
+                _default = RecommendationEngine(load_datasets())
+    return _default
+
+
+def recommend(profile, k=3):
+    return default_engine().recommend(profile, k=k)
@@ -0,0 +1,210 @@
+"""Classifier features for member profiles, as engineered in the training notebooks.
+
+``training.ipynb`` / ``best_model.ipynb`` build the meal classifier's inputs by
+joining each profile with its meal plan and nutrient row, adding BMI_Category,
+Adjusted_Calories, Age_Group and Activity_Frequency, one-hot encoding the
+categoricals, standard-scaling the numeric columns and keeping the SelectKBest
+columns.
+
+``FeaturePipeline`` is that whole transformation as one fitted scikit-learn
+transformer.  Training puts it in front of the classifier in a ``Pipeline``
+that is pickled as one artifact, so serving reproduces the training features
+exactly.  Its column schema is fixed at fit time: batches are encoded with
+array comparisons against the learned levels (no ``get_dummies``), and
+``transform_record`` encodes a single profile in plain Python.
+"""
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+PROFILE_CATEGORICALS = ["Gender", "Diet_Preference", "Activity_Level", "Disease", "Food_Allergies", "Health_Goal"]
+ENGINEERED_CATEGORICALS = ["BMI_Category", "Age_Group", "Activity_Frequency"]
+SCALED_COLUMNS = ["Age", "Weight_kg", "Height_cm", "BMI", "Daily_Calories", "Protein_g", "Carbs_g", "Fat_g"]
+
+BMI_BINS = [-np.inf, 18.5, 25, 30, np.inf]
+BMI_LABELS = ["Underweight", "Normal", "Overweight", "Obese"]
+AGE_BINS = [18, 30, 45, 60, 70]
+AGE_LABELS = ["18-29", "30-44", "45-59", "60+"]
+ACTIVITY_BINS = [-1, 2, 4, 7]
+ACTIVITY_LABELS = ["Low", "Medium", "High"]
+# Adjusted_Calories multiplier per Health_Goal (others keep Daily_Calories)
+CALORIE_ADJUSTMENTS = {"Weight Loss": 0.9, "Muscle Gain": 1.1}
+
+
+def attach_targets(profiles, engine):
+    """Profiles joined with the meal plan and nutrient row closest to their Daily_Calories."""
+    calories = profiles["Daily_Calories"].to_numpy()
+    meal_rows = engine.nearest_meal_rows(calories, np.zeros(len(profiles), dtype=np.uint16))
+    nutrient_rows = engine.nearest_nutrient_rows(calories)
+    meals = engine.data.meals.iloc[meal_rows][["Water_Intake_L"]]
+    nutrients = engine.data.nutrients.iloc[nutrient_rows].drop(columns="Daily_Calories")
+    return pd.concat([profiles.reset_index(drop=True),
+                      meals.reset_index(drop=True),
+                      nutrients.reset_index(drop=True)], axis=1)
+
+
+def _bmi_codes(bmi):
+    # [-inf, 18.5) Underweight, [18.5, 25) Normal, [25, 30) Overweight, else Obese
+    return np.searchsorted(BMI_BINS[1:-1], bmi, side="right")
+
+
+def _bin_codes(values, bins):
+    # pd.cut semantics: (b0, b1] -> 0, ..., outside the bins -> -1
+    codes = np.searchsorted(bins, values, side="left") - 1
+    return np.where((codes >= 0) & (codes < len(bins) - 1), codes, -1)
+
+
+def _bin_code(value, bins):
+    code = bisect_left(bins, value) - 1
+    return code if 0 <= code < len(bins) - 1 else -1
+
+
+def _adjusted_calories(calories, goals):
+    conditions = [goals == goal for goal in CALORIE_ADJUSTMENTS]
+    return calories * np.select(conditions, list(CALORIE_ADJUSTMENTS.values()), 1.0)
+
+
+class FeaturePipeline(BaseEstimator, TransformerMixin):
+    """Fitted notebook feature engineering: profile + targets frame -> model matrix.
+
+    Input rows carry the Final_Data_Set.csv columns plus the joined meal and
+    nutrient columns (see ``attach_targets``).  ``fit`` learns the category
+    levels, the scaler statistics of ``scaled_columns`` and, when ``y`` is
+    given and ``k`` is not "all", the SelectKBest (ANOVA F) columns.
+    """
+
+    def __init__(self, k=25, scaled_columns=tuple(SCALED_COLUMNS)):
+        self.k = k
+        self.scaled_columns = scaled_columns
+
+    def fit(self, X, y=None):
+        from sklearn.feature_selection import SelectKBest, f_classif
+
+        exclude = set(PROFILE_CATEGORICALS) | {"Breakfast", "Lunch", "Dinner", "Snacks"}
+        numeric = [c for c in X.columns if c not in exclude and pd.api.types.is_numeric_dtype(X[c])]
+        self.categories_ = {c: sorted(X[c].dropna().astype(str).unique()) for c in PROFILE_CATEGORICALS}
+        self.scaler_ = {}
+        for column in self.scaled_columns:
+            values = X[column].to_numpy(dtype=np.float64)
+            scale = values.std()
+            self.scaler_[column] = (values.mean(), scale if scale > 0 else 1.0)
+
+        # Fixed schema: numeric, Adjusted_Calories, then one column per category level
+        schema = [(c, "numeric", c, None) for c in numeric]
+        schema.append(("Adjusted_Calories", "adjusted", None, None))
+        for column, levels in self.categories_.items():
+            schema += [(f"{column}_{level}", "level", column, i) for i, level in enumerate(levels)]
+        for column, labels in (("BMI_Category", BMI_LABELS), ("Age_Group", AGE_LABELS),
+                               ("Activity_Frequency", ACTIVITY_LABELS)):
+            schema += [(f"{column}_{label}", column, None, i) for i, label in enumerate(labels)]
+        self.schema_ = schema
+
+        if y is not None and self.k != "all" and self.k < len(schema):
+            selector = SelectKBest(f_classif, k=self.k).fit(self._evaluate(X, schema), y)
+            self.features_ = [schema[i] for i in np.flatnonzero(selector.get_support())]
+        else:
+            self.features_ = list(schema)
+        self.feature_names_out_ = np.array([name for name, *_ in self.features_], dtype=object)
+        return self
+
+    def get_feature_names_out(self, input_features=None):
+        return self.feature_names_out_
+
+    def transform(self, X):
+        return self._evaluate(X, self.features_)
+
+    def _evaluate(self, X, features):
+        out = np.empty((len(X), len(features)), dtype=np.float64)
+        codes = {}
+
+        def codes_for(kind, source):
+            key = source or kind
+            if key not in codes:
+                if kind == "level":
+                    values = pd.Categorical(X[source].astype(str), categories=self.categories_[source])
+                    codes[key] = values.codes
+                elif kind == "BMI_Category":
+                    codes[key] = _bmi_codes(X["BMI"].to_numpy(dtype=np.float64))
+                elif kind == "Age_Group":
+                    codes[key] = _bin_codes(X["Age"].to_numpy(dtype=np.float64), AGE_BINS)
+                else:
+                    codes[key] = _bin_codes(X["Weekly_Activity_Days"].to_numpy(dtype=np.float64), ACTIVITY_BINS)
+            return codes[key]
+
+        for j, (name, kind, source, arg) in enumerate(features):
+            if kind == "numeric":
+                values = X[source].to_numpy(dtype=np.float64)
+                if source in self.scaler_:
+                    mean, scale = self.scaler_[source]
+                    values = (values - mean) / scale
+                out[:, j] = values
+            elif kind == "adjusted":
+                out[:, j] = _adjusted_calories(X["Daily_Calories"].to_numpy(dtype=np.float64),
+                                               X["Health_Goal"].astype(str).to_numpy())
+            else:
+                out[:, j] = codes_for(kind, source) == arg
+        return out
+
+    def transform_record(self, record):
+        """Feature vector for one profile given as a mapping of column -> value."""
+        row = []
+        for name, kind, source, arg in self.features_:
+            if kind == "numeric":
+                value = float(record[source])
+                if source in self.scaler_:
+                    mean, scale = self.scaler_[source]
+                    value = (value - mean) / scale
+            elif kind == "adjusted":
+                value = float(record["Daily_Calories"]) * CALORIE_ADJUSTMENTS.get(str(record["Health_Goal"]), 1.0)
+            elif kind == "level":
+                value = float(str(record[source]) == self.categories_[source][arg])
+            elif kind == "BMI_Category":
+                value = float(bisect_right(BMI_BINS[1:-1], record["BMI"]) == arg)
+            elif kind == "Age_Group":
+                value = float(_bin_code(record["Age"], AGE_BINS) == arg)
+            else:
+                value = float(_bin_code(record["Weekly_Activity_Days"], ACTIVITY_BINS) == arg)
+            row.append(value)
+        return np.array(row, dtype=np.float64)
+
+
+# App vocabulary (see nutriguide.engine.Profile) -> Final_Data_Set.csv values
+PROFILE_VALUES = {
+    "gender": {"male": "Male", "female": "Female"},
+    "activity": {"sedentary": "Sedentary", "light": "Light", "moderate": "Moderate",
+                 "active": "Active", "very active": "Very Active"},
+    "goal": {"lose": "Weight Loss", "gain": "Muscle Gain", "maintain": "Maintenance"},
+    "diet": {"veg": "Vegetarian", "non-veg": "Non-Vegetarian", "vegan": "Vegan", "pescatarian": "Pescatarian"},
+}
+
+
+def profile_record(profile, engine, daily_calories=None):
+    """Feature-pipeline input record for an app ``Profile``, targets joined by calories."""
+    calories = daily_calories if daily_calories is not None else engine.recommend(profile, k=1).tdee
+    record = {
+        "Age": profile.age,
+        "Gender": PROFILE_VALUES["gender"].get(profile.gender, profile.gender),
+        "Weight_kg": profile.weight,
+        "Height_cm": profile.height,
+        "BMI": round(profile.weight / (profile.height / 100) ** 2, 1),
+        "Diet_Preference": PROFILE_VALUES["diet"].get(profile.diet, profile.diet),
+        "Activity_Level": PROFILE_VALUES["activity"].get(profile.activity, profile.activity),
+        "Weekly_Activity_Days": profile.weekly_activity_days or 0,
+        "Disease": profile.disease or None,
+        "Food_Allergies": profile.food_allergies or None,
+        "Health_Goal": PROFILE_VALUES["goal"].get(profile.goal, profile.goal),
+        "Daily_Calories": calories,
+    }
+    plans = engine.meal_plans(calories, "non-veg", k=1)
+    record["Water_Intake_L"] = plans[0].water_intake_l if plans else 0.0
+    nutrients = engine.nutrient_targets(calories)
+    record.update({column: value for column, value in nutrients.items() if column != "Daily_Calories"})
+    return record
+
+
+def predict_record(model, record):
+    """Predict one record with a ``Pipeline(features=FeaturePipeline, ...)`` artifact."""
+    features = model.named_steps["features"].transform_record(record)
+    return model[-1].predict(features.reshape(1, -1))[0]
@@ -0,0 +1,275 @@
+"""Incremental retraining of the Daily_Calories regressor as profiles are appended.
+
+model_training.ipynb refits the 100-tree ``RandomForestRegressor`` and its
+``StandardScaler`` on the whole of Final_Data_Set.csv.  Here the regressor
+state records a ``Watermark`` -- how many bytes and rows of the CSV it has
+seen -- and ``update_regressor`` reads only the complete lines appended past
+it:
+
+* the scaler's running mean and variance absorb the new rows
+  (``StandardScaler.partial_fit``, Chan et al.'s pairwise update);
+* the existing trees keep their predictions: each split threshold on a scaled
+  column is mapped through the change of scale, ``t' = (t * s0 + m0 - m1) / s1``;
+* ``warm_start`` grows the forest by trees fitted on the new rows only, in
+  proportion to their share of the data (100 trees per 5,000 rows by default).
+
+The update works on a copy, so the published state is never modified while
+it is serving predictions.  A rewritten CSV (the bytes before the watermark
+changed) or a forest past ``max_trees`` falls back to a full refit.
+``publish`` hot-swaps the new state into a ``ModelRegistry``; sessions that
+already hold the previous one finish with it.
+
+    python -m nutriguide.incremental [--full] [--min-rows 50]
+
+``python -m benchmarks.incremental_training`` compares update time and
+held-out error with a full retrain.
+"""
+import argparse
+import copy
+import hashlib
+import io
+import logging
+import os
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from .data import FOODS_DTYPES, FOODS_FILE
+from .paths import DATASETS_DIR, MODEL_DIR
+from .training import CALORIE_SCALED, calorie_design
+
+logger = logging.getLogger(__name__)
+
+STATE_PATH = MODEL_DIR / "calorie_regressor.joblib"
+MODEL_NAME = "calorie_regressor"
+TARGET = "Daily_Calories"
+# Bytes before the watermark that must be unchanged for an incremental update
+CHECK_BYTES = 4096
+
+
+class WatermarkMismatch(ValueError):
+    """The CSV no longer starts with the rows the model was trained on."""
+
+
+@dataclass(frozen=True)
+class Watermark:
+    offset: int  # bytes of the CSV consumed, header included
+    rows: int
+    tail_digest: str  # SHA-256 of the CHECK_BYTES before ``offset``
+
+
+@dataclass(frozen=True)
+class CalorieRegressorState:
+    """The forest, the scaler its inputs are scaled with, and how much of the CSV both have seen."""
+
+    model: RandomForestRegressor
+    scaler: object  # StandardScaler
+    watermark: Watermark
+    n_estimators: int  # trees of a full fit
+    trees_per_row: float  # trees added per appended row
+    max_trees: int  # past this, refit from scratch
+
+    def design(self, foods):
+        X, _ = calorie_design(foods, self.scaler)
+        # Activity levels absent from ``foods`` still need their (all-False) dummy column
+        return X.reindex(columns=self.model.feature_names_in_, fill_value=False)
+
+    def predict(self, foods):
+        return self.model.predict(self.design(foods))
+
+
+@dataclass(frozen=True)
+class UpdateResult:
+    mode: str  # "full", "incremental" or "pending" (fewer than min_rows new rows)
+    rows: int  # rows read past the previous watermark
+    trees: int  # trees in the resulting forest
+    seconds: float
+
+    def __str__(self):
+        return f"{self.mode}: {self.rows:,} new rows, {self.trees} trees, {self.seconds * 1000:.0f} ms"
+
+
+def _tail_digest(f, offset):
+    start = max(0, offset - CHECK_BYTES)
+    f.seek(start)
+    return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+
+def read_appended(csv_path, watermark=None):
+    """(rows past ``watermark``, watermark after them); every row when ``watermark`` is None.
+
+    Only complete lines are read, so a row caught mid-append is picked up
+    by the next call.
+    """
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        start = f.tell() if watermark is None else watermark.offset
+        if watermark is not None and _tail_digest(f, start) != watermark.tail_digest:
+            raise WatermarkMismatch(f"{csv_path} changed before byte {start:,}")
+        f.seek(start)
+        body = f.read()
+        body = body[:body.rfind(b"\n") + 1]
+        offset = start + len(body)
+        digest = _tail_digest(f, offset)
+    rows = pd.read_csv(io.BytesIO(header + body), dtype=FOODS_DTYPES)
+    seen = 0 if watermark is None else watermark.rows
+    return rows, Watermark(offset=offset, rows=seen + len(rows), tail_digest=digest)
+
+
+def fit_regressor(csv_path=DATASETS_DIR / FOODS_FILE, n_estimators=100, random_state=42, max_trees=None):
+    """Full fit on every row of ``csv_path``, as model_training.ipynb does (without the test split)."""
+    foods, watermark = read_appended(csv_path)
+    X, scaler = calorie_design(foods)
+    model = RandomForestRegressor(n_estimators=n_estimators, random_state=random_state).fit(X, foods[TARGET])
+    return CalorieRegressorState(
+        model=model,
+        scaler=scaler,
+        watermark=watermark,
+        n_estimators=n_estimators,
+        trees_per_row=n_estimators / len(foods),
+        max_trees=max_trees or 2 * n_estimators,
+    )
+
+
+# float32 neighbours searched for the raw value behind a threshold
+_GRID = np.arange(-4, 5)
+
+
+def _scaled(scaler, j, raw):
+    """Column ``j`` of ``scaler.transform`` for float32 ``raw`` values, as the trees receive it."""
+    X = np.zeros((raw.size, len(scaler.mean_)), dtype=np.float32)
+    X[:, j] = raw.ravel()
+    X = pd.DataFrame(X, columns=scaler.feature_names_in_)
+    return scaler.transform(X)[:, j].astype(np.float32).astype(np.float64).reshape(raw.shape)
+
+
+def _rescale(threshold, j, old_scaler, new_scaler):
+    m0, s0 = old_scaler.mean_[j], old_scaler.scale_[j]
+    # Trees compare float32 inputs, and thresholds often sit within rounding of
+    # a scaled training value, so mapping ``t`` alone can flip ties.  Instead
+    # find the largest float32 raw value that went left and put the new
+    # threshold exactly on its new image.
+    approx = (threshold * s0 + m0).astype(np.float32)
+    grid = approx[:, None] + _GRID * np.spacing(approx)[:, None]
+    left = _scaled(old_scaler, j, grid) <= threshold[:, None]
+    last = left.shape[1] - 1 - left[:, ::-1].argmax(axis=1)
+    moved = _scaled(new_scaler, j, grid[np.arange(len(grid)), last])
+    # Off the grid (should not happen): map the threshold itself
+    missed = ~left.any(axis=1) | left.all(axis=1)
+    m1, s1 = new_scaler.mean_[j], new_scaler.scale_[j]
+    moved[missed] = (threshold[missed] * s0 + m0 - m1) / s1
+    return moved
+
+
+def rescale_thresholds(model, columns, old_scaler, new_scaler):
+    """Rewrite split thresholds in place so the trees give the same answers on ``new_scaler`` inputs.
+
+    A split ``(x - m0) / s0 <= t`` is the same test as
+    ``(x - m1) / s1 <= (t * s0 + m0 - m1) / s1``.
+    """
+    features = list(model.feature_names_in_)
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    for j, column in enumerate(columns):
+        index = features.index(column)
+        splits = [tree.feature == index for tree in trees]
+        # One pass over the thresholds of every tree
+        moved = _rescale(np.concatenate([tree.threshold[split] for tree, split in zip(trees, splits)]),
+                         j, old_scaler, new_scaler)
+        offset = 0
+        for tree, split in zip(trees, splits):
+            n = int(split.sum())
+            # ``threshold`` is a writable view of the tree's node array
+            tree.threshold[split] = moved[offset:offset + n]
+            offset += n
+
+
+def update_regressor(state, csv_path=DATASETS_DIR / FOODS_FILE, min_rows=50):
+    """(new state, UpdateResult) after the rows appended to ``csv_path`` since ``state.watermark``.
+
+    ``state`` itself is left untouched.  Fewer than ``min_rows`` new rows
+    return ``state`` as is; they are read again, with later ones, next time.
+    """
+    start = time.perf_counter()
+    try:
+        rows, watermark = read_appended(csv_path, state.watermark)
+    except WatermarkMismatch as exc:
+        logger.warning("%s; refitting from scratch", exc)
+        return _refit(state, csv_path, start, rows=None)
+    if len(rows) < min_rows:
+        return state, UpdateResult("pending", len(rows), len(state.model.estimators_),
+                                   time.perf_counter() - start)
+    added = max(1, round(len(rows) * state.trees_per_row))
+    if len(state.model.estimators_) + added > state.max_trees:
+        logger.info("Forest would exceed %d trees; refitting from scratch", state.max_trees)
+        return _refit(state, csv_path, start, rows=len(rows))
+
+    scaler = copy.deepcopy(state.scaler).partial_fit(rows[CALORIE_SCALED])
+    model = copy.deepcopy(state.model)
+    rescale_thresholds(model, CALORIE_SCALED, state.scaler, scaler)
+    updated = replace(state, model=model, scaler=scaler, watermark=watermark)
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + added)
+    model.fit(updated.design(rows), rows[TARGET])
+    model.set_params(warm_start=False)
+    return updated, UpdateResult("incremental", len(rows), len(model.estimators_), time.perf_counter() - start)
+
+
+def _refit(state, csv_path, start, rows):
+    refit = fit_regressor(csv_path, state.n_estimators, state.model.random_state, state.max_trees)
+    if rows is None:
+        rows = refit.watermark.rows
+    return refit, UpdateResult("full", rows, len(refit.model.estimators_), time.perf_counter() - start)
+
+
+def save_state(state, path=STATE_PATH):
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    joblib.dump(state, tmp)
+    # A registry loading ``path`` never sees a half-written file
+    os.replace(tmp, path)
+
+
+def load_state(path=STATE_PATH):
+    return joblib.load(path)
+
+
+def publish(state, registry=None, name=MODEL_NAME, path=STATE_PATH):
+    """Hot-swap ``state`` into ``registry`` (the process-wide one by default); returns the previous state."""
+    if registry is None:
+        from .registry import default_registry
+        registry = default_registry()
+    if name not in registry.names():
+        registry.register(name, path)
+    return registry.swap(name, state)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the Daily_Calories regressor with appended profiles.")
+    parser.add_argument("--csv", default=str(DATASETS_DIR / FOODS_FILE))
+    parser.add_argument("--state", default=str(STATE_PATH))
+    parser.add_argument("--full", action="store_true", help="refit from scratch")
+    parser.add_argument("--min-rows", type=int, default=50)
+    args = parser.parse_args()
+
+    # Imported by module name so the pickle does not reference __main__
+    from nutriguide import incremental
+
+    start = time.perf_counter()
+    if args.full or not os.path.exists(args.state):
+        state = incremental.fit_regressor(args.csv)
+        result = UpdateResult("full", state.watermark.rows, len(state.model.estimators_),
+                              time.perf_counter() - start)
+    else:
+        state, result = incremental.update_regressor(load_state(args.state), args.csv, args.min_rows)
+    print(result)
+    if result.mode != "pending":
+        save_state(state, args.state)
+        print(f"Saved {args.state} ({state.watermark.rows:,} rows seen)")
+
+
+if __name__ == "__main__":
+    main()
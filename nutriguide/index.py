@@ -0,0 +1,54 @@
+"""Calorie-keyed nearest-row lookup built once over a dataset.
+
+The apps used to find the meal plan closest to a user's TDEE by merging
+Meal_Suggestions with Final_Data_Set on the (heavily duplicated)
+Daily_Calories column, adding a ``diff`` column and sorting the whole joined
+frame.  ``CalorieIndex`` sorts the calorie column once and answers the same
+question with a binary search over the sorted array and a ``top_k`` selection
+over the 2k-row window around the insertion point.
+"""
+import numpy as np
+
+from .topk import top_k
+
+
+class CalorieIndex:
+    """Sorted view of a calorie column answering k-nearest queries in O(log n + k)."""
+
+    def __init__(self, calories):
+        calories = np.asarray(calories, dtype=np.float64)
+        # Stable sort keeps original row order among equal calorie values
+        self.order = np.argsort(calories, kind="stable")
+        self.calories = calories[self.order]
+
+    @classmethod
+    def from_frame(cls, df, column="Daily_Calories"):
+        return cls(df[column].to_numpy())
+
+    def __len__(self):
+        return len(self.calories)
+
+    def nearest(self, target, k=1):
+        """Positional row numbers of the ``k`` rows closest to ``target``, nearest first."""
+        n = len(self.calories)
+        k = min(k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        pos = int(np.searchsorted(self.calories, target))
+        # The k nearest values all lie within k slots either side of the insertion point
+        lo, hi = max(0, pos - k), min(n, pos + k)
+        best = top_k(np.abs(self.calories[lo:hi] - target), k)
+        return self.order[lo + best]
+
+    def nearest_many(self, targets):
+        """Positional row number of the single closest row for each target (-1 if empty)."""
+        targets = np.asarray(targets, dtype=np.float64)
+        n = len(self.calories)
+        if n == 0:
+            return np.full(len(targets), -1, dtype=np.intp)
+        pos = np.searchsorted(self.calories, targets)
+        left = np.clip(pos - 1, 0, n - 1)
+        right = np.clip(pos, 0, n - 1)
+        # Ties go to the lower calorie value, as in ``nearest``
+        take_left = np.abs(self.calories[left] - targets) <= np.abs(self.calories[right] - targets)
+        return self.order[np.where(take_left, left, right)]
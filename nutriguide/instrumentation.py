@@ -0,0 +1,266 @@
+"""Timing spans for the recommendation flow, exported as Prometheus text.
+
+    from nutriguide.instrumentation import span, start_trace
+
+    with span("meal_lookup"):
+        ...
+
+Every span observes its duration in a per-stage ``metrics.Histogram``: two
+``perf_counter`` calls and one bucket increment, a few microseconds, so the
+spans stay on in production.  Every ``memory_every``-th span of a stage also
+reads the process RSS before and after it (``pread`` of ``/proc/self/statm``)
+and records the growth.
+
+``start_trace()`` turns tracing on for the current thread or asyncio task
+(a ``contextvars`` variable, so concurrent requests do not mix).  Until
+``finish()``, every span also goes into the ``Trace`` with its nesting depth,
+offset and RSS delta.  The service sends it as a ``Server-Timing`` header
+and the apps show it in their debug panel.
+
+``exposition()`` is the text served on ``GET /metrics``; ``dump(path)``
+writes it to a file.  ``NUTRIGUIDE_METRICS_FILE`` makes the process-wide
+instance rewrite that file every ``NUTRIGUIDE_METRICS_INTERVAL`` seconds
+(default 15), and ``NUTRIGUIDE_INSTRUMENTATION=0`` turns spans into no-ops.
+``python -m benchmarks.instrumentation_overhead`` measures the cost.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .metrics import BYTES_BUCKETS, LATENCY_BUCKETS, Histogram
+from .resources import current_rss, format_bytes
+
+logger = logging.getLogger(__name__)
+
+ENABLED_ENV_VAR = "NUTRIGUIDE_INSTRUMENTATION"
+METRICS_FILE_ENV_VAR = "NUTRIGUIDE_METRICS_FILE"
+METRICS_INTERVAL_ENV_VAR = "NUTRIGUIDE_METRICS_INTERVAL"
+
+_trace = contextvars.ContextVar("nutriguide_trace", default=None)
+
+
+@dataclass(frozen=True)
+class SpanRecord:
+    stage: str
+    depth: int  # 0 for spans not nested in another traced span
+    start: float  # seconds after the trace started
+    seconds: float
+    rss_delta: int
+
+
+class Trace:
+    """Spans recorded between ``start_trace()`` and ``finish()``, in the order they started."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._records = []
+        self._depth = 0
+        self._token = None
+
+    @property
+    def spans(self):
+        return sorted(self._records, key=lambda record: record.start)
+
+    def finish(self):
+        """Stop collecting spans in this context; returns the trace."""
+        if self._token is not None:
+            _trace.reset(self._token)
+            self._token = None
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.finish()
+
+    def server_timing(self):
+        """``Server-Timing`` header value (durations in ms, RSS deltas as descriptions)."""
+        entries = []
+        for i, record in enumerate(self.spans):
+            # Metric names must be unique tokens
+            name = "".join(c if c.isalnum() or c in "_-" else "_" for c in record.stage)
+            entries.append(f'{name}-{i};dur={record.seconds * 1e3:.3f};desc="rss {record.rss_delta:+d} B"')
+        return ", ".join(entries)
+
+    def __str__(self):
+        return "\n".join(f"{'  ' * record.depth}{record.stage:<{28 - 2 * record.depth}} "
+                         f"+{record.start * 1e3:8.2f} ms {record.seconds * 1e3:9.3f} ms "
+                         f"RSS {'+' if record.rss_delta >= 0 else '-'}{format_bytes(abs(record.rss_delta))}"
+                         for record in self.spans)
+
+
+@dataclass(frozen=True)
+class StageStats:
+    stage: str
+    latency: object  # HistogramSnapshot, seconds
+    rss_growth: object  # HistogramSnapshot, bytes, sampled spans only
+
+    def __str__(self):
+        latency = self.latency
+        return (f"{self.stage}: n={latency.count:,} mean {latency.mean * 1e3:.3f} ms, "
+                f"p50 <= {latency.quantile(0.5) * 1e3:g} ms, p99 <= {latency.quantile(0.99) * 1e3:g} ms, "
+                f"RSS growth mean {format_bytes(int(self.rss_growth.mean))} over {self.rss_growth.count:,} samples")
+
+
+class _Stage:
+    __slots__ = ("latency", "rss_growth", "calls")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.rss_growth = Histogram(BYTES_BUCKETS)
+        self.calls = 0
+
+
+class _Span:
+    __slots__ = ("name", "stage", "memory_every", "trace", "rss", "start")
+
+    def __init__(self, name, stage, memory_every):
+        self.name = name
+        self.stage = stage
+        self.memory_every = memory_every
+
+    def __enter__(self):
+        stage = self.stage
+        # Unlocked: a lost increment only shifts which span gets sampled
+        stage.calls += 1
+        self.trace = trace = _trace.get()
+        if trace is not None or stage.calls % self.memory_every == 0:
+            self.rss = current_rss()
+            if trace is not None:
+                trace._depth += 1
+        else:
+            self.rss = None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        stage = self.stage
+        stage.latency.observe(end - self.start)
+        if self.rss is not None:
+            delta = current_rss() - self.rss
+            stage.rss_growth.observe(max(0, delta))
+            trace = self.trace
+            if trace is not None:
+                trace._depth -= 1
+                trace._records.append(SpanRecord(self.name, trace._depth, self.start - trace.started,
+                                                 end - self.start, delta))
+        return False
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Instrumentation:
+    """Per-stage latency and RSS growth histograms fed by ``span``."""
+
+    def __init__(self, enabled=True, memory_every=16):
+        self.enabled = enabled
+        self.memory_every = max(1, memory_every)
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._dumper = None
+
+    def _stage(self, name):
+        stage = self._stages.get(name)
+        if stage is None:
+            with self._lock:
+                stage = self._stages.setdefault(name, _Stage())
+        return stage
+
+    def span(self, stage):
+        """Context manager timing ``stage``."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(stage, self._stage(stage), self.memory_every)
+
+    def stats(self):
+        """``StageStats`` per stage, by name."""
+        return {name: StageStats(name, stage.latency.snapshot(), stage.rss_growth.snapshot())
+                for name, stage in sorted(self._stages.items())}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def exposition(self, prefix="nutriguide"):
+        """Prometheus text for every stage's latency and RSS growth histograms."""
+        stages = sorted(self._stages.items())
+        lines = []
+        for i, (name, stage) in enumerate(stages):
+            lines.append(stage.latency.exposition(f"{prefix}_stage_seconds", "Time spent per stage",
+                                                  {"stage": name}, header=i == 0))
+        for i, (name, stage) in enumerate(stages):
+            lines.append(stage.rss_growth.exposition(f"{prefix}_stage_rss_growth_bytes",
+                                                     "Process RSS growth over sampled spans",
+                                                     {"stage": name}, header=i == 0))
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def dump(self, path):
+        """Write ``exposition()`` to ``path`` atomically (node_exporter textfile style)."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(self.exposition())
+        os.replace(tmp, path)
+
+    def start_dumping(self, path, interval=15.0):
+        """Rewrite ``path`` every ``interval`` seconds from a daemon thread."""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.dump(path)
+                except Exception:
+                    # A full disk or a removed directory must not stop later dumps
+                    logger.exception("Writing metrics to %s failed", path)
+
+        if self._dumper is None:
+            self._dumper = threading.Thread(target=run, name="metrics-dump", daemon=True)
+            self._dumper.start()
+
+
+def start_trace():
+    """Collect this context's spans into a new ``Trace`` until its ``finish()``."""
+    trace = Trace()
+    trace._token = _trace.set(trace)
+    return trace
+
+
+def current_trace():
+    return _trace.get()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_instrumentation():
+    """Process-wide instance configured from the environment."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                instrumentation = Instrumentation(enabled=os.environ.get(ENABLED_ENV_VAR, "1") != "0")
+                path = os.environ.get(METRICS_FILE_ENV_VAR)
+                if path:
+                    instrumentation.start_dumping(path, float(os.environ.get(METRICS_INTERVAL_ENV_VAR, 15)))
+                _default = instrumentation
+    return _default
+
+
+def span(stage):
+    """``default_instrumentation().span(stage)``."""
+    return (_default or default_instrumentation()).span(stage)
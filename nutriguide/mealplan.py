@@ -0,0 +1,481 @@
+"""Daily meal plans composed from a food catalog by linear programming.
+
+``MealPlanOptimizer`` picks foods and half-serving counts from
+Food_Catalog.csv for breakfast, lunch, dinner and snacks so that the day
+lands on the user's energy and macronutrient targets and on the micronutrient
+floors of their Micro_and_Macro_Nutrients row, using only foods that suit the
+diet and allergies (matched on the catalog's Ingredients column with the
+keyword groups of ``diets``).  The objective, minimized:
+
+* calories, protein, fat and carbs: deviation in either direction,
+* fiber and the vitamin and mineral floors (``FLOORS``): shortfall,
+* sugar (``CEILINGS``): excess,
+* each slot's calories outside its share of the day (``SLOT_SHARES``),
+
+each relative to its target and weighted, plus a small cost per food used.
+Hard constraints: at most ``SLOT_ITEMS`` foods per slot (at least one where
+the diet leaves any), a food in one slot only, ``Max_Servings`` per food.
+
+Proving the integer optimum of that model takes HiGHS up to seconds, so a
+plan is solved in two steps instead: the LP relaxation (servings continuous,
+no item counts) by HiGHS through ``scipy.optimize.milp``, whose basic
+solution already uses few foods, then rounding to half servings and a
+vectorized local search over +/- half-serving moves that restores the
+integer constraints.  Every target is soft, so any plan of the same diet and
+allergies is feasible for any target: plans are cached per quantized target,
+and a miss close to a cached target is warm-started from that plan (local
+search only, no LP).  The LP matrix is built once per diet/allergy mask;
+only its right-hand sides and objective change between profiles.
+
+    optimizer = default_optimizer()
+    plan = optimizer.plan_for(recommendation)
+    plan.meals["breakfast"]  # (PlannedFood(name="Rolled oats", servings=1.5, ...), ...)
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from .diets import allergy_mask, diet_mask, ingredient_bits
+from .instrumentation import span
+from .paths import DATASETS_DIR
+
+CATALOG_FILE = "Food_Catalog.csv"
+
+SLOTS = ("breakfast", "lunch", "dinner", "snacks")
+# Share of the day's calories each slot should carry, and the most foods it may hold
+SLOT_SHARES = {"breakfast": (0.20, 0.30), "lunch": (0.30, 0.40), "dinner": (0.25, 0.35), "snacks": (0.05, 0.15)}
+SLOT_ITEMS = {"breakfast": 3, "lunch": 4, "dinner": 4, "snacks": 2}
+
+# Targets met in both directions, with their penalty per unit of relative deviation
+GOALS = {"Calories": 4.0, "Protein_g": 2.0, "Fat_g": 1.0, "Carbs_g": 1.0}
+# Micro_and_Macro_Nutrients columns that are daily minimums / maximums
+FLOORS = ("Fiber_g", "Vitamin_A_mcg", "Vitamin_C_mg", "Vitamin_D_mcg", "Calcium_mg",
+          "Iron_mg", "Potassium_mg", "Magnesium_mg", "Zinc_mg")
+CEILINGS = ("Sugar_g",)
+FLOOR_WEIGHT = 0.5
+CEILING_WEIGHT = 0.5
+SLOT_WEIGHT = 1.0
+BAND_WEIGHT = 10.0  # per unit of relative calorie deviation beyond a plan's calorie band
+ITEM_COST = 1e-3  # per food used: among equal plans, prefer fewer foods
+
+NUTRIENTS = tuple(GOALS) + FLOORS + CEILINGS
+
+SERVING_STEP = 0.5
+
+
+@dataclass(frozen=True)
+class PlannedFood:
+    name: str
+    serving: str  # catalog serving size, e.g. "1 cup cooked"
+    servings: float
+    calories: float
+
+
+@dataclass(frozen=True)
+class OptimizedPlan:
+    meals: dict  # slot -> tuple of PlannedFood
+    totals: dict  # nutrient -> amount in the plan
+    targets: dict  # Calories, Protein_g, Fat_g, Carbs_g aimed at
+    limits: dict  # floor and ceiling nutrient -> daily amount
+    objective: float
+    lower_bound: float  # LP relaxation objective; None for warm-started plans
+    status: str  # "solved" or "warm start"
+    solve_seconds: float
+
+    def slot_calories(self, slot):
+        return sum(food.calories for food in self.meals.get(slot, ()))
+
+    def describe(self, slot):
+        """One line per slot, e.g. ``"1.5 x Rolled oats (1 cup cooked), 1 x Banana (1 medium) - 354 kcal"``."""
+        foods = ", ".join(f"{food.servings:g} x {food.name} ({food.serving})" for food in self.meals.get(slot, ()))
+        return f"{foods} - {self.slot_calories(slot):.0f} kcal"
+
+    def shortfalls(self):
+        """Floor nutrients the plan falls short of, with the missing amount."""
+        return {name: self.limits[name] - self.totals[name] for name in FLOORS
+                if name in self.limits and self.totals[name] < self.limits[name]}
+
+
+def load_food_catalog(path=DATASETS_DIR / CATALOG_FILE):
+    """Food_Catalog.csv with an ``Ingredient_Bits`` column for diet and allergy filtering."""
+    import pandas as pd
+
+    catalog = pd.read_csv(path)
+    return catalog.assign(Ingredient_Bits=np.array(
+        [ingredient_bits(text) for text in catalog["Ingredients"]], dtype=np.uint16))
+
+
+def plan_targets(recommendation):
+    """(targets, limits) of a ``Recommendation``.
+
+    Protein and fat are those of ``calculate_macronutrients``; carbs take the
+    calories left over (``calculate_macronutrients`` subtracts protein in g/kg
+    rather than kcal, so its carbs cannot be met together with the TDEE).
+    """
+    calories = recommendation.tdee
+    protein = recommendation.protein * recommendation.profile.weight
+    fat = recommendation.fat
+    targets = {
+        "Calories": calories,
+        "Protein_g": protein,
+        "Fat_g": fat,
+        "Carbs_g": max(0.0, (calories - 4 * protein - 9 * fat) / 4),
+    }
+    limits = {name: float(recommendation.nutrients[name])
+              for name in FLOORS + CEILINGS if name in recommendation.nutrients}
+    return targets, limits
+
+
+class _Objective:
+    """The plan objective for one set of targets, scored on nutrient and slot totals."""
+
+    def __init__(self, targets, limits, calorie_band=None):
+        calories = max(targets["Calories"], 1.0)
+        self.band = None if calorie_band is None else calorie_band * targets["Calories"]
+        self.band_weight = BAND_WEIGHT / calories
+        self.goals = np.array([targets[name] for name in GOALS])
+        self.goal_weights = np.array(list(GOALS.values())) / np.maximum(self.goals, 1.0)
+        self.floors = np.array([limits.get(name, 0.0) for name in FLOORS])
+        self.floor_weights = np.where(self.floors > 0, FLOOR_WEIGHT / np.maximum(self.floors, 1e-9), 0.0)
+        self.ceilings = np.array([limits.get(name, np.inf) for name in CEILINGS])
+        self.ceiling_weights = np.where(np.isfinite(self.ceilings), CEILING_WEIGHT / self.ceilings, 0.0)
+        self.slot_low = np.array([SLOT_SHARES[slot][0] for slot in SLOTS]) * targets["Calories"]
+        self.slot_high = np.array([SLOT_SHARES[slot][1] for slot in SLOTS]) * targets["Calories"]
+        self.slot_weight = SLOT_WEIGHT / calories
+
+    def __call__(self, totals, slot_calories, items):
+        """Objective of each row of ``totals`` (NUTRIENTS) / ``slot_calories`` (SLOTS) / ``items``."""
+        goals = totals[..., :len(GOALS)]
+        floors = totals[..., len(GOALS):len(GOALS) + len(FLOORS)]
+        ceilings = totals[..., len(GOALS) + len(FLOORS):]
+        deviations = np.abs(goals - self.goals)
+        band = 0.0 if self.band is None else np.maximum(deviations[..., 0] - self.band, 0) * self.band_weight
+        return (
+            band
+            + (deviations * self.goal_weights).sum(axis=-1)
+            + (np.maximum(self.floors - floors, 0) * self.floor_weights).sum(axis=-1)
+            + (np.maximum(ceilings - self.ceilings, 0) * self.ceiling_weights).sum(axis=-1)
+            + (np.maximum(self.slot_low - slot_calories, 0)
+               + np.maximum(slot_calories - self.slot_high, 0)).sum(axis=-1) * self.slot_weight
+            + ITEM_COST * items
+        )
+
+    def linear(self, n_pairs):
+        """LP cost vector: servings, then goal under/over, floor, ceiling and slot under/over deviations."""
+        return np.concatenate([
+            np.zeros(n_pairs),
+            np.repeat(self.goal_weights, 2),
+            self.floor_weights,
+            self.ceiling_weights,
+            np.full(2 * len(SLOTS), self.slot_weight),
+        ])
+
+
+class _Model:
+    """(food, slot) pairs of one diet/allergy mask and the LP relaxation over them."""
+
+    def __init__(self, catalog, mask):
+        foods = np.flatnonzero((catalog["Ingredient_Bits"].to_numpy() & mask) == 0)
+        slot_lists = catalog["Slots"].str.split("|")
+        pairs = [(food, s) for food in foods for s, slot in enumerate(SLOTS) if slot in slot_lists.iloc[food]]
+        self.pair_foods = np.array([food for food, _ in pairs], dtype=np.intp)
+        self.pair_slots = np.array([s for _, s in pairs], dtype=np.intp)
+        n = self.n_pairs = len(pairs)
+        # Nutrients of one half-serving of each pair's food
+        self.amounts = catalog[list(NUTRIENTS)].to_numpy(np.float64)[self.pair_foods] * SERVING_STEP
+        self.calories = self.amounts[:, NUTRIENTS.index("Calories")]
+        self.max_steps = catalog["Max_Servings"].to_numpy(np.float64)[self.pair_foods] / SERVING_STEP
+        self.slot_onehot = np.eye(len(SLOTS))[self.pair_slots]
+        self.slot_available = np.bincount(self.pair_slots, minlength=len(SLOTS)) > 0
+        self.slot_items = np.array([SLOT_ITEMS[slot] for slot in SLOTS])
+        self.foods = np.unique(self.pair_foods)
+        self.pair_food_index = np.searchsorted(self.foods, self.pair_foods)
+
+        # Rows: nutrient totals, slot calories, servings per food.  Columns: servings,
+        # then (under, over) per goal, floor shortfalls, ceiling excesses, (under, over) per slot.
+        # A few dozen rows by a few hundred columns: dense is simplest and HiGHS takes it as is
+        n_goals, n_floors = len(GOALS), len(FLOORS)
+        n_deviations = 2 * n_goals + n_floors + len(CEILINGS) + 2 * len(SLOTS)
+        A = np.zeros((len(NUTRIENTS) + len(SLOTS) + len(self.foods), n + n_deviations))
+        A[:len(NUTRIENTS), :n] = self.amounts.T
+        goal_rows = np.arange(n_goals)
+        A[goal_rows, n + 2 * goal_rows] = 1.0
+        A[goal_rows, n + 2 * goal_rows + 1] = -1.0
+        limit_rows = np.arange(n_goals, len(NUTRIENTS))
+        A[limit_rows, n + n_goals + limit_rows] = np.where(limit_rows < n_goals + n_floors, 1.0, -1.0)
+        slot_rows = len(NUTRIENTS) + np.arange(len(SLOTS))
+        A[slot_rows, :n] = (self.calories[:, None] * self.slot_onehot).T
+        slot_columns = n + 2 * n_goals + n_floors + len(CEILINGS) + 2 * np.arange(len(SLOTS))
+        A[slot_rows, slot_columns] = 1.0
+        A[slot_rows, slot_columns + 1] = -1.0
+        A[len(NUTRIENTS) + len(SLOTS) + self.pair_food_index, np.arange(n)] = 1.0
+        self.A = A
+        food_steps = np.zeros(len(self.foods))
+        food_steps[self.pair_food_index] = self.max_steps
+        self.food_steps = food_steps
+        self.upper_bounds = np.concatenate([self.max_steps, np.full(n_deviations, np.inf)])
+
+    def relaxation(self, objective, movable=None, fixed=None):
+        """(half-servings, objective) of the LP relaxation.
+
+        Pairs outside ``movable`` are held at their ``fixed`` half-servings.
+        """
+        from scipy.optimize import Bounds, LinearConstraint, milp
+
+        lower = np.concatenate([objective.goals, objective.floors, np.full(len(CEILINGS), -np.inf),
+                                objective.slot_low, np.zeros(len(self.foods))])
+        upper = np.concatenate([objective.goals, np.full(len(FLOORS), np.inf), objective.ceilings,
+                                objective.slot_high, self.food_steps])
+        # No integrality: HiGHS solves it as an LP
+        lower_bounds, upper_bounds = np.zeros(len(self.upper_bounds)), self.upper_bounds.copy()
+        if movable is not None:
+            lower_bounds[:self.n_pairs][~movable] = fixed[~movable]
+            upper_bounds[:self.n_pairs][~movable] = fixed[~movable]
+        cost, constraints = objective.linear(self.n_pairs), LinearConstraint(self.A, lower, upper)
+        result = None
+        if objective.band is not None:
+            # Calorie under/over columns capped at the band; infeasible bans fall back to the penalty
+            banded = upper_bounds.copy()
+            banded[self.n_pairs:self.n_pairs + 2] = objective.band
+            result = milp(cost, constraints=constraints, bounds=Bounds(lower_bounds, banded))
+        if result is None or result.x is None:
+            result = milp(cost, constraints=constraints, bounds=Bounds(lower_bounds, upper_bounds))
+        if result.x is None:
+            raise RuntimeError(f"meal plan relaxation failed: {result.message}")
+        return result.x[:self.n_pairs], result.fun
+
+    def round(self, servings, movable=None):
+        """Half-serving counts near an LP solution that satisfy the integer constraints.
+
+        Held pairs (outside ``movable``) must not share a food with movable ones.
+        """
+        steps = np.minimum(np.floor(servings + 0.5), self.max_steps)
+        # One slot per food: keep the slot holding the most of it
+        order = np.lexsort((-servings, self.pair_food_index))
+        first = np.r_[True, self.pair_food_index[order][1:] != self.pair_food_index[order][:-1]]
+        steps[order[~first]] = 0
+        for s in range(len(SLOTS)):
+            in_slot = np.flatnonzero((self.pair_slots == s) & (steps > 0))
+            if len(in_slot) > self.slot_items[s]:
+                # Too many foods: keep the largest contributions
+                drop = in_slot[np.argsort(-steps[in_slot] * self.calories[in_slot], kind="stable")][self.slot_items[s]:]
+                steps[drop] = 0
+            elif len(in_slot) == 0 and self.slot_available[s]:
+                candidates = np.flatnonzero((self.pair_slots == s) & (True if movable is None else movable))
+                free = candidates[self._food_free(steps)[candidates]]
+                if len(free):
+                    steps[free[np.argmax(servings[free])]] = 1
+        return steps
+
+    def _food_free(self, steps):
+        """Per pair: no other slot already holds its food."""
+        used = np.zeros(len(self.foods), dtype=np.int64)
+        np.add.at(used, self.pair_food_index, steps > 0)
+        return (used[self.pair_food_index] - (steps > 0)) == 0
+
+    def improve(self, steps, objective, movable=None, max_moves=500):
+        """Best-improvement local search; returns (steps, objective).
+
+        A move adds or removes a half-serving of one pair, or trades a
+        half-serving of one pair for one of another, within the integer
+        constraints.  Only pairs in ``movable`` (all by default) change.
+        """
+        n = self.n_pairs
+        # Row n is "no pair": single moves are trades with it, so all moves share one evaluation
+        amounts = np.vstack([self.amounts, np.zeros(len(NUTRIENTS))])
+        slot_amounts = np.vstack([self.calories[:, None] * self.slot_onehot, np.zeros(len(SLOTS))])
+        steps = np.append(steps, 0.0)
+        totals = steps @ amounts
+        slot_calories = steps @ slot_amounts
+        current = objective(totals, slot_calories, np.count_nonzero(steps))
+        for _ in range(max_moves):
+            held = steps[:n]
+            active = held > 0
+            items_here = np.bincount(self.pair_slots, weights=active, minlength=len(SLOTS))[self.pair_slots]
+            room = held < self.max_steps
+            if movable is not None:
+                room &= movable
+            free = active | self._food_free(held)
+            can_add = room & free & (active | (items_here < self.slot_items[self.pair_slots]))
+            leaves = held == 1
+            can_remove = active & ~(leaves & (items_here <= 1))
+            if movable is not None:
+                can_remove &= movable
+            # A trade may bring a new food into a full slot, or move a food to another
+            # slot, when the pair traded away leaves
+            ins, outs = np.nonzero((room & free)[:, None] & can_remove[None, :])
+            ok = (ins != outs) & (can_add[ins] | (leaves[outs] & (
+                (self.pair_slots[ins] == self.pair_slots[outs])
+                | (self.pair_food_index[ins] == self.pair_food_index[outs]))))
+            added, removed = np.flatnonzero(can_add), np.flatnonzero(can_remove)
+            into = np.concatenate([added, np.full(len(removed), n), ins[ok]])
+            out = np.concatenate([np.full(len(added), n), removed, outs[ok]])
+            if not len(into):
+                break
+            items = (np.count_nonzero(held) + ((steps[into] == 0) & (into < n))
+                     - ((steps[out] == 1) & (out < n)))
+            scores = objective(totals + amounts[into] - amounts[out],
+                               slot_calories + slot_amounts[into] - slot_amounts[out], items)
+            best = np.argmin(scores)
+            if scores[best] >= current - 1e-12:
+                break
+            steps[into[best]] += 1
+            steps[out[best]] -= 1
+            steps[n] = 0
+            totals = totals + amounts[into[best]] - amounts[out[best]]
+            slot_calories = slot_calories + slot_amounts[into[best]] - slot_amounts[out[best]]
+            current = scores[best]
+        return steps[:n], float(current)
+
+
+class MealPlanOptimizer:
+    """Thread-safe meal planner with per-target plan caching and warm starts."""
+
+    def __init__(self, catalog, maxsize=4096, calorie_step=25, gram_step=5, warm_radius=0.05, warm_start=True):
+        self.catalog = catalog
+        self.maxsize = maxsize
+        self.calorie_step = calorie_step
+        self.gram_step = gram_step
+        self.warm_radius = warm_radius  # largest relative target distance a warm start may bridge
+        self.warm_start = warm_start
+        self._models = {}
+        self._plans = OrderedDict()  # key -> (OptimizedPlan, half-serving counts), oldest first
+        self._starts = {}  # mask -> {quantized targets: half-serving counts} of the cached plans
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.warm_starts = 0
+
+    def model(self, mask):
+        """(food, slot) pairs and LP of one diet/allergy mask, built on first use."""
+        model = self._models.get(mask)
+        if model is None:
+            with self._lock:
+                model = self._models.get(mask)
+                if model is None:
+                    model = self._models[mask] = _Model(self.catalog, mask)
+        return model
+
+    def _quantize(self, targets):
+        return tuple(round(targets[name] / step) * step for name, step in zip(
+            GOALS, (self.calorie_step, self.gram_step, self.gram_step, self.gram_step)))
+
+    def plan_for(self, recommendation):
+        """Plan for a ``Recommendation``: its targets, its diet and the profile's allergies."""
+        targets, limits = plan_targets(recommendation)
+        profile = recommendation.profile
+        with span("meal_optimizer"):
+            return self.plan(targets, limits, profile.diet, profile.food_allergies)
+
+    def plan(self, targets, limits, diet="non-veg", allergies=None):
+        """``OptimizedPlan`` for ``targets`` (see ``GOALS``) and ``limits`` (see ``FLOORS``, ``CEILINGS``).
+
+        Targets are rounded to ``calorie_step`` kcal and ``gram_step`` g; every
+        request rounding to the same values gets the same cached plan.
+        """
+        mask = diet_mask(str(diet).strip().lower()) | allergy_mask(allergies)
+        quantized = self._quantize(targets)
+        key = (mask, quantized, tuple(sorted(limits.items())))
+        with self._lock:
+            entry = self._plans.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._plans.move_to_end(key)
+                return entry[0]
+            self.misses += 1
+            neighbour = self._neighbour(mask, quantized) if self.warm_start else None
+
+        plan, steps = self.solve(mask, dict(zip(GOALS, quantized)), limits, start=neighbour)
+        with self._lock:
+            if neighbour is not None:
+                self.warm_starts += 1
+            self._plans[key] = (plan, steps)
+            self._plans.move_to_end(key)
+            self._starts.setdefault(mask, {})[quantized] = steps
+            while len(self._plans) > self.maxsize:
+                (old_mask, old_targets, _), _ = self._plans.popitem(last=False)
+                self._starts[old_mask].pop(old_targets, None)
+        return plan
+
+    def _neighbour(self, mask, quantized):
+        """Half-serving counts of the nearest cached plan for ``mask`` within ``warm_radius``.
+
+        Plans of the same mask are feasible whatever their targets and limits.
+        """
+        starts = self._starts.get(mask)
+        if not starts:
+            return None
+        cached = list(starts)
+        target = np.array(quantized, dtype=np.float64)
+        distances = (np.abs(np.array(cached) - target) / np.maximum(target, 1.0)).max(axis=1)
+        nearest = np.argmin(distances)
+        return starts[cached[nearest]] if distances[nearest] <= self.warm_radius else None
+
+    def solve(self, mask, targets, limits, start=None, movable=None, fixed=None, calorie_band=None):
+        """(OptimizedPlan, half-serving counts) for exactly ``targets``, bypassing the cache.
+
+        With ``start`` (half-serving counts per pair of ``model(mask)``) the LP
+        is skipped and the local search starts there.  Pairs outside
+        ``movable`` stay at their ``fixed`` counts; zero bans a pair.  With
+        ``calorie_band`` (a fraction of the calorie target) calories outside
+        the band weigh ``BAND_WEIGHT`` more.
+        """
+        model = self.model(mask)
+        started = time.perf_counter()
+        objective = _Objective(targets, limits, calorie_band)
+        if movable is not None and fixed is None:
+            fixed = np.zeros(model.n_pairs)
+        if start is not None:
+            steps, value = model.improve(start, objective, movable)
+            bound, status = None, "warm start"
+        else:
+            servings, bound = model.relaxation(objective, movable, fixed)
+            steps, value = model.improve(model.round(servings, movable), objective, movable)
+            status = "solved"
+        return self._plan(model, steps, targets, limits, value, bound, status, time.perf_counter() - started), steps
+
+    def _plan(self, model, steps, targets, limits, objective, bound, status, seconds):
+        names = self.catalog["Food"].to_numpy()
+        servings = self.catalog["Serving"].to_numpy()
+        meals = {slot: [] for slot in SLOTS}
+        for p in np.flatnonzero(steps > 0):
+            food = model.pair_foods[p]
+            meals[SLOTS[model.pair_slots[p]]].append(PlannedFood(
+                name=str(names[food]),
+                serving=str(servings[food]),
+                servings=float(steps[p] * SERVING_STEP),
+                calories=float(steps[p] * model.calories[p]),
+            ))
+        return OptimizedPlan(
+            meals={slot: tuple(foods) for slot, foods in meals.items()},
+            totals={name: float(value) for name, value in zip(NUTRIENTS, steps @ model.amounts)},
+            targets=dict(targets),
+            limits=dict(limits),
+            objective=objective,
+            lower_bound=bound,
+            status=status,
+            solve_seconds=seconds,
+        )
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+            self._starts.clear()
+
+    def __len__(self):
+        return len(self._plans)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_optimizer():
+    """Process-wide optimizer over the shipped food catalog, loaded on first use."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = MealPlanOptimizer(load_food_catalog())
+    return _default
@@ -0,0 +1,97 @@
+"""Thread-safe histograms with Prometheus text exposition."""
+import bisect
+import threading
+from dataclasses import dataclass
+
+# Powers of two: queue depths and batch sizes
+COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+# Seconds, 10 us to 10 s: stage and request latencies
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes, one page to 1 GiB: memory growth
+BYTES_BUCKETS = tuple(4096 * 4 ** i for i in range(10))
+
+
+def _escape(value):
+    """Label value as the Prometheus text format quotes it: backslash, double quote and newline escaped."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@dataclass(frozen=True)
+class HistogramSnapshot:
+    buckets: tuple  # upper bounds, ascending; +Inf is implied
+    counts: tuple  # observations per bucket, the last one above every bound
+    count: int
+    sum: float
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile (inf past the last bound)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def __str__(self):
+        nonzero = ", ".join(f"<={bound:g}: {n:,}" for bound, n in zip(self.buckets + (float("inf"),), self.counts)
+                            if n)
+        return f"n={self.count:,} mean={self.mean:.2f} [{nonzero}]"
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their count and sum."""
+
+    def __init__(self, buckets=COUNT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._count += 1
+            self._sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return HistogramSnapshot(self.buckets, tuple(self._counts), self._count, self._sum)
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._count = 0
+            self._sum = 0.0
+
+    def exposition(self, name, help_text="", labels=None, header=True):
+        """Prometheus text format lines (cumulative ``_bucket``, ``_count``, ``_sum``).
+
+        Pass ``header=False`` for every label set of ``name`` after the first,
+        so ``# HELP`` / ``# TYPE`` appear once per metric.
+        """
+        snapshot = self.snapshot()
+        label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in (labels or {}).items())
+        prefix = f"{label_text}," if label_text else ""
+        lines = []
+        if header and help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        if header:
+            lines.append(f"# TYPE {name} histogram")
+        cumulative = 0
+        for bound, n in zip(snapshot.buckets + ("+Inf",), snapshot.counts):
+            cumulative += n
+            le = bound if isinstance(bound, str) else f"{bound:g}"
+            lines.append(f'{name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+        suffix = f"{{{label_text}}}" if label_text else ""
+        lines.append(f"{name}_count{suffix} {snapshot.count}")
+        lines.append(f"{name}_sum{suffix} {snapshot.sum:g}")
+        return "\n".join(lines)
@@ -0,0 +1,261 @@
+"""Nearest-neighbour index over the Final_Data_Set.csv profiles.
+
+The calorie lookup matches a user to a meal plan by TDEE alone.
+``ProfileIndex`` instead finds the ``k`` dataset profiles most similar to the
+user and returns their meal plans and nutrient targets (the three CSVs are
+row-aligned, so profile row ``i`` owns meal row ``i`` and nutrient row ``i``).
+
+Profiles are pre-partitioned on the categorical fields that must match --
+gender, the app-level goal (lose / gain / maintain) and the diets their meal
+plans suit -- and each partition is searched (by a KD-tree once it holds
+``brute_force_below`` profiles or more, by a vectorized scan below that) over:
+
+* z-scored numeric fields: Age, BMI, Weight_kg, Height_cm, the activity
+  factor of Activity_Level and Weekly_Activity_Days,
+* one-hot Disease and Food_Allergies scaled by ``categorical_weight``, so a
+  matching condition pulls a profile closer without being mandatory.
+
+The index is built once and persisted next to the datasets, stamped with their
+checksum.  Tree queries are O(log n) per partition, so the same index serves
+millions of profiles.
+
+    python -m nutriguide.neighbors build
+    python -m nutriguide.neighbors query --age 30 --gender female --weight 60 --height 165
+"""
+import argparse
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .diets import DIET_EXCLUSIONS, diet_mask
+from .nutrition import ACTIVITY_FACTORS, HEALTH_GOALS
+from .paths import DATASETS_DIR
+from .topk import top_k
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "profile_index.joblib"
+
+NUMERIC_FEATURES = ("Age", "BMI", "Weight_kg", "Height_cm", "Activity_Factor", "Weekly_Activity_Days")
+CATEGORICAL_FEATURES = ("Disease", "Food_Allergies")
+
+
+@dataclass(frozen=True)
+class SimilarProfiles:
+    rows: np.ndarray  # Final_Data_Set.csv row numbers, most similar first
+    distances: np.ndarray
+    meal_plans: tuple  # MealPlan of each row
+    nutrients: tuple  # Micro_and_Macro_Nutrients row (dict) of each row
+
+
+def _text(value):
+    return str(value).strip().lower()
+
+
+def _mapped(column, mapping, default):
+    """Values of ``column`` (a Series) through ``mapping`` on their normalized text, per distinct value."""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(column)
+    table = [mapping(_text(value)) for value in uniques] + [default]
+    return np.array(table)[codes]
+
+
+class ProfileIndex:
+    """Per-(gender, goal, diet) nearest-neighbour search over scaled profile features."""
+
+    def __init__(self, categorical_weight=0.5, leaf_size=40, brute_force_below=2048):
+        self.categorical_weight = categorical_weight
+        self.leaf_size = leaf_size
+        self.brute_force_below = brute_force_below
+
+    def fit(self, foods, meal_bits=None, checksum=None):
+        """Index ``foods``; with ``meal_bits`` (Ingredient_Bits of the aligned meal rows)
+        every partition is split further by the diets its meal plans suit."""
+        from sklearn.neighbors import KDTree
+
+        numeric = np.column_stack([
+            foods["Age"].to_numpy(np.float64),
+            foods["BMI"].to_numpy(np.float64),
+            foods["Weight_kg"].to_numpy(np.float64),
+            foods["Height_cm"].to_numpy(np.float64),
+            _mapped(foods["Activity_Level"], lambda v: ACTIVITY_FACTORS.get(v, 1.2), 1.2),
+            foods["Weekly_Activity_Days"].to_numpy(np.float64),
+        ])
+        self.mean_ = numeric.mean(axis=0)
+        self.scale_ = numeric.std(axis=0)
+        self.scale_[self.scale_ == 0] = 1.0
+        self.weekly_default_ = float(np.median(numeric[:, -1]))
+
+        blocks = [(numeric - self.mean_) / self.scale_]
+        self.categories_ = {}
+        for column in CATEGORICAL_FEATURES:
+            # Missing values become "", the same as an empty field in the app
+            values = _mapped(foods[column], str, "")
+            categories = sorted(set(values) - {""})
+            self.categories_[column] = {value: i for i, value in enumerate(categories)}
+            one_hot = np.zeros((len(values), len(categories)))
+            for i, value in enumerate(categories):
+                one_hot[values == value, i] = self.categorical_weight
+            blocks.append(one_hot)
+        matrix = np.hstack(blocks)
+
+        genders = _mapped(foods["Gender"], str, "")
+        goals = _mapped(foods["Health_Goal"], lambda v: HEALTH_GOALS.get(v, "maintain"), "maintain")
+        masks = [0] if meal_bits is None else sorted({0} | {diet_mask(diet) for diet in DIET_EXCLUSIONS})
+        self.partitions_ = {}
+        for gender, goal in sorted(set(zip(genders.tolist(), goals.tolist()))):
+            selected = (genders == gender) & (goals == goal)
+            for mask in masks:
+                rows = np.flatnonzero(selected if not mask else selected & ((meal_bits & mask) == 0))
+                if len(rows) == 0:
+                    continue
+                points = matrix[rows]
+                # Small partitions are scanned directly; a tree only pays off on larger ones
+                if len(rows) < self.brute_force_below:
+                    self.partitions_[(gender, goal, mask)] = (rows, points, None)
+                else:
+                    self.partitions_[(gender, goal, mask)] = (rows, None, KDTree(points, leaf_size=self.leaf_size))
+        self.n_profiles_ = len(foods)
+        self.checksum_ = checksum
+        self.diet_masks_ = {diet: diet_mask(diet) for diet in DIET_EXCLUSIONS}
+        return self
+
+    def vector(self, profile):
+        """Query point for an app ``Profile``, in the index's feature space."""
+        weekly = profile.weekly_activity_days
+        numeric = np.array([
+            profile.age,
+            profile.weight / (profile.height / 100) ** 2,
+            profile.weight,
+            profile.height,
+            ACTIVITY_FACTORS.get(_text(profile.activity), 1.2),
+            self.weekly_default_ if weekly is None else weekly,
+        ], dtype=np.float64)
+        blocks = [(numeric - self.mean_) / self.scale_]
+        for column, field in zip(CATEGORICAL_FEATURES, ("disease", "food_allergies")):
+            one_hot = np.zeros(len(self.categories_[column]))
+            # Unknown or empty conditions sit equally far from every category
+            code = self.categories_[column].get(_text(getattr(profile, field) or ""))
+            if code is not None:
+                one_hot[code] = self.categorical_weight
+            blocks.append(one_hot)
+        return np.concatenate(blocks)
+
+    def _partition(self, profile):
+        """The partition to search, or None when no partition's plans all suit the profile's diet."""
+        gender, goal = _text(profile.gender), _text(profile.goal)
+        mask = diet_mask(profile.diet)
+        # Only partitions excluding at least the diet's ingredient groups can stand in
+        # for it; of those for one gender and goal, the exact diet's is the largest.
+        suitable = [(key, partition) for key, partition in self.partitions_.items() if key[2] & mask == mask]
+        for wanted in ((gender, goal), (gender, "maintain"), None):
+            # None: values outside the dataset vocabulary, search the largest suitable partition
+            candidates = [partition for key, partition in suitable if wanted is None or key[:2] == wanted]
+            if candidates:
+                return max(candidates, key=lambda partition: len(partition[0]))
+        return None
+
+    def query(self, profile, k=5):
+        """(rows, distances) of the ``k`` nearest profiles sharing gender, goal and diet.
+
+        Both are empty when the index holds no profile whose plans suit the diet.
+        """
+        partition = self._partition(profile)
+        if partition is None:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        rows, points, tree = partition
+        point = self.vector(profile)
+        k = min(k, len(rows))
+        if tree is not None:
+            distances, positions = tree.query(point[None, :], k=k)
+            return rows[positions[0]], distances[0]
+        squared = ((points - point) ** 2).sum(axis=1)
+        nearest = top_k(squared, k)
+        return rows[nearest], np.sqrt(squared[nearest])
+
+    def similar(self, profile, engine, k=5):
+        """Meal plans and nutrient targets of the ``k`` most similar diet-compatible profiles."""
+        rows, distances = self.query(profile, k=k)
+        return SimilarProfiles(
+            rows=rows,
+            distances=distances,
+            meal_plans=engine.meal_plans_at(rows),
+            nutrients=tuple(engine.nutrient_targets_at(row) for row in rows),
+        )
+
+
+def build_profile_index(data, path=None, **kwargs):
+    """Fit an index over ``data.foods`` and persist it (atomically) to ``path``."""
+    import joblib
+
+    index = ProfileIndex(**kwargs).fit(data.foods, data.meals["Ingredient_Bits"].to_numpy(), data.checksum)
+    if path is not None:
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        joblib.dump(index, tmp)
+        os.replace(tmp, path)
+    return index
+
+
+def load_profile_index(data, path=DATASETS_DIR / INDEX_FILE):
+    """The persisted index when it was built from ``data``; rebuilt and saved otherwise."""
+    import joblib
+
+    path = Path(path)
+    if path.exists() and data.checksum is not None:
+        index = joblib.load(path)
+        current_masks = {diet: diet_mask(diet) for diet in DIET_EXCLUSIONS}
+        if index.checksum_ == data.checksum and getattr(index, "diet_masks_", None) == current_masks:
+            return index
+        logger.info("%s was built from other datasets or diet rules; rebuilding", path)
+    return build_profile_index(data, path)
+
+
+def main():
+    from .data import load_datasets
+    from .engine import Profile, RecommendationEngine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help=f"build and save datasets/{INDEX_FILE}")
+    query = commands.add_parser("query", help="print the most similar profiles' meal plans")
+    query.add_argument("--age", type=int, required=True)
+    query.add_argument("--gender", required=True)
+    query.add_argument("--weight", type=float, required=True)
+    query.add_argument("--height", type=float, required=True)
+    query.add_argument("--activity", default="sedentary")
+    query.add_argument("--goal", default="maintain")
+    query.add_argument("--diet", default="non-veg")
+    query.add_argument("--disease", default="")
+    query.add_argument("--food-allergies", default="")
+    query.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    data = load_datasets()
+    if args.command == "build":
+        start = time.perf_counter()
+        # Imported by name so the pickle references nutriguide.neighbors, not __main__
+        from nutriguide.neighbors import build_profile_index as build
+        index = build(data, DATASETS_DIR / INDEX_FILE)
+        print(f"Indexed {index.n_profiles_:,} profiles in {len(index.partitions_)} partitions "
+              f"in {time.perf_counter() - start:.3f} s")
+        return
+
+    from nutriguide.neighbors import load_profile_index as load
+    index = load(data)
+    profile = Profile(age=args.age, gender=args.gender, weight=args.weight, height=args.height,
+                      activity=args.activity, goal=args.goal, diet=args.diet,
+                      disease=args.disease, food_allergies=args.food_allergies)
+    result = index.similar(profile, RecommendationEngine(data), k=args.k)
+    for row, distance, plan in zip(result.rows, result.distances, result.meal_plans):
+        print(f"row {row:5d}  distance {distance:6.3f}  {plan.daily_calories} kcal  "
+              f"{plan.breakfast} | {plan.lunch} | {plan.dinner} | {plan.snacks}")
+
+
+if __name__ == "__main__":
+    main()
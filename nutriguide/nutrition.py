@@ -0,0 +1,50 @@
+"""Energy and macronutrient requirements (Mifflin-St Jeor BMR)."""
+
+ACTIVITY_FACTORS = {
+    "sedentary": 1.2,
+    "light": 1.375,
+    "moderate": 1.55,
+    "active": 1.725,
+    "very active": 1.9
+}
+
+# Protein in g per kg of body weight, and share of calories from fat, per goal
+MACRO_SPLITS = {
+    "lose": (2.2, 0.25),
+    "gain": (1.6, 0.3),
+    "maintain": (1.8, 0.25),
+}
+
+# Health_Goal values of Final_Data_Set.csv mapped to the goals above
+HEALTH_GOALS = {
+    "weight loss": "lose",
+    "muscle gain": "gain",
+    "weight gain": "gain",
+    "maintenance": "maintain",
+    "athletic performance": "maintain",
+    "better health": "maintain",
+}
+
+
+# Gender, activity level and goal are matched case-insensitively, ignoring
+# surrounding whitespace, like the batch and cached paths do.
+def _text(value):
+    return str(value).strip().lower()
+
+
+def calculate_bmr(weight, height, age, gender):
+    if _text(gender) == "male":
+        return 10 * weight + 6.25 * height - 5 * age + 5
+    else:
+        return 10 * weight + 6.25 * height - 5 * age - 161
+
+
+def calculate_tdee(bmr, activity_level):
+    return bmr * ACTIVITY_FACTORS.get(_text(activity_level), 1.2)
+
+
+def calculate_macronutrients(tdee, goal):
+    protein, fat_share = MACRO_SPLITS.get(_text(goal), MACRO_SPLITS["maintain"])
+    fat = fat_share * tdee / 9
+    carbs = (tdee - (protein + fat)) / 4
+    return protein, fat, carbs
@@ -0,0 +1,6 @@
+"""Filesystem locations of the shipped datasets and model artifacts."""
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATASETS_DIR = ROOT_DIR / "datasets"
+MODEL_DIR = ROOT_DIR / "model"
@@ -0,0 +1,209 @@
+"""Lazily loaded, process-wide registry of the trained model artifacts.
+
+Each artifact is deserialized at most once per process, on the first call to
+``ModelRegistry.get``, and the same object is handed to every caller after
+that.  ``mmap_mode`` is passed to ``joblib.load``: it memory-maps the plain
+numpy arrays stored in an uncompressed pickle (``classes_``, scaler
+statistics), but not a forest's trees -- scikit-learn's ``Tree`` copies its
+node and value arrays into its own memory when unpickled -- so every process
+still holds a private copy of each forest.
+
+Run ``python -m nutriguide.registry`` to print load time and memory per model.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from .instrumentation import span
+from .paths import MODEL_DIR
+from .resources import current_rss, format_bytes
+
+logger = logging.getLogger(__name__)
+
+# Artifacts shipped under model/, keyed by registry name
+DEFAULT_MODELS = {
+    "food_recommendation": MODEL_DIR / "food_recommendation_model.pkl",
+    "meal_classifier": MODEL_DIR / "meal_classifier_model.pkl",
+}
+
+# joblib mmap_mode for the default registry; it does not share forests' trees (see above)
+MMAP_ENV_VAR = "NUTRIGUIDE_MODEL_MMAP"
+
+# Start of the pointer file Git leaves in place of a model when LFS objects were not fetched
+_LFS_POINTER = b"version https://git-lfs"
+
+
+class ModelUnavailable(LookupError):
+    """The model file is missing, or is a Git LFS pointer rather than the model."""
+
+
+@dataclass(frozen=True)
+class LoadStats:
+    name: str
+    path: str
+    file_size: int
+    seconds: float
+    rss_delta: int
+    mmap_mode: str = None
+
+    def __str__(self):
+        mode = f", mmap_mode={self.mmap_mode!r}" if self.mmap_mode else ""
+        return (f"{self.name}: {format_bytes(self.file_size)} on disk, "
+                f"loaded in {self.seconds * 1000:.0f} ms, "
+                f"RSS +{format_bytes(self.rss_delta)}{mode}")
+
+
+def load_model(name, source, mmap_mode=None):
+    """(model, ``LoadStats``) from ``source``, a path or a file opened in binary mode.
+
+    ``mmap_mode`` only applies to paths; joblib reads file objects into memory.
+    Raises ``ModelUnavailable`` for a missing file or a Git LFS pointer.
+    """
+    # joblib (and scikit-learn, when unpickling) load with the first model
+    import joblib
+
+    is_path = isinstance(source, (str, os.PathLike))
+    _check_available(name, source, is_path)
+    rss_before = current_rss()
+    start = time.perf_counter()
+    with span("model_load"):
+        model = joblib.load(source, mmap_mode=mmap_mode) if is_path else joblib.load(source)
+    stats = LoadStats(
+        name=name,
+        path=str(source) if is_path else source.name,
+        file_size=os.path.getsize(source) if is_path else os.fstat(source.fileno()).st_size,
+        seconds=time.perf_counter() - start,
+        rss_delta=current_rss() - rss_before,
+        mmap_mode=mmap_mode if is_path else None,
+    )
+    return model, stats
+
+
+def _check_available(name, source, is_path):
+    """Raise ``ModelUnavailable`` if ``source`` does not exist or is a Git LFS pointer."""
+    try:
+        if is_path:
+            with open(source, "rb") as f:
+                head = f.read(len(_LFS_POINTER))
+        else:
+            position = source.tell()
+            head = source.read(len(_LFS_POINTER))
+            source.seek(position)
+    except FileNotFoundError as exc:
+        raise ModelUnavailable(f"{name}: {source} does not exist") from exc
+    if head == _LFS_POINTER:
+        path = source if is_path else source.name
+        raise ModelUnavailable(f"{name}: {path} is a Git LFS pointer (run git lfs pull)")
+
+
+class ModelRegistry:
+    """Thread-safe, load-on-first-use cache of joblib artifacts."""
+
+    def __init__(self, mmap_mode=None):
+        self.mmap_mode = mmap_mode
+        self._paths = {}
+        self._modes = {}
+        self._models = {}
+        self._stats = {}
+        self._locks = {}
+        self._registry_lock = threading.Lock()
+
+    def register(self, name, path, mmap_mode=None):
+        """Declare an artifact without loading it."""
+        with self._registry_lock:
+            self._paths[name] = str(path)
+            self._modes[name] = mmap_mode if mmap_mode is not None else self.mmap_mode
+            self._locks.setdefault(name, threading.Lock())
+
+    def names(self):
+        return list(self._paths)
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def get(self, name):
+        """Return the model registered as ``name``, loading it on first use.
+
+        Raises ``ModelUnavailable`` when its file is missing or a Git LFS pointer.
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        if name not in self._paths:
+            raise KeyError(f"No model registered as {name!r}")
+        # Per-model lock: concurrent sessions wait for a single load
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                model = self._load(name)
+        return model
+
+    def _load(self, name):
+        model, stats = load_model(name, self._paths[name], self._modes[name])
+        self._models[name] = model
+        self._stats[name] = stats
+        logger.info("Loaded %s", stats)
+        return model
+
+    def stats(self, name=None):
+        """Load statistics for one model, or for every loaded model."""
+        if name is not None:
+            return self._stats.get(name)
+        return dict(self._stats)
+
+    def swap(self, name, model):
+        """Serve ``model`` as ``name`` from now on; returns the model it replaces (None if not loaded).
+
+        Callers already holding the previous object keep using it until they
+        call ``get`` again, so a retrained model can be published while
+        predictions are in flight.
+        """
+        if name not in self._paths:
+            raise KeyError(f"No model registered as {name!r}")
+        with self._locks[name]:
+            previous = self._models.get(name)
+            self._models[name] = model
+            # Load statistics describe the file, not the swapped-in object
+            self._stats.pop(name, None)
+        return previous
+
+    def unload(self, name):
+        """Drop the cached model; the next ``get`` loads it again."""
+        with self._locks[name]:
+            self._models.pop(name, None)
+            self._stats.pop(name, None)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_registry():
+    """Process-wide registry with the shipped models registered (not loaded)."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                registry = ModelRegistry(mmap_mode=os.environ.get(MMAP_ENV_VAR) or None)
+                for name, path in DEFAULT_MODELS.items():
+                    registry.register(name, path)
+                _default = registry
+    return _default
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load models and report load time and memory.")
+    parser.add_argument("names", nargs="*", help="models to load (default: all)")
+    parser.add_argument("--mmap-mode", choices=["r", "c"], default=None)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(mmap_mode=args.mmap_mode)
+    for name, path in DEFAULT_MODELS.items():
+        registry.register(name, path)
+    for name in args.names or registry.names():
+        registry.get(name)
+        print(registry.stats(name))
@@ -0,0 +1,59 @@
+"""Process memory probes used for load and benchmark reports."""
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+# (pid, descriptor) of /proc/self/statm, kept open: instrumentation spans read
+# it twice per sampled span, and opening it costs ten times the read
+_statm = (None, None)
+
+
+def current_rss():
+    """Resident set size of this process in bytes (0 when unavailable)."""
+    global _statm
+    try:
+        pid, fd = _statm
+        if pid != os.getpid():
+            # /proc/self is resolved at open time, so a forked child reopens it
+            fd = os.open("/proc/self/statm", os.O_RDONLY)
+            _statm = (os.getpid(), fd)
+        return int(os.pread(fd, 128, 0).split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError, AttributeError):
+        # AttributeError: no os.pread (Windows)
+        return peak_rss()
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes (0 when unavailable)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def proportional_rss():
+    """Proportional set size in bytes: shared pages (e.g. a memory-mapped model)
+    are divided among the processes mapping them.  Falls back to RSS."""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, IndexError, ValueError):
+        pass
+    return current_rss()
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n} B"
+        n /= 1024
@@ -0,0 +1,140 @@
+"""Batch scoring of large profile files with the meal classifier.
+
+The input CSV (Final_Data_Set.csv layout) is streamed in chunks, features are
+built per chunk by the model's own ``FeaturePipeline`` and chunks are scored
+across a process pool.  The model must be a ``Pipeline`` exported by
+``nutriguide.training`` or ``nutriguide.selection --export``, which carries
+its features.  Every worker loads its own copy of the model (see
+``nutriguide.registry`` on ``mmap_mode``).  Predictions are appended to the
+output in input order as chunks complete.
+
+    python -m nutriguide.score profiles.csv predictions.csv --workers 1 2 4
+
+With several worker counts the file is scored once per count and throughput
+and memory are reported for each, to size batch nodes.  Peak RSS counts pages
+shared between workers (libraries, memory-mapped arrays) in every worker; PSS
+splits them between workers and is the better estimate of what a node
+actually needs.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .batch import recommend_arrays
+from .data import FOODS_DTYPES
+from .engine import default_engine
+from .features import attach_targets
+from .registry import DEFAULT_MODELS, ModelRegistry
+from .resources import format_bytes, peak_rss, proportional_rss
+
+# Per-process state, set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(model_path, mmap_mode):
+    registry = ModelRegistry(mmap_mode=mmap_mode)
+    registry.register("meal_classifier", model_path)
+    _worker["model"] = registry.get("meal_classifier")
+    _worker["path"] = model_path
+    _worker["engine"] = default_engine()
+
+
+def _score_chunk(chunk_id, chunk):
+    if "Daily_Calories" not in chunk:
+        # Profiles without a calorie target get their TDEE
+        chunk = chunk.assign(Daily_Calories=recommend_arrays(
+            chunk["Age"], chunk["Gender"], chunk["Weight_kg"], chunk["Height_cm"],
+            chunk["Activity_Level"], chunk["Health_Goal"], engine=_worker["engine"])["TDEE"])
+    if not hasattr(_worker["model"], "named_steps"):
+        # Raised here rather than in _init_worker, where it would only break the pool
+        raise TypeError(f"{_worker['path']} is not a Pipeline with its FeaturePipeline; "
+                        f"export one with nutriguide.training or nutriguide.selection --export")
+    predictions = _worker["model"].predict(attach_targets(chunk, _worker["engine"]))
+    return chunk_id, chunk.index.to_numpy(), predictions, os.getpid(), peak_rss(), proportional_rss()
+
+
+@dataclass
+class ScoreStats:
+    workers: int
+    rows: int = 0
+    seconds: float = 0.0
+    worker_peak_rss: dict = field(default_factory=dict)
+    worker_pss: dict = field(default_factory=dict)
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        peak = max(self.worker_peak_rss.values(), default=0)
+        pss = sum(self.worker_pss.values())
+        return (f"workers={self.workers:<3} rows={self.rows:<10,} {self.seconds:8.2f} s "
+                f"{self.rows_per_second:12,.0f} rows/s  peak RSS/worker {format_bytes(peak):>10}  "
+                f"total PSS {format_bytes(pss):>10}")
+
+
+def score_file(input_path, output_path, workers=os.cpu_count(), chunksize=20_000,
+               model_path=DEFAULT_MODELS["meal_classifier"], mmap_mode="r"):
+    """Score ``input_path`` into ``output_path`` (columns: row, Predicted_Breakfast)."""
+    stats = ScoreStats(workers=workers)
+    start = time.perf_counter()
+    reader = pd.read_csv(input_path, chunksize=chunksize, dtype=FOODS_DTYPES)
+    pending, done, next_chunk = set(), {}, 0
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(str(model_path), mmap_mode)) as pool, \
+            open(output_path, "w", newline="") as out:
+        out.write("row,Predicted_Breakfast\n")
+        chunks = enumerate(reader)
+        exhausted = False
+        while not exhausted or pending:
+            # Keep every worker busy with at most two chunks queued per worker
+            while not exhausted and len(pending) < 2 * workers:
+                try:
+                    chunk_id, chunk = next(chunks)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(_score_chunk, chunk_id, chunk))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                chunk_id, rows, predictions, pid, peak, pss = future.result()
+                done[chunk_id] = (rows, predictions)
+                stats.worker_peak_rss[pid] = max(stats.worker_peak_rss.get(pid, 0), peak)
+                stats.worker_pss[pid] = max(stats.worker_pss.get(pid, 0), pss)
+            # Write completed chunks in input order
+            while next_chunk in done:
+                rows, predictions = done.pop(next_chunk)
+                pd.DataFrame({"row": rows, "Predicted_Breakfast": np.asarray(predictions)}) \
+                    .to_csv(out, header=False, index=False)
+                stats.rows += len(rows)
+                next_chunk += 1
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="profile CSV in the Final_Data_Set.csv layout")
+    parser.add_argument("output", help="predictions CSV to write")
+    parser.add_argument("--workers", type=int, nargs="+", default=[os.cpu_count()])
+    parser.add_argument("--chunksize", type=int, default=20_000)
+    parser.add_argument("--model", default=str(DEFAULT_MODELS["meal_classifier"]))
+    parser.add_argument("--no-mmap", action="store_true", help="load the pickle without memory-mapping its arrays")
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        stats = score_file(args.input, args.output, workers=workers, chunksize=args.chunksize,
+                           model_path=args.model,
+                           mmap_mode=None if args.no_mmap else "r")
+        print(stats)
+
+
+if __name__ == "__main__":
+    main()
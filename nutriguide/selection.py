@@ -0,0 +1,336 @@
+"""Model selection for the Breakfast classifier: accuracy, latency and footprint.
+
+Replaces the loop in notebook/best_model.ipynb.  The merged training frame
+is split once and the ``FeaturePipeline`` fitted on the training part (as
+``training.train_meal_classifier`` does); the resulting matrices are cached
+in ``datasets/selection_features.npz`` (the fitted pipeline next to it)
+keyed on the source-CSV checksum and the split/feature parameters, so later
+runs skip the merge and feature engineering.
+
+Candidates are fitted in parallel worker processes (joblib, one model per
+worker, each single-threaded) and then measured one at a time in the parent,
+so latencies are not skewed by the fits running next to them.  Per
+candidate the report records:
+
+* fit wall and CPU seconds (the wall time is measured while other fits share
+  the cores),
+* single-row predict latency (p50/p99) and batch throughput,
+* pickled size, accuracy and macro F1 on the held-out split.
+
+XGBoost and LightGBM are used when installed and reported as skipped
+otherwise.  The report is JSON; ``selected`` is the most accurate candidate
+within ``--max-latency-ms`` and ``--max-size-mb``.
+
+    python -m nutriguide.selection [--jobs 4] [--candidates random_forest knn ...]
+                                   [--report selection_report.json] [--export]
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import time
+import warnings
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from .paths import DATASETS_DIR
+from .registry import DEFAULT_MODELS
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = "selection_features.npz"
+CACHE_ARTIFACTS = "selection_features.joblib"
+# Bump when FeaturePipeline, the training table or the split changes meaning
+CACHE_VERSION = 2
+
+
+def _random_forest():
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(random_state=42)
+
+
+def _xgboost():
+    from xgboost import XGBClassifier
+    return XGBClassifier(random_state=42, eval_metric="mlogloss", n_jobs=1)
+
+
+def _lightgbm():
+    from lightgbm import LGBMClassifier
+    return LGBMClassifier(random_state=42, n_jobs=1, verbose=-1)
+
+
+def _logistic_regression():
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(max_iter=1000, random_state=42)
+
+
+def _knn():
+    from sklearn.neighbors import KNeighborsClassifier
+    return KNeighborsClassifier()
+
+
+def _svm():
+    from sklearn.svm import SVC
+    return SVC(random_state=42)
+
+
+def _gradient_boosting():
+    from sklearn.ensemble import GradientBoostingClassifier
+    return GradientBoostingClassifier(random_state=42)
+
+
+def _neural_network():
+    from sklearn.neural_network import MLPClassifier
+    return MLPClassifier(hidden_layer_sizes=(100,), max_iter=1000, random_state=42)
+
+
+# The candidates of best_model.ipynb, same hyperparameters
+CANDIDATES = {
+    "random_forest": _random_forest,
+    "xgboost": _xgboost,
+    "lightgbm": _lightgbm,
+    "logistic_regression": _logistic_regression,
+    "knn": _knn,
+    "svm": _svm,
+    "gradient_boosting": _gradient_boosting,
+    "neural_network": _neural_network,
+}
+
+
+@dataclass(frozen=True)
+class SelectionData:
+    X_train: np.ndarray
+    X_test: np.ndarray
+    y_train: np.ndarray  # label-encoded
+    y_test: np.ndarray
+    classes: np.ndarray
+    features: object  # fitted FeaturePipeline
+    key: str
+    from_cache: bool
+
+
+@dataclass(frozen=True)
+class CandidateResult:
+    name: str
+    status: str  # "ok", "skipped: ..." or "failed: ..."
+    fit_seconds: float = None
+    fit_cpu_seconds: float = None
+    predict_p50_ms: float = None
+    predict_p99_ms: float = None
+    batch_rows_per_second: float = None
+    model_bytes: int = None
+    accuracy: float = None
+    macro_f1: float = None
+
+
+def _cache_key(checksum, target, k, test_size, random_state):
+    return f"v{CACHE_VERSION}:{checksum}:{target}:{k}:{test_size}:{random_state}"
+
+
+def load_selection_data(target="Breakfast", k=25, test_size=0.2, random_state=42,
+                        cache_dir=DATASETS_DIR, refresh=False):
+    """Train/test matrices for ``target``, from the on-disk cache when it matches the inputs."""
+    from .data import source_checksum
+
+    cache_dir = Path(cache_dir)
+    key = _cache_key(source_checksum(), target, k, test_size, random_state)
+    arrays_path, artifacts_path = cache_dir / CACHE_FILE, cache_dir / CACHE_ARTIFACTS
+    if not refresh and arrays_path.exists() and artifacts_path.exists():
+        with np.load(arrays_path, allow_pickle=False) as npz:
+            if str(npz["key"]) == key:
+                arrays = {name: npz[name] for name in ("X_train", "X_test", "y_train", "y_test", "classes")}
+                artifacts = joblib.load(artifacts_path)
+                if artifacts.get("key") == key:
+                    return SelectionData(**arrays, features=artifacts["features"], key=key, from_cache=True)
+        logger.info("%s is stale; rebuilding", arrays_path)
+
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+
+    from .features import FeaturePipeline
+    from .training import load_training_frame
+
+    frame = load_training_frame()
+    encoder = LabelEncoder()
+    y = encoder.fit_transform(frame[target].astype(str))
+    train, test, y_train, y_test = train_test_split(frame, y, test_size=test_size, random_state=random_state)
+    with warnings.catch_warnings():
+        # SelectKBest warns about the constant one-hot columns it drops
+        warnings.simplefilter("ignore")
+        features = FeaturePipeline(k=k).fit(train, y_train)
+    data = SelectionData(
+        X_train=features.transform(train),
+        X_test=features.transform(test),
+        y_train=y_train,
+        y_test=y_test,
+        classes=np.array(encoder.classes_, dtype=str),
+        features=features,
+        key=key,
+        from_cache=False,
+    )
+    tmp = arrays_path.with_name(arrays_path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, key=np.array(key), X_train=data.X_train, X_test=data.X_test,
+                 y_train=data.y_train, y_test=data.y_test, classes=data.classes)
+    joblib.dump({"key": key, "features": features}, artifacts_path)
+    # Readers never see a half-written matrix
+    os.replace(tmp, arrays_path)
+    return data
+
+
+def _fit(name, X_train, y_train):
+    """Worker: (name, fitted estimator or None, status, wall seconds, CPU seconds)."""
+    try:
+        estimator = CANDIDATES[name]()
+    except ImportError as exc:
+        return name, None, f"skipped: {exc.name or exc} not installed", None, None
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            estimator.fit(X_train, y_train)
+    except Exception as exc:
+        return name, None, f"failed: {exc!r}", None, None
+    return name, estimator, "ok", time.perf_counter() - wall, time.process_time() - cpu
+
+
+def measure(estimator, X_test, y_test, repeat=200):
+    """Latency, throughput, size and quality of a fitted estimator, as ``CandidateResult`` fields."""
+    from sklearn.metrics import accuracy_score, f1_score
+
+    rows = X_test[np.arange(repeat) % len(X_test)]
+    estimator.predict(rows[:1])
+    times = []
+    for i in range(repeat):
+        row = rows[i:i + 1]
+        start = time.perf_counter()
+        estimator.predict(row)
+        times.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    predictions = estimator.predict(X_test)
+    batch_seconds = time.perf_counter() - start
+    buffer = io.BytesIO()
+    joblib.dump(estimator, buffer)
+    return {
+        "predict_p50_ms": float(np.percentile(times, 50) * 1e3),
+        "predict_p99_ms": float(np.percentile(times, 99) * 1e3),
+        "batch_rows_per_second": len(X_test) / batch_seconds,
+        "model_bytes": buffer.tell(),
+        "accuracy": float(accuracy_score(y_test, predictions)),
+        "macro_f1": float(f1_score(y_test, predictions, average="macro")),
+    }
+
+
+def run_selection(data, names=None, jobs=-1, repeat=200):
+    """(results, fitted estimators by name) for ``names`` (all ``CANDIDATES`` by default)."""
+    from joblib import Parallel, delayed
+
+    names = list(names or CANDIDATES)
+    unknown = set(names) - set(CANDIDATES)
+    if unknown:
+        raise ValueError(f"unknown candidates {sorted(unknown)}; choose from {list(CANDIDATES)}")
+    fitted = Parallel(n_jobs=jobs)(delayed(_fit)(name, data.X_train, data.y_train) for name in names)
+    results, estimators = [], {}
+    for name, estimator, status, wall, cpu in fitted:
+        if estimator is None:
+            results.append(CandidateResult(name=name, status=status))
+            continue
+        estimators[name] = estimator
+        results.append(CandidateResult(name=name, status=status, fit_seconds=wall, fit_cpu_seconds=cpu,
+                                       **measure(estimator, data.X_test, data.y_test, repeat)))
+    return results, estimators
+
+
+def select(results, max_latency_ms=None, max_size_mb=None):
+    """Most accurate "ok" candidate within the latency (p99) and size limits, or None."""
+    eligible = [
+        r for r in results
+        if r.status == "ok"
+        and (max_latency_ms is None or r.predict_p99_ms <= max_latency_ms)
+        and (max_size_mb is None or r.model_bytes <= max_size_mb * 2**20)
+    ]
+    return max(eligible, key=lambda r: (r.accuracy, -r.predict_p99_ms), default=None)
+
+
+def build_report(data, results, selected, jobs, seconds, max_latency_ms=None, max_size_mb=None):
+    return {
+        "cache_key": data.key,
+        "features_from_cache": data.from_cache,
+        "train_rows": int(len(data.X_train)),
+        "test_rows": int(len(data.X_test)),
+        "features": int(data.X_train.shape[1]),
+        "classes": data.classes.tolist(),
+        "jobs": jobs,
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "seconds": seconds,
+        "constraints": {"max_latency_ms": max_latency_ms, "max_size_mb": max_size_mb},
+        "selected": selected.name if selected else None,
+        "candidates": [asdict(r) for r in results],
+    }
+
+
+def export_model(data, estimator, path=DEFAULT_MODELS["meal_classifier"]):
+    """Save ``data.features`` and ``estimator`` (fitted on label codes) as the serving pipeline."""
+    from sklearn.pipeline import Pipeline
+
+    from .training import LabelledClassifier, save_meal_classifier
+
+    if not hasattr(estimator, "predict_proba"):
+        logger.warning("%s has no predict_proba; the micro-batcher cannot score it", type(estimator).__name__)
+    # The estimator predicts label codes; the exported pipeline must predict meal names
+    model = Pipeline([("features", data.features), ("model", LabelledClassifier.prefitted(estimator, data.classes))])
+    save_meal_classifier(model, path)
+    return model
+
+
+def _format(result):
+    if result.status != "ok":
+        return f"{result.name:<20} {result.status}"
+    return (f"{result.name:<20} acc {result.accuracy:.4f}  F1 {result.macro_f1:.4f}  "
+            f"fit {result.fit_seconds:7.2f} s ({result.fit_cpu_seconds:6.2f} CPU)  "
+            f"1 row p50 {result.predict_p50_ms:7.3f} ms p99 {result.predict_p99_ms:7.3f} ms  "
+            f"batch {result.batch_rows_per_second:11,.0f} rows/s  {result.model_bytes / 2**20:8.2f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Breakfast classifier candidates.")
+    parser.add_argument("--candidates", nargs="+", choices=list(CANDIDATES), default=list(CANDIDATES))
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel fits (-1: one per core)")
+    parser.add_argument("--repeat", type=int, default=200, help="single-row predictions timed per candidate")
+    parser.add_argument("--max-latency-ms", type=float, help="p99 single-row limit for the selection")
+    parser.add_argument("--max-size-mb", type=float, help="pickled size limit for the selection")
+    parser.add_argument("--report", default="selection_report.json")
+    parser.add_argument("--refresh", action="store_true", help="rebuild the cached feature matrix")
+    parser.add_argument("--export", action="store_true",
+                        help=f"save the selected model with its pipeline to {DEFAULT_MODELS['meal_classifier']}")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    data = load_selection_data(refresh=args.refresh)
+    print(f"features {'from cache' if data.from_cache else 'built'} in {time.perf_counter() - started:.2f} s: "
+          f"{data.X_train.shape[0]:,} train / {data.X_test.shape[0]:,} test rows, {data.X_train.shape[1]} columns")
+    results, estimators = run_selection(data, args.candidates, jobs=args.jobs, repeat=args.repeat)
+    seconds = time.perf_counter() - started
+    for result in sorted(results, key=lambda r: (r.status != "ok", -(r.accuracy or 0))):
+        print(_format(result))
+    selected = select(results, args.max_latency_ms, args.max_size_mb)
+    print(f"selected: {selected.name if selected else 'none within the limits'} ({seconds:.1f} s total)")
+
+    with open(args.report, "w") as f:
+        json.dump(build_report(data, results, selected, args.jobs, seconds, args.max_latency_ms,
+                               args.max_size_mb), f, indent=2)
+    print(f"report written to {args.report}")
+
+    if args.export and selected is not None:
+        export_model(data, estimators[selected.name])
+        print(f"exported {selected.name} to {DEFAULT_MODELS['meal_classifier']}")
+
+
+if __name__ == "__main__":
+    main()
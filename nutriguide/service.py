@@ -0,0 +1,427 @@
+"""HTTP JSON API over the recommendation engine, as a plain ASGI application.
+
+Endpoints (JSON in, JSON out):
+
+* ``POST /recommend`` -- one profile (``age``, ``gender``, ``weight``,
+  ``height`` and optionally ``activity``, ``goal``, ``diet``,
+  ``weekly_activity_days``, ``disease``, ``food_allergies``, ``k``): BMR,
+  TDEE, macros, the ``k`` closest diet-compatible meal plans, the nutrient
+  targets and, when the exported classifier pipeline is available, its
+  breakfast pick.
+* ``POST /recommend/batch`` -- ``{"profiles": [...]}``: the same numbers for
+  every profile in one vectorized pass (``batch.recommend_arrays``), one
+  meal plan each.
+* ``GET /nutrients?calories=2100`` -- the nutrient-target row closest to a
+  calorie level; ``POST /nutrients`` with a profile adds its own needs.
+* ``GET /health`` -- readiness and cache statistics.
+* ``GET /metrics`` -- Prometheus text: per-stage latency and RSS growth
+  histograms (``instrumentation``) and the micro-batcher's histograms.
+
+Add ``?trace=1`` or an ``X-NutriGuide-Trace: 1`` header to any request to
+get its stage timings back in a ``Server-Timing`` header.
+
+Datasets, indexes and the classifier are loaded once per process by the ASGI
+lifespan startup, before the server accepts requests.  Single-profile
+responses are memoized as encoded bytes per normalized request, so repeated
+profiles cost a dict lookup.  Classifier picks of concurrent requests are
+scored together through a ``batching.MicroBatcher``.
+
+No web framework is needed; any ASGI server runs it, e.g. several worker
+processes with uvicorn (in ``requirements.txt``):
+
+    python -m nutriguide.service --workers 4 --port 8000
+
+Every worker loads its own copy of the classifier, so memory grows with the
+worker count; ``NUTRIGUIDE_MODEL_MMAP=r`` maps only the pickle's top-level
+arrays, not the forest's trees.
+``python -m benchmarks.load_test`` drives a local server and reports
+throughput and latency percentiles.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import socket
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from urllib.parse import parse_qs
+
+import numpy as np
+
+from .cache import RecommendationCache, profile_key
+from .engine import Profile, default_engine
+from .instrumentation import default_instrumentation, span, start_trace
+from .registry import ModelUnavailable, default_registry
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "meal_classifier"
+MAX_BODY_BYTES = 1 << 20
+MAX_BATCH = 10_000
+TRACE_HEADER = b"x-nutriguide-trace"
+# Prometheus text exposition format
+METRICS_CONTENT_TYPE = b"text/plain; version=0.0.4; charset=utf-8"
+
+_TEXT_FIELDS = ("gender", "activity", "goal", "diet", "disease", "food_allergies")
+
+
+class RequestError(ValueError):
+    """A client error, answered with ``status`` and a JSON ``{"error": ...}`` body."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _finite(value, kind, message):
+    """``kind(value)``; raises ``RequestError(message)`` for non-numbers, NaN and infinities.
+
+    ``json.loads`` turns ``NaN``, ``Infinity`` and ``1e400`` into floats that
+    ``float()`` accepts and ``int()`` rejects with OverflowError.
+    """
+    try:
+        number = kind(value)
+    except (TypeError, ValueError, OverflowError):
+        raise RequestError(message) from None
+    if not math.isfinite(number):
+        raise RequestError(message)
+    return number
+
+
+def parse_profile(payload):
+    """``Profile`` from a JSON object; raises ``RequestError`` on missing or bad fields."""
+    if not isinstance(payload, dict):
+        raise RequestError("expected a JSON object")
+    values = {}
+    for name, kind in (("age", int), ("weight", float), ("height", float)):
+        if name not in payload:
+            raise RequestError(f"missing field {name!r}")
+        values[name] = _finite(payload[name], kind, f"field {name!r} must be a finite number")
+    if "gender" not in payload:
+        raise RequestError("missing field 'gender'")
+    if values["age"] <= 0 or values["weight"] <= 0 or values["height"] <= 0:
+        raise RequestError("age, weight and height must be positive")
+    for name in _TEXT_FIELDS:
+        if payload.get(name) is not None:
+            values[name] = str(payload[name])
+    if payload.get("weekly_activity_days") is not None:
+        values["weekly_activity_days"] = _finite(payload["weekly_activity_days"], int,
+                                                 "field 'weekly_activity_days' must be an integer")
+    return Profile(**values)
+
+
+def _plain(value):
+    """numpy scalars to Python numbers, recursively, for ``json.dumps``."""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def recommendation_payload(recommendation):
+    """JSON-ready dict of a ``Recommendation``."""
+    return {
+        "bmr": recommendation.bmr,
+        "tdee": recommendation.tdee,
+        "protein_g_per_kg": recommendation.protein,
+        "protein_g": recommendation.profile.weight * recommendation.protein,
+        "fat_g": recommendation.fat,
+        "carbs_g": recommendation.carbs,
+        "meal_plans": [asdict(plan) for plan in recommendation.meal_plans],
+        "nutrients": recommendation.nutrients,
+    }
+
+
+class RecommendationService:
+    """ASGI application serving recommendations from one engine per process."""
+
+    def __init__(self, engine_factory=default_engine, registry=None, model_name=MODEL_NAME,
+                 response_cache_size=8192, instrumentation=None):
+        self.engine_factory = engine_factory
+        self.instrumentation = instrumentation or default_instrumentation()
+        self.registry = registry
+        self.model_name = model_name
+        self.response_cache_size = response_cache_size
+        self.engine = None
+        self.classifier = None
+        self.batcher = None
+        self.recommendations = RecommendationCache()
+        self._responses = OrderedDict()  # normalized request -> encoded body, oldest first
+        self._lock = threading.Lock()
+        self._response_hits = self._response_misses = 0
+        self._routes = {
+            ("POST", "/recommend"): self._recommend,
+            ("POST", "/recommend/batch"): self._recommend_batch,
+            ("GET", "/nutrients"): self._nutrients_at,
+            ("POST", "/nutrients"): self._nutrients_for,
+            ("GET", "/health"): self._health,
+            ("GET", "/metrics"): self._metrics,
+        }
+
+    def startup(self):
+        """Load datasets, indexes and the classifier; idempotent."""
+        if self.engine is not None:
+            return
+        with self._lock:
+            if self.engine is not None:
+                return
+            engine = self.engine_factory()
+            registry = self.registry or default_registry()
+            try:
+                classifier = registry.get(self.model_name)
+            except ModelUnavailable as exc:
+                # Checkouts without the Git LFS model files still serve the rule-based numbers
+                logger.warning("%s, serving without classifier picks", exc)
+                classifier = None
+            except Exception:
+                logger.exception("%s failed to load, serving without classifier picks", self.model_name)
+                classifier = None
+            # Only exported pipelines carry their own features
+            self.classifier = classifier if hasattr(classifier, "named_steps") else None
+            if self.classifier is not None:
+                from .batching import breakfast_batcher
+
+                # Concurrent requests share one predict_proba call
+                self.batcher = breakfast_batcher(self.classifier)
+            self.engine = engine
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await asyncio.to_thread(self.startup)
+                except Exception as exc:
+                    logger.exception("startup failed")
+                    await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        handler = self._routes.get((method, path))
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        trace = start_trace() if self._trace_requested(scope, query) else None
+        try:
+            if handler is None:
+                if any(route == path for _, route in self._routes):
+                    raise RequestError(f"{method} not allowed on {path}", status=405)
+                raise RequestError(f"no route {path}", status=404)
+            # Unmatched paths are not timed, so clients cannot add stages
+            with self.instrumentation.span(f"http {method} {path}"):
+                body = await self._read_body(receive)
+                if self.engine is None:
+                    # Servers without lifespan support load on the first request
+                    await asyncio.to_thread(self.startup)
+                status, payload = 200, handler(body, query)
+                if asyncio.iscoroutine(payload):
+                    payload = await payload
+        except RequestError as exc:
+            status, payload = exc.status, json.dumps({"error": str(exc)}).encode()
+        except Exception:
+            logger.exception("error handling %s %s", method, path)
+            status, payload = 500, b'{"error": "internal error"}'
+        content_type = METRICS_CONTENT_TYPE if path == "/metrics" and status == 200 else b"application/json"
+        headers = [(b"content-type", content_type), (b"content-length", str(len(payload)).encode())]
+        if trace is not None:
+            headers.append((b"server-timing", trace.finish().server_timing().encode()))
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": headers,
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    @staticmethod
+    def _trace_requested(scope, query):
+        if query.get("trace", [""])[0] in ("1", "true"):
+            return True
+        return any(name == TRACE_HEADER and value in (b"1", b"true") for name, value in scope.get("headers", ()))
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise RequestError("request body too large", status=413)
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    @staticmethod
+    def _json(body):
+        try:
+            return json.loads(body) if body else {}
+        except ValueError:
+            raise RequestError("request body is not valid JSON") from None
+
+    @staticmethod
+    def _k(payload, default):
+        k = _finite(payload.get("k", default), int, "field 'k' must be an integer")
+        if not 1 <= k <= 20:
+            raise RequestError("field 'k' must be between 1 and 20")
+        return k
+
+    async def _recommend(self, body, query):
+        payload = self._json(body)
+        profile = parse_profile(payload)
+        k = self._k(payload, 3)
+        # Classifier inputs include the fields the recommendation cache ignores
+        key = (profile_key(profile), k, profile.weekly_activity_days,
+               (profile.disease or "").strip().lower(), (profile.food_allergies or "").strip().lower())
+        with self._lock:
+            encoded = self._responses.get(key)
+            if encoded is not None:
+                self._response_hits += 1
+                self._responses.move_to_end(key)
+                return encoded
+            self._response_misses += 1
+
+        recommendation = self.recommendations.recommend(self.engine, profile, k=k)
+        result = recommendation_payload(recommendation)
+        if self.classifier is not None:
+            from .features import profile_record
+
+            record = profile_record(profile, self.engine, recommendation.tdee)
+            result["suggested_breakfast"] = (await self.batcher.predict_async(record)).label
+        encoded = json.dumps(_plain(result), allow_nan=False).encode()
+        with self._lock:
+            self._responses[key] = encoded
+            while len(self._responses) > self.response_cache_size:
+                self._responses.popitem(last=False)
+        return encoded
+
+    async def _recommend_batch(self, body, query):
+        payload = self._json(body)
+        profiles = payload.get("profiles") if isinstance(payload, dict) else None
+        if not isinstance(profiles, list):
+            raise RequestError("expected {\"profiles\": [...]}")
+        if len(profiles) > MAX_BATCH:
+            raise RequestError(f"at most {MAX_BATCH} profiles per batch", status=413)
+        profiles = [parse_profile(profile) for profile in profiles]
+        # Large batches take milliseconds; keep the event loop free for other requests
+        return await asyncio.to_thread(self._batch, profiles)
+
+    def _batch(self, profiles):
+        from .batch import recommend_arrays
+
+        if not profiles:
+            return b'{"results": []}'
+        def column(name):
+            return np.array([getattr(profile, name) for profile in profiles], dtype=object)
+
+        with span("batch_recommend"):
+            result = recommend_arrays(
+                age=column("age"),
+                gender=column("gender"),
+                weight=column("weight"),
+                height=column("height"),
+                activity=column("activity"),
+                goal=column("goal"),
+                diet=column("diet"),
+                engine=self.engine,
+            )
+        results = []
+        for i in range(len(profiles)):
+            meal_row = result["Meal_Row"][i]
+            results.append({
+                "bmr": result["BMR"][i],
+                "tdee": result["TDEE"][i],
+                "protein_g_per_kg": result["Protein_g_per_kg"][i],
+                "protein_g": result["Protein_g"][i],
+                "fat_g": result["Fat_g"][i],
+                "carbs_g": result["Carbs_g"][i],
+                "meal_plans": [asdict(plan) for plan in self.engine.meal_plans_at([meal_row])] if meal_row >= 0 else [],
+                "nutrients": self.engine.nutrient_targets_at(result["Nutrient_Row"][i]),
+            })
+        return json.dumps(_plain({"results": results}), allow_nan=False).encode()
+
+    def _nutrients_at(self, body, query):
+        if "calories" not in query:
+            raise RequestError("query parameter 'calories' must be a finite number")
+        calories = _finite(query["calories"][0], float, "query parameter 'calories' must be a finite number")
+        return json.dumps(_plain({"targets": self.engine.nutrient_targets(calories)}), allow_nan=False).encode()
+
+    def _nutrients_for(self, body, query):
+        profile = parse_profile(self._json(body))
+        recommendation = self.recommendations.recommend(self.engine, profile, k=1)
+        return json.dumps(_plain({
+            "actual": recommendation.actual_nutrients(),
+            "recommended": recommendation.recommended_nutrients(),
+            "targets": recommendation.nutrients,
+        }), allow_nan=False).encode()
+
+    def _health(self, body, query):
+        with self._lock:
+            responses = {"size": len(self._responses), "hits": self._response_hits,
+                         "misses": self._response_misses}
+        return json.dumps({
+            "ready": self.engine is not None,
+            "classifier": self.classifier is not None,
+            "breakfast_batcher": None if self.batcher is None else str(self.batcher.stats()),
+            "recommendations": str(self.recommendations.stats()),
+            "responses": responses,
+        }).encode()
+
+    def _metrics(self, body, query):
+        text = self.instrumentation.exposition()
+        if self.batcher is not None:
+            text += self.batcher.exposition() + "\n"
+        return text.encode()
+
+
+# ``uvicorn nutriguide.service:app`` -- each worker process imports and starts its own
+app = RecommendationService()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the recommendation API with uvicorn.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is not installed (pip install uvicorn); "
+                         "any ASGI server can run nutriguide.service:app") from None
+    config = uvicorn.Config("nutriguide.service:app", host=args.host, port=args.port, workers=args.workers,
+                            log_level=args.log_level, lifespan="on", access_log=False)
+    if args.workers <= 1:
+        uvicorn.Server(config).run()
+        return
+    from uvicorn.supervisors import Multiprocess
+
+    # uvicorn binds the shared socket with proto 0, so asyncio skips TCP_NODELAY on the
+    # connections the workers accept and every response waits out a delayed ACK (~40 ms);
+    # accepted sockets inherit the option from the listening one
+    sock = config.bind_socket()
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    try:
+        supervisor = Multiprocess(config, sockets=[sock])
+    except TypeError:
+        # uvicorn < 0.30 takes the worker entry point explicitly
+        supervisor = Multiprocess(config, target=uvicorn.Server(config).run, sockets=[sock])
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Top-k selection: the k smallest scores without sorting everything.
+
+``top_k`` selects with ``np.argpartition`` (O(n)) and sorts only the k
+winners, breaking ties by position exactly like a stable full sort followed by
+``[:k]``.  ``StreamingTopK`` keeps a bounded buffer of the best k seen so far
+and merges chunk after chunk into it, so catalogs read in chunks
+(``pd.read_csv(chunksize=...)``, memory-mapped ``.npy`` files) never need to
+fit in memory; ``nearest_in_chunks`` / ``nearest_in_csv`` apply it to "rows
+closest to a calorie target".
+
+    rows = top_k(np.abs(calories - tdee), 3)
+    rows, calories = nearest_in_csv("Meal_Catalog.csv", tdee, k=3)
+"""
+import numpy as np
+
+
+def top_k(scores, k):
+    """Positions of the ``k`` smallest ``scores``, smallest first, ties in position order."""
+    scores = np.asarray(scores)
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k == n:
+        return np.argsort(scores, kind="stable")
+    if k == 1:
+        return np.array([np.argmin(scores)], dtype=np.intp)
+    kth = scores[np.argpartition(scores, k - 1)[k - 1]]
+    # Everything strictly better than the k-th value, then the earliest rows tied with it
+    below = np.flatnonzero(scores < kth)
+    tied = np.flatnonzero(scores == kth)[:k - len(below)]
+    candidates = np.concatenate([below, tied])
+    return candidates[np.lexsort((candidates, scores[candidates]))]
+
+
+def nearest_k(values, target, k):
+    """Positions of the ``k`` values closest to ``target``, nearest first."""
+    return top_k(np.abs(np.asarray(values, dtype=np.float64) - target), k)
+
+
+class StreamingTopK:
+    """Best ``k`` (score, global position, payload) over scores pushed chunk by chunk."""
+
+    def __init__(self, k):
+        self.k = k
+        self.scores = np.empty(0, dtype=np.float64)
+        self.positions = np.empty(0, dtype=np.int64)
+        self.payload = None
+        self.seen = 0
+
+    def push(self, scores, payload=None):
+        """Merge the next chunk; its positions continue from the rows already pushed.
+
+        ``payload`` (same length as ``scores``) is carried along for the winners,
+        e.g. the calorie values themselves.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        best = top_k(scores, self.k)
+        merged_scores = np.concatenate([self.scores, scores[best]])
+        merged_positions = np.concatenate([self.positions, best + self.seen])
+        # Earlier chunks come first in the buffer, so ties keep global position order
+        keep = top_k(merged_scores, self.k)
+        if payload is not None:
+            chunk_payload = np.asarray(payload)[best]
+            merged = chunk_payload if self.payload is None else np.concatenate([self.payload, chunk_payload])
+            self.payload = merged[keep]
+        self.scores, self.positions = merged_scores[keep], merged_positions[keep]
+        self.seen += len(scores)
+        return self
+
+    def result(self):
+        """(positions, scores) of the best ``k``, best first."""
+        return self.positions, self.scores
+
+
+def nearest_in_chunks(chunks, target, k, column=None):
+    """(positions, values) of the ``k`` rows closest to ``target`` across ``chunks``.
+
+    ``chunks`` yields arrays, or DataFrames when ``column`` names the value
+    column; positions count rows across all chunks.
+    """
+    best = StreamingTopK(k)
+    for chunk in chunks:
+        values = np.asarray(chunk[column] if column is not None else chunk)
+        best.push(np.abs(values.astype(np.float64) - target), payload=values)
+    values = best.payload if best.payload is not None else np.empty(0)
+    return best.positions, values
+
+
+def nearest_in_csv(path, target, k, column="Daily_Calories", chunksize=1_000_000):
+    """``nearest_in_chunks`` over a CSV read ``chunksize`` rows at a time (only ``column`` parsed)."""
+    import pandas as pd
+
+    reader = pd.read_csv(path, usecols=[column], chunksize=chunksize)
+    return nearest_in_chunks(reader, target, k, column=column)
+
+
+def iter_array_chunks(array, chunksize=1_000_000):
+    """Slices of a (memory-mapped) array, ``chunksize`` rows at a time."""
+    for start in range(0, len(array), chunksize):
+        yield array[start:start + chunksize]
@@ -0,0 +1,135 @@
+"""Training of the Breakfast meal classifier with its feature pipeline.
+
+The exported artifact is a scikit-learn ``Pipeline`` of ``FeaturePipeline``
+and the classifier, dumped uncompressed.  ``train_calorie_regressor``
+reproduces the Daily_Calories forest of model_training.ipynb.
+
+    python -m nutriguide.training [--output model/meal_classifier_model.pkl]
+"""
+import argparse
+import os
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from .features import FeaturePipeline
+from .registry import DEFAULT_MODELS
+
+
+def load_training_frame(data=None):
+    """Profiles with their meal plan and nutrient targets, one row per profile (see ``trainset``)."""
+    from .trainset import load_training_table
+    return load_training_table(data)
+
+
+def build_meal_classifier(estimator=None, k=25):
+    return Pipeline([
+        ("features", FeaturePipeline(k=k)),
+        ("model", estimator if estimator is not None else RandomForestClassifier(random_state=42)),
+    ])
+
+
+def train_meal_classifier(frame=None, target="Breakfast", estimator=None, k=25, test_size=0.2, random_state=42):
+    """Fit the pipeline on a train split; returns (pipeline, held-out accuracy)."""
+    frame = load_training_frame() if frame is None else frame
+    y = frame[target].astype(str)
+    X_train, X_test, y_train, y_test = train_test_split(frame, y, test_size=test_size, random_state=random_state)
+    model = build_meal_classifier(estimator, k=k).fit(X_train, y_train)
+    return model, model.score(X_test, y_test)
+
+
+class LabelledClassifier(ClassifierMixin, BaseEstimator):
+    """Classifier predicting class labels for an estimator that works on label codes.
+
+    ``fit`` encodes ``y`` and fits a clone of ``estimator`` on the codes;
+    ``prefitted`` wraps an estimator already fitted on codes of ``classes``
+    (as ``nutriguide.selection`` fits its candidates).
+    """
+
+    def __init__(self, estimator=None):
+        self.estimator = estimator
+
+    @classmethod
+    def prefitted(cls, estimator, classes):
+        model = cls(estimator)
+        model.estimator_ = estimator
+        model.classes_ = np.asarray(classes, dtype=object)
+        return model
+
+    def fit(self, X, y):
+        from sklearn.preprocessing import LabelEncoder
+
+        encoder = LabelEncoder()
+        codes = encoder.fit_transform(np.asarray(y).astype(str))
+        estimator = RandomForestClassifier(random_state=42) if self.estimator is None else self.estimator
+        self.estimator_ = clone(estimator).fit(X, codes)
+        self.classes_ = encoder.classes_.astype(object)
+        return self
+
+    def __sklearn_is_fitted__(self):
+        return hasattr(self, "estimator_")
+
+    def predict(self, X):
+        return self.classes_[np.asarray(self.estimator_.predict(X), dtype=np.intp)]
+
+    def predict_proba(self, X):
+        return self.estimator_.predict_proba(X)
+
+
+def save_meal_classifier(model, path=DEFAULT_MODELS["meal_classifier"]):
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    # Uncompressed: loads without a decompression pass
+    joblib.dump(model, tmp)
+    # Replaced, not rewritten: artifact versions built from the old file keep reading it
+    os.replace(tmp, path)
+
+
+# Inputs of the calorie regressor (model_training.ipynb)
+CALORIE_FEATURES = ["Weight_kg", "Height_cm", "BMI", "Activity_Level", "Weekly_Activity_Days"]
+CALORIE_SCALED = ["Weight_kg", "Height_cm", "BMI"]
+
+
+def calorie_design(foods, scaler=None):
+    """Regressor matrix: Activity_Level dummies and scaled body measures; fits ``scaler`` if None."""
+    X = pd.get_dummies(foods[CALORIE_FEATURES], columns=["Activity_Level"])
+    if scaler is None:
+        scaler = StandardScaler().fit(X[CALORIE_SCALED])
+    X[CALORIE_SCALED] = scaler.transform(X[CALORIE_SCALED])
+    return X, scaler
+
+
+def train_calorie_regressor(foods=None, n_estimators=100, test_size=0.2, random_state=42):
+    """Fit the Daily_Calories forest; returns (model, scaler, (X_test, y_test))."""
+    if foods is None:
+        from .data import load_datasets
+        foods = load_datasets().foods
+    X, scaler = calorie_design(foods)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, foods["Daily_Calories"], test_size=test_size, random_state=random_state)
+    model = RandomForestRegressor(n_estimators=n_estimators, random_state=random_state).fit(X_train, y_train)
+    return model, scaler, (X_test, y_test)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and export the meal classifier pipeline.")
+    parser.add_argument("--output", default=str(DEFAULT_MODELS["meal_classifier"]))
+    parser.add_argument("--k", type=int, default=25, help="number of SelectKBest features")
+    args = parser.parse_args()
+
+    model, accuracy = train_meal_classifier(k=args.k)
+    print(f"Accuracy: {accuracy:.4f}")
+    print("Features:", list(model.named_steps["features"].get_feature_names_out()))
+    save_meal_classifier(model, args.output)
+    print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""The training table: profiles with their meal plan and nutrient targets.
+
+The notebooks built it with
+``pd.merge(pd.merge(foods, meals, on="Daily_Calories"), nutrients, on="Daily_Calories")``.
+Daily_Calories repeats (2,335 distinct values over 5,000 rows in each file),
+so that is a chained many-to-many join: every profile is paired with every
+meal and nutrient row sharing its calories, 5,000 rows become 54,644 and
+``drop_duplicates`` then scans them all.  The copies also put the same
+profile on both sides of a train/test split.
+
+The three CSVs are row-aligned -- row *i* of each file describes the same
+person, and their Daily_Calories columns are identical -- so the row number
+is the real key.  ``iter_training_chunks`` joins on it, ``chunksize`` rows at
+a time, and never materializes more than one chunk of join output.  Files
+that are not aligned (edited or re-exported separately) are joined on
+Daily_Calories with one meal and one nutrient row per calorie value, a
+many-to-one join that cannot inflate either.
+
+``load_training_table`` writes the table once to ``datasets/training_table.npz``
+(same columnar layout as ``datasets.npz``), stamped with the source checksum,
+and reads it from there while the CSVs are unchanged.
+
+    python -m nutriguide.trainset [--chunksize 1000]
+"""
+import argparse
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .data import _frame_arrays, _frame_from_arrays
+from .paths import DATASETS_DIR
+from .resources import format_bytes
+
+logger = logging.getLogger(__name__)
+
+TABLE_FILE = "training_table.npz"
+KEY = "Daily_Calories"
+
+
+def join_strategy(foods, meals, nutrients):
+    """"row" when the three frames are row-aligned on Daily_Calories, else "calorie"."""
+    if len(foods) == len(meals) == len(nutrients):
+        calories = foods[KEY].to_numpy()
+        if np.array_equal(calories, meals[KEY].to_numpy()) and np.array_equal(calories, nutrients[KEY].to_numpy()):
+            return "row"
+    return "calorie"
+
+
+def iter_training_chunks(data=None, chunksize=1000, strategy=None):
+    """Joined training rows with Daily_Calories > 0, ``chunksize`` profiles at a time."""
+    if data is None:
+        from .data import load_datasets
+        data = load_datasets()
+    foods, meals, nutrients = data.frames()
+    strategy = strategy or join_strategy(foods, meals, nutrients)
+    if strategy == "row":
+        meals, nutrients = meals.drop(columns=KEY), nutrients.drop(columns=KEY)
+    elif strategy == "calorie":
+        # One row per calorie value on the lookup side: a many-to-one join
+        meals = meals.drop_duplicates(KEY).set_index(KEY)
+        nutrients = nutrients.drop_duplicates(KEY).set_index(KEY)
+    else:
+        raise ValueError(f"unknown join strategy {strategy!r}")
+
+    for start in range(0, len(foods), chunksize):
+        chunk = foods.iloc[start:start + chunksize]
+        if strategy == "row":
+            chunk = pd.concat([chunk, meals.iloc[start:start + chunksize], nutrients.iloc[start:start + chunksize]],
+                              axis=1)
+        else:
+            chunk = chunk.join(meals, on=KEY, how="inner").join(nutrients, on=KEY, how="inner")
+        yield chunk[chunk[KEY] > 0]
+
+
+def build_training_table(data=None, chunksize=1000, strategy=None):
+    """The whole training table, assembled from ``iter_training_chunks``."""
+    chunks = list(iter_training_chunks(data, chunksize, strategy))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def write_training_table(table, path, checksum):
+    arrays = {"checksum": np.array(checksum)}
+    arrays.update(_frame_arrays("training", table))
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    # Readers never see a half-written file
+    os.replace(tmp, path)
+
+
+def read_training_table(path, expected_checksum=None):
+    """The table stored at ``path``, or None when its checksum differs from ``expected_checksum``."""
+    with np.load(path, allow_pickle=False) as npz:
+        if expected_checksum is not None and str(npz["checksum"]) != expected_checksum:
+            return None
+        arrays = {key: npz[key] for key in npz.files if key != "checksum"}
+    return _frame_from_arrays("training", arrays)
+
+
+def load_training_table(data=None, data_dir=DATASETS_DIR, chunksize=1000):
+    """Training table for ``data`` (the shipped datasets by default), built at most once per CSV change.
+
+    Datasets without a checksum (built by hand) are joined in memory and
+    not written.
+    """
+    if data is None:
+        from .data import load_datasets
+        data = load_datasets(data_dir)
+    if data.checksum is None:
+        return build_training_table(data, chunksize)
+    path = Path(data_dir) / TABLE_FILE
+    if path.exists():
+        table = read_training_table(path, expected_checksum=data.checksum)
+        if table is not None:
+            return table
+        logger.info("%s is stale; rebuilding", path)
+    table = build_training_table(data, chunksize)
+    write_training_table(table, path, data.checksum)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build datasets/training_table.npz.")
+    parser.add_argument("--chunksize", type=int, default=1000)
+    args = parser.parse_args()
+
+    from .data import load_datasets
+
+    data = load_datasets()
+    start = time.perf_counter()
+    table = build_training_table(data, args.chunksize)
+    path = DATASETS_DIR / TABLE_FILE
+    write_training_table(table, path, data.checksum)
+    print(f"{len(table):,} rows x {table.shape[1]} columns ({join_strategy(*data.frames())} join), "
+          f"{format_bytes(table.memory_usage(deep=True).sum())} in memory, written to {path} "
+          f"in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
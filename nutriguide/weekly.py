@@ -0,0 +1,159 @@
+"""Seven-day meal plans with variety rules, on top of the daily ``MealPlanOptimizer``.
+
+Days are solved one after the other against the same daily targets.  Each
+day is an ordinary day plan (see ``mealplan``) restricted by bans that
+encode the variety rules, which always hold:
+
+* a food is eaten on at most ``max_days_per_food`` days of the week,
+* a food is never in the same slot on two consecutive days.
+
+Each day's calories are kept within ``calorie_band`` of the target where
+the foods left allow it: the band bounds the LP and is penalized in the
+local search.  High targets on restrictive diets can run out of
+energy-dense foods late in the week; ``band_misses`` lists those days.
+
+``swap(week, day, slot)`` replaces the foods of one meal.  The bans for the
+new meal are computed from the other days, so no other day can end up
+breaking a rule: only that day is re-optimized, and only the swapped slot
+changes -- the day's other meals are held fixed in the LP and the local
+search, and the new foods are chosen to rebalance the day's totals.
+
+    planner = WeeklyPlanner(default_optimizer())
+    week = planner.plan_for(recommendation)
+    week = planner.swap(week, day=2, slot="lunch")
+    week.recomputed  # (2,)
+"""
+import time
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from .diets import allergy_mask, diet_mask
+from .instrumentation import span
+from .mealplan import GOALS, SLOTS, plan_targets
+
+DAYS = 7
+
+
+@dataclass(frozen=True)
+class WeeklyPlan:
+    days: tuple  # OptimizedPlan per day
+    steps: tuple  # half-serving counts per (food, slot) pair per day, what ``swap`` starts from
+    mask: int  # diet and allergy bitmask the week was planned for
+    targets: dict
+    limits: dict
+    recomputed: tuple  # days solved by the call that returned this week
+    solve_seconds: float
+
+    def foods(self, day):
+        """Names of the foods of ``day``, all slots."""
+        return {food.name for foods in self.days[day].meals.values() for food in foods}
+
+
+class WeeklyPlanner:
+    """Builds and incrementally updates ``WeeklyPlan`` objects; stateless between calls."""
+
+    def __init__(self, optimizer, days=DAYS, max_days_per_food=4, calorie_band=0.05):
+        self.optimizer = optimizer
+        self.days = days
+        self.max_days_per_food = max_days_per_food
+        self.calorie_band = calorie_band
+
+    def plan_for(self, recommendation):
+        """Week for a ``Recommendation``: its targets, its diet and the profile's allergies."""
+        targets, limits = plan_targets(recommendation)
+        profile = recommendation.profile
+        with span("weekly_plan"):
+            return self.plan(targets, limits, profile.diet, profile.food_allergies)
+
+    def plan(self, targets, limits, diet="non-veg", allergies=None):
+        """A ``WeeklyPlan`` of ``days`` day plans for the same daily ``targets`` and ``limits``."""
+        started = time.perf_counter()
+        mask = diet_mask(str(diet).strip().lower()) | allergy_mask(allergies)
+        targets = dict(zip(GOALS, (float(targets[name]) for name in GOALS)))
+        model = self.optimizer.model(mask)
+        plans, steps = [], []
+        for day in range(self.days):
+            movable = self._allowed(model, steps, day)
+            plan, day_steps = self.optimizer.solve(mask, targets, limits, movable=movable,
+                                                   calorie_band=self.calorie_band)
+            plans.append(plan)
+            steps.append(day_steps)
+        return WeeklyPlan(
+            days=tuple(plans),
+            steps=tuple(steps),
+            mask=mask,
+            targets=targets,
+            limits=dict(limits),
+            recomputed=tuple(range(self.days)),
+            solve_seconds=time.perf_counter() - started,
+        )
+
+    def swap(self, week, day, slot):
+        """``week`` with new foods for ``slot`` on ``day``; no other meal changes."""
+        with span("weekly_swap"):
+            return self._swap(week, day, slot)
+
+    def _swap(self, week, day, slot):
+        started = time.perf_counter()
+        model = self.optimizer.model(week.mask)
+        s = SLOTS.index(slot)
+        current = week.steps[day]
+        in_slot = model.pair_slots == s
+        others = [steps for d, steps in enumerate(week.steps) if d != day]
+        # The swapped-out foods, and foods the day's other meals hold, are off the table
+        swapped = np.zeros(len(model.foods), dtype=bool)
+        swapped[model.pair_food_index[in_slot & (current > 0)]] = True
+        held = np.zeros(len(model.foods), dtype=bool)
+        held[model.pair_food_index[~in_slot & (current > 0)]] = True
+        movable = (self._allowed(model, week.steps, day, others) & in_slot
+                   & ~swapped[model.pair_food_index] & ~held[model.pair_food_index])
+        fixed = np.where(in_slot, 0.0, current)
+        plan, steps = self.optimizer.solve(week.mask, week.targets, week.limits,
+                                           movable=movable, fixed=fixed, calorie_band=self.calorie_band)
+        return replace(
+            week,
+            days=week.days[:day] + (plan,) + week.days[day + 1:],
+            steps=week.steps[:day] + (steps,) + week.steps[day + 1:],
+            recomputed=(day,),
+            solve_seconds=time.perf_counter() - started,
+        )
+
+    def _allowed(self, model, steps, day, others=None):
+        """Pairs ``day`` may use given the other days' plans (``steps`` is indexed by day)."""
+        others = steps[:day] if others is None else others
+        days_used = np.zeros(len(model.foods), dtype=np.int64)
+        for other in others:
+            np.add.at(days_used, model.pair_food_index, other > 0)
+        allowed = days_used[model.pair_food_index] < self.max_days_per_food
+        for neighbour in (day - 1, day + 1):
+            if 0 <= neighbour < len(steps):
+                allowed &= steps[neighbour] == 0
+        return allowed
+
+    def violations(self, week):
+        """Variety and calorie-band rule breaches of ``week``, as messages (empty when none)."""
+        model = self.optimizer.model(week.mask)
+        messages = []
+        days_used = np.zeros(len(model.foods), dtype=np.int64)
+        for steps in week.steps:
+            np.add.at(days_used, model.pair_food_index, steps > 0)
+        names = self.optimizer.catalog["Food"].to_numpy()[model.foods]
+        for name in names[days_used > self.max_days_per_food]:
+            messages.append(f"{name} on more than {self.max_days_per_food} days")
+        for day in range(1, len(week.steps)):
+            repeated = np.flatnonzero((week.steps[day] > 0) & (week.steps[day - 1] > 0))
+            for pair in repeated:
+                messages.append(f"{names[model.pair_food_index[pair]]} at {SLOTS[model.pair_slots[pair]]} "
+                                f"on days {day - 1} and {day}")
+        calories = week.targets["Calories"]
+        for day in self.band_misses(week):
+            messages.append(f"day {day}: {week.days[day].totals['Calories']:.0f} kcal outside "
+                            f"{calories:.0f} +/- {self.calorie_band:.0%}")
+        return messages
+
+    def band_misses(self, week):
+        """Days whose calories fall outside ``calorie_band`` of the target."""
+        calories = week.targets["Calories"]
+        return tuple(day for day, plan in enumerate(week.days)
+                     if abs(plan.totals["Calories"] - calories) > self.calorie_band * calories)